@@ -0,0 +1,407 @@
+"""
+Micro-benchmarks of the descriptor and response hot paths.
+
+Every case is run on data products of growing size (number of components and
+number of columns of the output port schemas). Results can be stored as a JSON
+baseline and compared with a later run, flagging the cases that got slower than
+the baseline by more than a threshold.
+
+Usage (from the `tech-adapter` directory):
+
+    python -m perf.benchmarks --output perf/baselines/main.json
+    python -m perf.benchmarks --compare perf/baselines/main.json --threshold 0.1
+    python -m perf.benchmarks --quick --filter parse_yaml_with_model
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import re
+import statistics
+import sys
+import time
+import weakref
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pydantic
+from loguru import logger
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from perf.descriptor_generator import DescriptorGenerator, GeneratorConfig, to_json, to_yaml
+from src.check_return_type import check_response
+from src.dependencies import (
+    unpack_component_provisioning_request,
+    unpack_provisioning_request,
+    unpack_update_acl_request,
+)
+from src.main import log_request_response_middleware
+from src.models.api_models import (
+    DescriptorKind,
+    ProvisionInfo,
+    ProvisioningRequest,
+    ProvisioningStatus,
+    Status1,
+    SystemErr,
+    UpdateAclRequest,
+    ValidationError,
+)
+from src.models.data_product_descriptor import ComponentKind, DataContract, DataProduct, OutputPort
+from src.utility.fingerprint import data_product_fingerprint
+from src.utility.parsing_pydantic_models import parse_yaml_with_model
+
+COMPONENTS = [1, 10, 100, 1000, 5000]
+COLUMNS = [10, 100, 1000, 10000]
+QUICK_COMPONENTS = [1, 10, 100]
+QUICK_COLUMNS = [10, 100]
+BODY_SIZES = [1_000, 100_000, 10_000_000]
+
+RESPONSES = {
+    "200": {"model": ProvisioningStatus},
+    "400": {"model": ValidationError},
+    "500": {"model": SystemErr},
+}
+
+
+@dataclass
+class Case:
+    name: str
+    params: dict
+    setup: Callable[[], Callable[[], object]]
+
+    @property
+    def id(self) -> str:
+        params = ",".join(f"{key}={value}" for key, value in self.params.items())
+        return f"{self.name}[{params}]"
+
+
+def _sizes(components: list[int], columns: list[int]) -> Iterator[dict]:
+    """
+    Components grow with small schemas, then a single output port gets growing schemas.
+    """
+
+    for n_components in components:
+        yield {"components": n_components, "columns": 10}
+    for n_columns in columns:
+        if n_columns != 10:
+            yield {"components": 2, "columns": n_columns}
+
+
+def _component_descriptor(n_components: int, n_columns: int) -> dict:
+    return DescriptorGenerator(GeneratorConfig(components=n_components, columns=n_columns)).component_descriptor()
+
+
+def _run_async(coroutine_function: Callable, *args) -> Callable[[], object]:
+    """
+    Returns a function running the coroutine in an event loop of its own, reused across the
+    calls so that its creation is not measured, and closed once the function is released.
+    """  # noqa: E501
+
+    runner = asyncio.Runner()
+
+    def run() -> object:
+        return runner.run(coroutine_function(*args))
+
+    weakref.finalize(run, runner.close)
+    return run
+
+
+def _descriptor_cases(components: list[int], columns: list[int]) -> Iterator[Case]:
+    for params in _sizes(components, columns):
+        n_components, n_columns = params["components"], params["columns"]
+
+        def parse_setup(n_components=n_components, n_columns=n_columns):
+            data_product = to_yaml(_component_descriptor(n_components, n_columns)["dataProduct"])
+            return lambda: parse_yaml_with_model(data_product, DataProduct)
+
+        def unpack_provisioning_setup(n_components=n_components, n_columns=n_columns):
+            request = ProvisioningRequest(
+                descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR,
+                descriptor=to_yaml(_component_descriptor(n_components, n_columns)),
+            )
+            return _run_async(unpack_provisioning_request, request)
+
+        def unpack_component_provisioning_setup(n_components=n_components, n_columns=n_columns):
+            request = ProvisioningRequest(
+                descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR,
+                descriptor=to_yaml(_component_descriptor(n_components, n_columns)),
+            )
+            return _run_async(unpack_component_provisioning_request, request)
+
+        def unpack_update_acl_setup(n_components=n_components, n_columns=n_columns):
+            request = UpdateAclRequest(
+                refs=[f"user:user_{i}" for i in range(100)],
+                provisionInfo=ProvisionInfo(
+                    request=to_json(_component_descriptor(n_components, n_columns)),
+                    result="",
+                ),
+            )
+            return _run_async(unpack_update_acl_request, request)
+
+        def unpack_update_acl_yaml_setup(n_components=n_components, n_columns=n_columns):
+            request = UpdateAclRequest(
+                refs=[f"user:user_{i}" for i in range(100)],
+                provisionInfo=ProvisionInfo(
+                    request=to_yaml(_component_descriptor(n_components, n_columns)),
+                    result="",
+                ),
+            )
+            return _run_async(unpack_update_acl_request, request)
+
+        yield Case("parse_yaml_with_model", params, parse_setup)
+        yield Case("unpack_provisioning_request", params, unpack_provisioning_setup)
+        yield Case("unpack_component_provisioning_request", params, unpack_component_provisioning_setup)
+        yield Case("unpack_update_acl_request", params, unpack_update_acl_setup)
+        yield Case("unpack_update_acl_request.yaml", params, unpack_update_acl_yaml_setup)
+
+
+def _data_product(n_components: int, n_columns: int) -> tuple[DataProduct, str]:
+    descriptor = _component_descriptor(n_components, n_columns)
+    return DataProduct(**descriptor["dataProduct"]), descriptor["componentIdToProvision"]
+
+
+def _accessor_cases(components: list[int], columns: list[int]) -> Iterator[Case]:
+    for params in _sizes(components, columns):
+        n_components, n_columns = params["components"], params["columns"]
+
+        def by_kind_setup(n_components=n_components, n_columns=n_columns):
+            data_product, _ = _data_product(n_components, n_columns)
+            return lambda: data_product.get_components_by_kind(ComponentKind.OUTPUTPORT)
+
+        def output_ports_setup(n_components=n_components, n_columns=n_columns):
+            data_product, _ = _data_product(n_components, n_columns)
+            return data_product.get_output_ports
+
+        def by_id_setup(n_components=n_components, n_columns=n_columns):
+            data_product, component_id = _data_product(n_components, n_columns)
+            return lambda: data_product.get_component_by_id(component_id)
+
+        def typed_by_id_setup(n_components=n_components, n_columns=n_columns):
+            data_product, component_id = _data_product(n_components, n_columns)
+            return lambda: data_product.get_typed_component_by_id(component_id, OutputPort)
+
+        def fingerprint_setup(n_components=n_components, n_columns=n_columns):
+            data_product, _ = _data_product(n_components, n_columns)
+
+            def fingerprint():
+                # Fingerprints are cached on the models
+                data_product._fingerprint = None
+                for component in data_product.components:
+                    component._fingerprint = None
+                return data_product_fingerprint(data_product)
+
+            return fingerprint
+
+        yield Case("get_components_by_kind", params, by_kind_setup)
+        yield Case("get_output_ports", params, output_ports_setup)
+        yield Case("get_component_by_id", params, by_id_setup)
+        yield Case("get_typed_component_by_id", params, typed_by_id_setup)
+        yield Case("data_product_fingerprint", params, fingerprint_setup)
+
+
+def _schema_cases(columns: list[int]) -> Iterator[Case]:
+    for n_columns in columns:
+
+        def valid_setup(n_columns=n_columns):
+            schema = _component_descriptor(1, n_columns)["dataProduct"]["components"][0]["dataContract"]
+            return lambda: DataContract(**schema)
+
+        def invalid_setup(n_columns=n_columns):
+            schema = _component_descriptor(1, n_columns)["dataProduct"]["components"][0]["dataContract"]
+            for column in schema["schema"][::100]:
+                column["dataType"] = "NOT_A_TYPE"
+
+            def validate():
+                try:
+                    DataContract(**schema)
+                except pydantic.ValidationError:
+                    pass
+
+            return validate
+
+        yield Case("DataContract.validate", {"columns": n_columns}, valid_setup)
+        yield Case("DataContract.validate", {"columns": n_columns, "invalid": "1%"}, invalid_setup)
+
+
+def _check_response_cases() -> Iterator[Case]:
+    for n_errors in (1, 100, 10000):
+
+        def responses_setup(n_errors=n_errors):
+            error = ValidationError(errors=[f"error {i}" for i in range(n_errors)])
+            return lambda: check_response(out_response=error, responses=RESPONSES)
+
+        def route_setup(n_errors=n_errors):
+            error = ValidationError(errors=[f"error {i}" for i in range(n_errors)])
+            return lambda: check_response(out_response=error, route_path="/v1/provision")
+
+        yield Case("check_response.responses", {"errors": n_errors}, responses_setup)
+        yield Case("check_response.route_path", {"errors": n_errors}, route_setup)
+
+    def success_setup():
+        status = ProvisioningStatus(status=Status1.COMPLETED, result="ok")
+        return lambda: check_response(out_response=status, responses=RESPONSES)
+
+    yield Case("check_response.responses", {"status": "completed"}, success_setup)
+
+
+def _middleware_cases(body_sizes: list[int]) -> Iterator[Case]:
+    for body_size in body_sizes:
+
+        def setup(body_size=body_size):
+            body = b"x" * body_size
+
+            async def echo(request: Request) -> Response:
+                return Response(await request.body(), media_type="text/plain")
+
+            app = Starlette(
+                routes=[Route("/", echo, methods=["POST"])],
+                middleware=[Middleware(BaseHTTPMiddleware, dispatch=log_request_response_middleware)],
+            )
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "POST",
+                "scheme": "http",
+                "path": "/",
+                "raw_path": b"/",
+                "query_string": b"",
+                "root_path": "",
+                "headers": [(b"content-length", str(body_size).encode())],
+                "client": ("127.0.0.1", 12345),
+                "server": ("127.0.0.1", 80),
+            }
+
+            async def request() -> None:
+                async def receive() -> dict:
+                    return {"type": "http.request", "body": body, "more_body": False}
+
+                async def send(message: dict) -> None:
+                    pass
+
+                await app(scope, receive, send)
+
+            return _run_async(request)
+
+        yield Case("log_request_response_middleware", {"body_bytes": body_size}, setup)
+
+
+def collect_cases(quick: bool) -> list[Case]:
+    components = QUICK_COMPONENTS if quick else COMPONENTS
+    columns = QUICK_COLUMNS if quick else COLUMNS
+    body_sizes = BODY_SIZES[:2] if quick else BODY_SIZES
+    return [
+        *_descriptor_cases(components, columns),
+        *_accessor_cases(components, columns),
+        *_schema_cases(columns),
+        *_check_response_cases(),
+        *_middleware_cases(body_sizes),
+    ]
+
+
+def measure(function: Callable[[], object], repeat: int, budget: float) -> dict:
+    """
+    Measures the time of a call, `timeit` style: calls are grouped in loops lasting at least
+    20 ms and the loop is repeated `repeat` times, within a time budget.
+
+    Returns:
+        dict: Median and minimum seconds per call, plus the number of calls per loop and of loops.
+    """  # noqa: E501
+
+    start = time.perf_counter()
+    function()
+    single = max(time.perf_counter() - start, 1e-9)
+    number = max(1, int(0.02 / single))
+    repeat = max(1, min(repeat, int(budget / (single * number))))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number)
+    return {"median": statistics.median(timings), "min": min(timings), "number": number, "repeat": repeat}
+
+
+def run(cases: list[Case], repeat: int, budget: float) -> dict:
+    results = {}
+    for case in cases:
+        results[case.id] = measure(case.setup(), repeat, budget)
+        print(f"{case.id:<75} {results[case.id]['median'] * 1000:>12.3f} ms", flush=True)
+    return {
+        "metadata": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compares the median of the cases in common between two runs.
+
+    Args:
+        current (dict): The results of the current run.
+        baseline (dict): The results of the baseline run.
+        threshold (float): The relative slowdown above which a case is a regression, e.g. 0.1 for 10%.
+
+    Returns:
+        list[str]: The ids of the cases that regressed.
+    """  # noqa: E501
+
+    regressions = []
+    print(f"\n{'case':<75} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for case_id, result in current["results"].items():
+        baseline_result = baseline["results"].get(case_id)
+        if baseline_result is None:
+            continue
+        change = result["median"] / baseline_result["median"] - 1
+        regressed = change > threshold
+        if regressed:
+            regressions.append(case_id)
+        print(
+            f"{case_id:<75} {baseline_result['median'] * 1000:>12.3f} {result['median'] * 1000:>12.3f}"
+            f" {change:>+8.1%}{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default=None, help="Regex selecting the cases to run by id")
+    parser.add_argument("--quick", action="store_true", help="Only run the smaller sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Loops measured for each case")
+    parser.add_argument("--budget", type=float, default=2.0, help="Seconds available to each case")
+    parser.add_argument("--output", type=Path, default=None, help="Stores the results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, default=None, help="Compares the results with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown flagged as a regression")
+    args = parser.parse_args()
+    logger.remove()
+
+    cases = collect_cases(args.quick)
+    if args.filter is not None:
+        cases = [case for case in cases if re.search(args.filter, case.id)]
+
+    results = run(cases, args.repeat, args.budget)
+
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.compare is not None:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Synthetic descriptors for load and scale testing.
+
+The generator builds COMPONENT_DESCRIPTOR and DATAPRODUCT_DESCRIPTOR payloads that
+conform to the `DataProduct`, `OutputPort`, `Workload`, `StorageArea` and
+`Observability` models, with configurable size and shape. The same configuration
+and seed always produce the same descriptor.
+
+It can also produce invalid variants of a descriptor, to measure the error paths.
+
+Usage (from the `tech-adapter` directory):
+
+    python -m perf.descriptor_generator --components 100 --columns 50 --seed 7 > descriptor.yaml
+"""
+
+import argparse
+import json
+import random
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+import yaml
+
+from src.models.api_models import DescriptorKind, ProvisioningRequest
+from src.models.constants import OPENMETADATA_SUPPORTED_DATATYPES
+from src.models.data_product_descriptor import ComponentKind
+
+
+class InvalidVariant(StrEnum):
+    BAD_DATA_TYPE = "bad_data_type"
+    UNKNOWN_KIND = "unknown_kind"
+    MISSING_FIELD = "missing_field"
+    MALFORMED_YAML = "malformed_yaml"
+
+
+@dataclass(frozen=True)
+class GeneratorConfig:
+    """
+    Shape of the generated descriptors.
+
+    Attributes:
+        components: Number of components of the data product.
+        columns: Number of columns of the schema of each output port.
+        tag_density: Probability for a column or a component to carry a tag; each tag is drawn independently.
+        max_tags: Maximum number of tags on a single column or component.
+        depends_on_fanout: Maximum number of components each component depends on, drawn among the previous ones.
+        payload_bytes: Approximate size of the free-form `specific` section of each component.
+        kind_weights: Relative frequency of each component kind. The last component is always of the first kind,
+            so that a COMPONENT_DESCRIPTOR of that kind can always be built.
+        seed: Seed of the random generator.
+    """  # noqa: E501
+
+    components: int = 10
+    columns: int = 10
+    tag_density: float = 0.1
+    max_tags: int = 3
+    depends_on_fanout: int = 1
+    payload_bytes: int = 0
+    kind_weights: dict[ComponentKind, float] = field(
+        default_factory=lambda: {
+            ComponentKind.OUTPUTPORT: 0.4,
+            ComponentKind.WORKLOAD: 0.3,
+            ComponentKind.STORAGE: 0.2,
+            ComponentKind.OBSERVABILITY: 0.1,
+        }
+    )
+    seed: int = 0
+
+
+class DescriptorGenerator:
+    def __init__(self, config: GeneratorConfig = GeneratorConfig()) -> None:
+        self.config = config
+
+    def data_product(self) -> dict:
+        """
+        Returns the data product, i.e. the content of a DATAPRODUCT_DESCRIPTOR.
+        """
+
+        rng = random.Random(self.config.seed)
+        domain = f"domain{rng.randrange(100)}"
+        name = f"dataproduct{rng.randrange(10_000)}"
+        data_product_id = f"urn:dmb:dp:{domain}:{name}:0"
+        kinds = self._kinds(rng)
+
+        components: list[dict] = []
+        for index, kind in enumerate(kinds):
+            component_id = f"urn:dmb:cmp:{domain}:{name}:0:{kind}-{index}"
+            depends_on = self._depends_on(rng, components)
+            components.append(self._component(rng, kind, component_id, depends_on))
+
+        return {
+            "id": data_product_id,
+            "name": name,
+            "fullyQualifiedName": name.title(),
+            "description": f"Synthetic data product {name}",
+            "kind": "dataproduct",
+            "domain": domain,
+            "version": "0.1.0",
+            "environment": "development",
+            "dataProductOwner": "user:owner_agilelab.it",
+            "dataProductOwnerDisplayName": "Owner",
+            "email": "owner@agilelab.it",
+            "ownerGroup": "group:owners",
+            "devGroup": "group:dev",
+            "informationSLA": "2BD",
+            "maturity": "Tactical",
+            "billing": {},
+            "tags": self._tags(rng),
+            "specific": {},
+            "components": components,
+        }
+
+    def component_descriptor(self, kind: ComponentKind | None = ComponentKind.OUTPUTPORT) -> dict:
+        """
+        Returns a COMPONENT_DESCRIPTOR, i.e. the data product and the id of the component to provision.
+        The component to provision is the last one of the given kind, or the last one if kind is None.
+        """  # noqa: E501
+
+        data_product = self.data_product()
+        candidates = [c for c in data_product["components"] if kind is None or c["kind"] == kind]
+        if not candidates:
+            raise ValueError(f"The generated data product has no component of kind {kind}")
+        return {"dataProduct": data_product, "componentIdToProvision": candidates[-1]["id"]}
+
+    def provisioning_request(
+        self,
+        descriptor_kind: DescriptorKind = DescriptorKind.COMPONENT_DESCRIPTOR,
+        invalid_variant: InvalidVariant | None = None,
+    ) -> ProvisioningRequest:
+        """
+        Returns a provisioning request whose descriptor is serialized as YAML, optionally in an invalid variant.
+        """  # noqa: E501
+
+        if descriptor_kind == DescriptorKind.COMPONENT_DESCRIPTOR:
+            descriptor = self.component_descriptor()
+            data_product = descriptor["dataProduct"]
+        else:
+            descriptor = data_product = self.data_product()
+
+        if invalid_variant is None:
+            return ProvisioningRequest(descriptorKind=descriptor_kind, descriptor=to_yaml(descriptor))
+
+        rng = random.Random(self.config.seed)
+        components = data_product["components"]
+        if invalid_variant == InvalidVariant.BAD_DATA_TYPE:
+            output_ports = [c for c in components if c["kind"] == ComponentKind.OUTPUTPORT]
+            if not output_ports or not output_ports[0]["dataContract"]["schema"]:
+                raise ValueError("The generated data product has no output port column to invalidate")
+            column = rng.choice(output_ports[0]["dataContract"]["schema"])
+            column["dataType"] = "NOT_A_TYPE"
+        elif invalid_variant == InvalidVariant.UNKNOWN_KIND:
+            rng.choice(components)["kind"] = "unknownkind"
+        elif invalid_variant == InvalidVariant.MISSING_FIELD:
+            del rng.choice(components)["name"]
+        elif invalid_variant == InvalidVariant.MALFORMED_YAML:
+            text = to_yaml(descriptor)
+            return ProvisioningRequest(descriptorKind=descriptor_kind, descriptor=text[: len(text) // 2] + "\n  - : ]")
+
+        return ProvisioningRequest(descriptorKind=descriptor_kind, descriptor=to_yaml(descriptor))
+
+    def _kinds(self, rng: random.Random) -> list[ComponentKind]:
+        kinds = list(self.config.kind_weights)
+        weights = list(self.config.kind_weights.values())
+        if self.config.components < 1:
+            return []
+        return [*rng.choices(kinds, weights=weights, k=self.config.components - 1), kinds[0]]
+
+    def _depends_on(self, rng: random.Random, previous: list[dict]) -> list[str]:
+        fanout = min(rng.randint(0, self.config.depends_on_fanout), len(previous))
+        return [component["id"] for component in rng.sample(previous, fanout)]
+
+    def _tags(self, rng: random.Random) -> list[dict]:
+        tags = []
+        for _ in range(self.config.max_tags):
+            if rng.random() < self.config.tag_density:
+                tags.append({"tagFQN": f"Classification.Tag{rng.randrange(50)}", "source": "Classification"})
+        return tags
+
+    def _payload(self, rng: random.Random) -> dict:
+        specific: dict = {"database": "SYNTHETIC", "schema": f"SCHEMA_{rng.randrange(1000)}"}
+        if self.config.payload_bytes > 0:
+            chunk = 64
+            specific["properties"] = {
+                f"property_{i}": "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=chunk))
+                for i in range(max(1, self.config.payload_bytes // (chunk + 16)))
+            }
+        return specific
+
+    def _columns(self, rng: random.Random) -> list[dict]:
+        return [
+            {
+                "name": f"column_{i}",
+                "dataType": rng.choice(OPENMETADATA_SUPPORTED_DATATYPES),
+                "description": f"Column {i}",
+                "tags": self._tags(rng),
+            }
+            for i in range(self.config.columns)
+        ]
+
+    def _component(self, rng: random.Random, kind: ComponentKind, component_id: str, depends_on: list[str]) -> dict:
+        component: dict = {
+            "kind": str(kind),
+            "id": component_id,
+            "name": f"{kind} {component_id.rsplit('-', 1)[-1]}",
+            "fullyQualifiedName": component_id,
+            "description": f"Synthetic {kind}",
+            "specific": self._payload(rng),
+        }
+        if kind == ComponentKind.OBSERVABILITY:
+            component.update(
+                endpoint="https://observability.example.com/api",
+                completeness={},
+                dataProfiling={},
+                freshness={},
+                availability={},
+                dataQuality={},
+            )
+            return component
+
+        component.update(
+            infrastructureTemplateId=f"urn:dmb:itm:{kind}-provisioner:0",
+            useCaseTemplateId=f"urn:dmb:utm:{kind}-template:0.0.0",
+            dependsOn=depends_on,
+            platform="Synthetic",
+            technology="Synthetic",
+            tags=self._tags(rng),
+        )
+        if kind == ComponentKind.OUTPUTPORT:
+            component.update(
+                version="0.0.0",
+                outputPortType="SQL",
+                creationDate="2023-12-04T11:38:05.500Z",
+                dataContract={"schema": self._columns(rng)},
+                dataSharingAgreement={"purpose": "Load testing"},
+                semanticLinking=[],
+            )
+        elif kind == ComponentKind.WORKLOAD:
+            component.update(version="0.0.0", workloadType="batch", connectionType="DATAPIPELINE")
+        else:
+            component.update(storageType="Database")
+        return component
+
+
+def to_yaml(descriptor: dict) -> str:
+    return yaml.safe_dump(descriptor, sort_keys=False)
+
+
+def to_json(descriptor: dict) -> str:
+    return json.dumps(descriptor)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--components", type=int, default=10)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--tag-density", type=float, default=0.1)
+    parser.add_argument("--depends-on-fanout", type=int, default=1)
+    parser.add_argument("--payload-bytes", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--descriptor-kind", type=DescriptorKind, default=DescriptorKind.COMPONENT_DESCRIPTOR)
+    parser.add_argument("--invalid", type=InvalidVariant, default=None, help="Generates an invalid variant")
+    parser.add_argument("--request", action="store_true", help="Prints the whole provisioning request as JSON")
+    args = parser.parse_args()
+
+    generator = DescriptorGenerator(
+        GeneratorConfig(
+            components=args.components,
+            columns=args.columns,
+            tag_density=args.tag_density,
+            depends_on_fanout=args.depends_on_fanout,
+            payload_bytes=args.payload_bytes,
+            seed=args.seed,
+        )
+    )
+    request = generator.provisioning_request(args.descriptor_kind, args.invalid)
+    print(request.model_dump_json() if args.request else request.descriptor)
+
+
+if __name__ == "__main__":
+    main()
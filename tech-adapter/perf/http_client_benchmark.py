@@ -0,0 +1,88 @@
+"""
+Compares a shared, pooled HTTP client with a client per call, against the local stub server.
+
+Each mode sends the same number of requests with the same concurrency, as a handler
+calling a target technology would: `per-call` opens a new `httpx.AsyncClient` for
+every request, paying a new connection each time, while `shared` reuses the client
+created by `create_http_client`, as injected by `HttpClientDep`. The report shows the
+connections accepted by the server, which tell whether they were reused.
+
+The stub server speaks plain HTTP on localhost, so the figures leave out the TLS
+handshake and the network round trips that a remote target technology adds to every
+new connection: the gap only widens in production.
+
+Usage (from the `tech-adapter` directory):
+
+    python -m perf.http_client_benchmark --requests 2000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from perf.stub_server import StubServer
+from src.http_client import create_http_client
+
+MODES = ("per-call", "shared")
+
+
+@dataclass
+class Result:
+    mode: str
+    requests: int
+    seconds: float
+    connections: int
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+
+async def _send(mode: str, url: str, requests: int, concurrency: int) -> None:
+    queue = iter(range(requests))
+
+    async def worker(client: httpx.AsyncClient | None) -> None:
+        for _ in queue:
+            if client is None:
+                async with httpx.AsyncClient() as own_client:
+                    (await own_client.get(url)).raise_for_status()
+            else:
+                (await client.get(url)).raise_for_status()
+
+    if mode == "shared":
+        async with create_http_client() as client:
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    else:
+        await asyncio.gather(*(worker(None) for _ in range(concurrency)))
+
+
+def run(mode: str, requests: int, concurrency: int, delay_seconds: float = 0.0) -> Result:
+    with StubServer(delay_seconds=delay_seconds) as server:
+        started = time.perf_counter()
+        asyncio.run(_send(mode, server.url + "/resource", requests, concurrency))
+        seconds = time.perf_counter() - started
+        return Result(mode, server.requests, seconds, server.connections)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds the stub server takes per request")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'requests':>8} {'seconds':>8} {'req/s':>8} {'connections':>11}")
+    for mode in args.modes:
+        result = run(mode, args.requests, args.concurrency, args.delay)
+        print(
+            f"{result.mode:>8} {result.requests:>8} {result.seconds:>8.2f} "
+            f"{result.requests_per_second:>8.0f} {result.connections:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Measures the throughput of the job journal and the time it takes to recover from it.
+
+`append` records the transitions of jobs from threads running at the same time, as the
+worker threads do, each job going from RUNNING to COMPLETED: the report shows how many
+entries each fsync covered. `recovery` writes a journal of the same number of entries,
+with a share of jobs left RUNNING as by a crash, and measures its replay on startup.
+
+The journal is written in a temporary directory, unless `--directory` is given: fsync
+costs depend on the disk, so measure on the kind of volume the journal lives on.
+
+Usage (from the `tech-adapter` directory):
+
+    python -m perf.job_journal_benchmark --entries 100000 --threads 16
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.jobs import Job, JobJournal, JournalEntry
+from src.models.api_models import Status1
+from src.settings import JobJournalSettings
+
+
+@dataclass
+class Result:
+    mode: str
+    entries: int
+    seconds: float
+    syncs: int = 0
+
+    @property
+    def entries_per_second(self) -> float:
+        return self.entries / self.seconds if self.seconds else 0.0
+
+
+def append(directory: Path, entries: int, threads: int, fsync: bool = True) -> Result:
+    settings = JobJournalSettings(enabled=True, path=directory / "append.journal", fsync=fsync)
+    journal = JobJournal(settings)
+    journal.recover()
+    jobs = iter(range(entries // 2))
+    lock = threading.Lock()
+
+    def worker() -> None:
+        while True:
+            with lock:
+                if next(jobs, None) is None:
+                    return
+            job = Job("provision", "urn:dmb:cmp:benchmark:journal:0:component")
+            journal.record(job, Status1.RUNNING)
+            journal.record(job, Status1.COMPLETED)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    seconds = time.perf_counter() - started
+    journal.close()
+    return Result("append", journal.entries, seconds, journal.syncs)
+
+
+def recovery(directory: Path, entries: int, running_ratio: float = 0.01) -> Result:
+    path = directory / "recovery.journal"
+    running_every = max(int(1 / running_ratio), 1) if running_ratio else 0
+    with path.open("wb") as file:
+        for number in range(entries // 2):
+            job = Job("provision", f"urn:dmb:cmp:benchmark:journal:0:component-{number}")
+            file.write(JournalEntry(job.id, Status1.RUNNING, job.operation, job.component_id, time.time()).to_line())
+            if not running_every or number % running_every:
+                entry = JournalEntry(job.id, Status1.COMPLETED, job.operation, job.component_id, time.time())
+                file.write(entry.to_line())
+    journal = JobJournal(JobJournalSettings(enabled=True, path=path))
+    started = time.perf_counter()
+    journal.recover()
+    seconds = time.perf_counter() - started
+    journal.close()
+    return Result("recovery", entries, seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--no-fsync", action="store_true", help="Append without waiting for the disk")
+    parser.add_argument("--directory", type=Path, help="Directory of the journal; a temporary one if unset")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        results = [
+            append(Path(directory), args.entries, args.threads, fsync=not args.no_fsync),
+            recovery(Path(directory), args.entries),
+        ]
+
+    print(f"{'mode':>8} {'entries':>8} {'seconds':>8} {'entries/s':>10} {'fsyncs':>7} {'entries/fsync':>13}")
+    for result in results:
+        per_sync = f"{result.entries / result.syncs:.1f}" if result.syncs else "-"
+        print(
+            f"{result.mode:>8} {result.entries:>8} {result.seconds:>8.2f} "
+            f"{result.entries_per_second:>10.0f} {result.syncs:>7} {per_sync:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
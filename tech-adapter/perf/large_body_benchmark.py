@@ -0,0 +1,146 @@
+"""
+Reports the peak RSS of a request with a large descriptor, with and without the large body mode.
+
+Each request is sent to the application in-process, in a fresh interpreter, streaming
+its body from a file so that the client does not hold it in memory: the reported peak
+is the growth of the maximum resident set size of the process during the request.
+
+Usage (from the `tech-adapter` directory):
+
+    python -m perf.large_body_benchmark --sizes 1 10 50
+"""  # noqa: E501
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from perf.descriptor_generator import DescriptorGenerator, GeneratorConfig
+
+COMPONENTS = 100
+MIB = 1024 * 1024
+
+
+def write_request(path: Path, size_mb: float) -> int:
+    """
+    Writes a provisioning request whose descriptor is about `size_mb` MiB.
+
+    Returns:
+        int: The size of the descriptor in bytes.
+    """
+
+    config = GeneratorConfig(components=COMPONENTS, payload_bytes=int(size_mb * MIB / COMPONENTS))
+    request = DescriptorGenerator(config).provisioning_request()
+    path.write_text(request.model_dump_json(), encoding="utf-8")
+    return len(request.descriptor.encode("utf-8"))
+
+
+def _peak_rss() -> int:
+    # Kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def _post(app, path: Path) -> int:
+    size = path.stat().st_size
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/v1/provision",
+        "raw_path": b"/v1/provision",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(size).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("tech-adapter", 80),
+    }
+    status = 0
+    with path.open("rb") as body:
+
+        async def receive():
+            chunk = body.read(64 * 1024)
+            return {"type": "http.request", "body": chunk, "more_body": body.tell() < size}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await app(scope, receive, send)
+    return status
+
+
+def _measure_in_process(path: Path, warm_up: Path) -> dict:
+    from src.main import app
+
+    logger.remove()
+    asyncio.run(_post(app, warm_up))
+    gc.collect()
+    before = _peak_rss()
+    started = time.perf_counter()
+    status = asyncio.run(_post(app, path))
+    return {"status": status, "seconds": time.perf_counter() - started, "peak_rss": _peak_rss() - before}
+
+
+def measure(path: Path, warm_up: Path, large_body: bool) -> dict:
+    """
+    Measures a request in a new interpreter, so that the peaks of the previous ones do not count.
+    """  # noqa: E501
+
+    env = dict(
+        os.environ,
+        LARGE_BODY_ENABLED=str(large_body).lower(),
+        LARGE_BODY_THRESHOLD_BYTES=str(MIB),
+        DESCRIPTOR_MAX_REQUEST_BYTES=str(4096 * MIB),
+        DESCRIPTOR_MAX_BYTES=str(4096 * MIB),
+        DESCRIPTOR_MAX_NODES=str(100_000_000),
+    )
+    output = subprocess.run(
+        [sys.executable, "-m", "perf.large_body_benchmark", "--child", str(path), str(warm_up)],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 50], help="Descriptor sizes in MiB")
+    parser.add_argument("--child", nargs=2, type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    logger.remove()
+
+    if args.child is not None:
+        print(json.dumps(_measure_in_process(*args.child)))
+        return
+
+    print(f"{'descriptor MiB':>14} {'large body':>10} {'status':>6} {'seconds':>8} {'peak RSS MiB':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        warm_up = Path(directory) / "warm-up.json"
+        write_request(warm_up, 0.01)
+        for size_mb in args.sizes:
+            path = Path(directory) / f"request-{size_mb}.json"
+            descriptor_bytes = write_request(path, size_mb)
+            for large_body in (False, True):
+                r = measure(path, warm_up, large_body)
+                print(
+                    f"{descriptor_bytes / MIB:>14.1f} {'on' if large_body else 'off':>10} {r['status']:>6}"
+                    f" {r['seconds']:>8.2f} {r['peak_rss'] / MIB:>12.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Load test of the tech adapter endpoints.
+
+Requests are drawn from a weighted mix of endpoints and sent either in-process,
+through an ASGI transport, or over HTTP to a uvicorn server started for the run
+(or to any running instance with `--url`).
+
+Two arrival modes are available:
+- closed loop: `--concurrency` clients send a new request as soon as the previous
+  one completes, so the load adapts to the service and queueing is hidden
+- open loop: requests arrive at `--rate` per second, with Poisson or constant
+  inter-arrival times, regardless of the responses. Latency is measured from the
+  scheduled arrival, so the time spent waiting in queues is included
+
+Usage (from the `tech-adapter` directory):
+
+    python -m perf.load_test --mode closed --concurrency 16 --duration 30
+    python -m perf.load_test --mode open --rate 200 --arrival poisson --target uvicorn --workers 2
+    python -m perf.load_test --mix provision=3,updateacl=1 --components 100 --columns 50
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import httpx
+from loguru import logger
+
+from perf.descriptor_generator import DescriptorGenerator, GeneratorConfig, to_json
+from src.models.api_models import DescriptorKind, ProvisionInfo, UpdateAclRequest, ValidationRequest
+
+DEFAULT_MIX = {
+    "provision": 4,
+    "provision_status": 2,
+    "unprovision": 1,
+    "validate": 2,
+    "v2_validate": 1,
+    "validation_status": 1,
+    "updateacl": 2,
+}
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    method: str
+    path: str
+    body: str | None = None
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int | None
+    latency: float
+
+
+@dataclass
+class LoadTestResult:
+    elapsed: float
+    samples: list[Sample] = field(default_factory=list)
+
+
+def build_endpoints(generator: DescriptorGenerator, acl_refs: int = 100) -> dict[str, Endpoint]:
+    """
+    Builds the requests of each endpoint from the descriptors of the generator.
+    """
+
+    provisioning_request = generator.provisioning_request().model_dump_json()
+    unprovisioning_request = json.loads(provisioning_request) | {"removeData": True}
+    component_descriptor = generator.component_descriptor()
+    update_acl_request = UpdateAclRequest(
+        refs=[f"user:user_{i}" for i in range(acl_refs)],
+        provisionInfo=ProvisionInfo(request=to_json(component_descriptor), result=""),
+    )
+    validation_request = ValidationRequest(
+        descriptor=generator.provisioning_request(DescriptorKind.DATAPRODUCT_DESCRIPTOR).descriptor
+    )
+    return {
+        "provision": Endpoint("POST", "/v1/provision", provisioning_request),
+        "provision_status": Endpoint("GET", "/v1/provision/token/status"),
+        "unprovision": Endpoint("POST", "/v1/unprovision", json.dumps(unprovisioning_request)),
+        "validate": Endpoint("POST", "/v1/validate", provisioning_request),
+        "v2_validate": Endpoint("POST", "/v2/validate", validation_request.model_dump_json()),
+        "validation_status": Endpoint("GET", "/v2/validate/token/status"),
+        "updateacl": Endpoint("POST", "/v1/updateacl", update_acl_request.model_dump_json()),
+    }
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    """
+    Parses a request mix such as `provision=3,updateacl=1` into the weight of each endpoint.
+    """
+
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise ValueError(f"Unknown endpoint {name.strip()!r}, expected one of {', '.join(DEFAULT_MIX)}")
+        weights[name.strip()] = float(weight) if weight else 1.0
+    return weights
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values, with q between 0 and 100.
+    """
+
+    if not sorted_values:
+        return float("nan")
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, endpoints: dict[str, Endpoint], mix: dict[str, float], seed: int = 0):
+        self.client = client
+        self.endpoints = endpoints
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.rng = random.Random(seed)
+
+    def next_endpoint(self) -> str:
+        return self.rng.choices(self.names, weights=self.weights)[0]
+
+    async def send(self, name: str, started: float) -> Sample:
+        endpoint = self.endpoints[name]
+        try:
+            response = await self.client.request(
+                endpoint.method,
+                endpoint.path,
+                content=endpoint.body,
+                headers={"Content-Type": "application/json"} if endpoint.body is not None else None,
+            )
+            status: int | None = response.status_code
+        except httpx.HTTPError as e:
+            logger.warning("Request to {} failed: {}", endpoint.path, e)
+            status = None
+        return Sample(name, status, time.perf_counter() - started)
+
+    async def closed_loop(self, concurrency: int, duration: float, max_requests: int | None) -> LoadTestResult:
+        """
+        Runs `concurrency` clients, each sending a request as soon as the previous one completes.
+        """
+
+        result = LoadTestResult(elapsed=0.0)
+        start = time.perf_counter()
+        deadline = start + duration
+        budget = [max_requests]
+
+        async def client() -> None:
+            while time.perf_counter() < deadline:
+                if budget[0] is not None:
+                    if budget[0] <= 0:
+                        return
+                    budget[0] -= 1
+                result.samples.append(await self.send(self.next_endpoint(), time.perf_counter()))
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    async def open_loop(
+        self, rate: float, arrival: str, duration: float, max_requests: int | None, max_in_flight: int
+    ) -> LoadTestResult:
+        """
+        Sends requests at `rate` per second, regardless of the responses. Requests arriving
+        while `max_in_flight` requests are outstanding wait for a slot, and the wait counts in
+        their latency.
+        """  # noqa: E501
+
+        result = LoadTestResult(elapsed=0.0)
+        slots = asyncio.Semaphore(max_in_flight)
+        tasks: list[asyncio.Task] = []
+        start = time.perf_counter()
+        scheduled = start
+
+        async def request(name: str, arrived: float) -> None:
+            async with slots:
+                result.samples.append(await self.send(name, arrived))
+
+        while scheduled < start + duration and (max_requests is None or len(tasks) < max_requests):
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(request(self.next_endpoint(), scheduled)))
+            scheduled += self.rng.expovariate(rate) if arrival == "poisson" else 1 / rate
+
+        await asyncio.gather(*tasks)
+        result.elapsed = time.perf_counter() - start
+        return result
+
+
+def summarize(result: LoadTestResult) -> dict[str, dict]:
+    """
+    Summarizes the samples of each endpoint, and of all of them under `total`.
+
+    Returns:
+        dict[str, dict]: Requests, throughput, latency percentiles in seconds and responses by status code of each endpoint.
+    """  # noqa: E501
+
+    by_endpoint: dict[str, list[Sample]] = {}
+    for sample in sorted(result.samples, key=lambda sample: sample.endpoint):
+        by_endpoint.setdefault(sample.endpoint, []).append(sample)
+    by_endpoint["total"] = result.samples
+
+    summary = {}
+    for name, samples in by_endpoint.items():
+        latencies = sorted(sample.latency for sample in samples)
+        statuses: dict[str, int] = {}
+        for sample in samples:
+            key = str(sample.status) if sample.status is not None else "error"
+            statuses[key] = statuses.get(key, 0) + 1
+        summary[name] = {
+            "requests": len(samples),
+            "throughput": len(samples) / result.elapsed if result.elapsed else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else float("nan"),
+            "statuses": statuses,
+        }
+    return summary
+
+
+def print_summary(summary: dict[str, dict]) -> None:
+    print(
+        f"{'endpoint':<20} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+        "  statuses"
+    )
+    for name, row in summary.items():
+        statuses = " ".join(f"{status}:{count}" for status, count in sorted(row["statuses"].items()))
+        print(
+            f"{name:<20} {row['requests']:>9} {row['throughput']:>9.1f} {row['p50'] * 1000:>9.2f}"
+            f" {row['p95'] * 1000:>9.2f} {row['p99'] * 1000:>9.2f} {row['max'] * 1000:>9.2f}  {statuses}"
+        )
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def uvicorn_server(workers: int = 1, startup_timeout: float = 30.0) -> Iterator[str]:
+    """
+    Starts `src.main:app` with uvicorn on a free local port, yielding its base URL.
+    """
+
+    port = _free_port()
+    command = [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(port)]
+    command += ["--workers", str(workers), "--log-level", "warning"]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/openapi.json", timeout=1.0)
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"uvicorn did not start within {startup_timeout} seconds")
+                time.sleep(0.1)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def run_load_test(client: httpx.AsyncClient, args: argparse.Namespace) -> LoadTestResult:
+    generator = DescriptorGenerator(GeneratorConfig(components=args.components, columns=args.columns, seed=args.seed))
+    endpoints = build_endpoints(generator, args.acl_refs)
+    load = LoadGenerator(client, endpoints, parse_mix(args.mix), args.seed)
+    if args.mode == "closed":
+        return await load.closed_loop(args.concurrency, args.duration, args.requests)
+    return await load.open_loop(args.rate, args.arrival, args.duration, args.requests, args.max_in_flight)
+
+
+async def _run(args: argparse.Namespace, base_url: str | None) -> LoadTestResult:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    if base_url is None:
+        from src.main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://tech-adapter", limits=limits) as client:
+            return await run_load_test(client, args)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        return await run_load_test(client, args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--url", default=None, help="Base URL of a running instance, instead of --target")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers, with --target uvicorn")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients of the closed loop")
+    parser.add_argument("--rate", type=float, default=50.0, help="Requests per second of the open loop")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Outstanding requests of the open loop")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--requests", type=int, default=None, help="Stops after this number of requests")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before an HTTP request fails")
+    parser.add_argument("--mix", default=",".join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items()))
+    parser.add_argument("--components", type=int, default=10)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--acl-refs", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Prints the summary as JSON")
+    args = parser.parse_args()
+    logger.remove()
+
+    if args.url is not None:
+        result = asyncio.run(_run(args, args.url))
+    elif args.target == "uvicorn":
+        with uvicorn_server(args.workers) as base_url:
+            result = asyncio.run(_run(args, base_url))
+    else:
+        result = asyncio.run(_run(args, None))
+
+    summary = summarize(result)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Reports the memory allocated to parse a `DataProduct`, per component.
+
+Usage (from the `tech-adapter` directory):
+
+    python -m perf.memory_benchmark --components 1 10 100 1000
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+import yaml
+from loguru import logger
+
+from perf.descriptor_generator import DescriptorGenerator, GeneratorConfig, to_yaml
+from src.models.data_product_descriptor import DataProduct
+
+
+def measure(n_components: int) -> dict:
+    """
+    Measures the bytes allocated while parsing the YAML of a data product and validating it.
+
+    Returns:
+        dict: Peak and retained bytes of the parse and validate stages, in total and per component.
+    """
+
+    descriptor = to_yaml(DescriptorGenerator(GeneratorConfig(components=n_components)).data_product())
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        descriptor_dict = yaml.safe_load(descriptor)
+        after_parse, parse_peak = tracemalloc.get_traced_memory()
+
+        tracemalloc.reset_peak()
+        data_product = DataProduct(**descriptor_dict)
+        after_validate, validate_peak = tracemalloc.get_traced_memory()
+
+        del descriptor_dict
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(data_product.components) == n_components
+    results = {
+        "components": n_components,
+        "descriptor_bytes": len(descriptor.encode("utf-8")),
+        "parse_peak": parse_peak - start,
+        "validate_peak": validate_peak - after_parse,
+        "data_product_retained": retained - start,
+    }
+    for key in ("parse_peak", "validate_peak", "data_product_retained"):
+        results[f"{key}_per_component"] = results[key] // n_components
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--components", type=int, nargs="+", default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+    logger.remove()
+
+    print(
+        f"{'components':>10} {'descriptor':>12} {'parse peak':>12} {'validate peak':>14} {'retained':>12}"
+        f" {'parse/comp':>11} {'validate/comp':>14} {'retained/comp':>14}"
+    )
+    for n_components in args.components:
+        r = measure(n_components)
+        print(
+            f"{r['components']:>10} {r['descriptor_bytes']:>12} {r['parse_peak']:>12} {r['validate_peak']:>14}"
+            f" {r['data_product_retained']:>12} {r['parse_peak_per_component']:>11}"
+            f" {r['validate_peak_per_component']:>14} {r['data_product_retained_per_component']:>14}"
+        )
+
+
+if __name__ == "__main__":
+    main()
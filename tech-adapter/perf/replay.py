@@ -0,0 +1,200 @@
+"""
+Replay of captured traffic.
+
+The exchanges recorded by the traffic capture (see docs/traffic_capture.md) are
+sent again, keeping their original spacing in time divided by `--speed`, to the
+application in-process, to a uvicorn server started for the run or to a running
+instance. Each response is compared with the captured one, and the latencies of
+the replay are reported next to the captured ones.
+
+Usage (from the `tech-adapter` directory):
+
+    python -m perf.replay /tmp/tech-adapter-captures
+    python -m perf.replay capture-1700000000000000000.ndjson.gz --speed 4 --target uvicorn
+    python -m perf.replay /tmp/tech-adapter-captures --speed 0 --url http://localhost:5002 --show-diffs 5
+"""
+
+import argparse
+import asyncio
+import difflib
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+from loguru import logger
+
+from perf.load_test import percentile, uvicorn_server
+from src.traffic_capture import CapturedExchange, read_capture
+
+
+@dataclass
+class ReplayedExchange:
+    captured: CapturedExchange
+    status: int | None
+    response: str
+    latency: float
+
+    @property
+    def matches(self) -> bool:
+        return self.status == self.captured.status and _normalize(self.response) == _normalize(self.captured.response)
+
+
+def _normalize(body: str) -> object:
+    """
+    JSON bodies are compared by value, so that key order and formatting do not count as differences.
+    """  # noqa: E501
+
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body
+
+
+def diff(replayed: ReplayedExchange) -> str:
+    def lines(status: int | None, body: str) -> list[str]:
+        normalized = _normalize(body)
+        text = json.dumps(normalized, indent=2, sort_keys=True) if not isinstance(normalized, str) else normalized
+        return [f"status: {status}", *text.splitlines()]
+
+    captured = replayed.captured
+    return "\n".join(
+        difflib.unified_diff(
+            lines(captured.status, captured.response),
+            lines(replayed.status, replayed.response),
+            fromfile=f"captured {captured.id}",
+            tofile="replayed",
+            lineterm="",
+        )
+    )
+
+
+async def replay(
+    client: httpx.AsyncClient, exchanges: list[CapturedExchange], speed: float, max_in_flight: int
+) -> list[ReplayedExchange]:
+    """
+    Sends the exchanges again, at their captured offsets divided by `speed`, or as fast as
+    possible (up to `max_in_flight` outstanding requests) when `speed` is 0.
+    """  # noqa: E501
+
+    slots = asyncio.Semaphore(max_in_flight)
+    results: list[ReplayedExchange] = []
+
+    async def send(exchange: CapturedExchange) -> None:
+        async with slots:
+            started = time.perf_counter()
+            headers = dict(exchange.headers)
+            if exchange.content_type:
+                headers["Content-Type"] = exchange.content_type
+            url = f"{exchange.path}?{exchange.query}" if exchange.query else exchange.path
+            try:
+                response = await client.request(
+                    exchange.method, url, content=exchange.request.encode("utf-8"), headers=headers
+                )
+                status: int | None = response.status_code
+                body = response.text
+            except httpx.HTTPError as e:
+                logger.warning("Replay of request {} failed: {}", exchange.id, e)
+                status, body = None, ""
+            results.append(ReplayedExchange(exchange, status, body, time.perf_counter() - started))
+
+    tasks = []
+    start = time.perf_counter()
+    first = exchanges[0].timestamp if exchanges else 0.0
+    for exchange in exchanges:
+        if speed > 0:
+            delay = start + (exchange.timestamp - first) / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(exchange)))
+    await asyncio.gather(*tasks)
+    return results
+
+
+def summarize(results: list[ReplayedExchange]) -> dict[str, dict]:
+    """
+    Summarizes the replay of each path, and of all of them under `total`.
+
+    Returns:
+        dict[str, dict]: Requests, responses different from the captured ones, and latency percentiles in seconds of the capture and of the replay.
+    """  # noqa: E501
+
+    by_path: dict[str, list[ReplayedExchange]] = {}
+    for result in sorted(results, key=lambda result: result.captured.path):
+        by_path.setdefault(f"{result.captured.method} {result.captured.path}", []).append(result)
+    by_path["total"] = results
+
+    summary = {}
+    for name, replayed in by_path.items():
+        captured = sorted(result.captured.duration for result in replayed)
+        latencies = sorted(result.latency for result in replayed)
+        summary[name] = {
+            "requests": len(replayed),
+            "mismatches": sum(1 for result in replayed if not result.matches),
+            **{f"captured_p{q}": percentile(captured, q) for q in (50, 95, 99)},
+            **{f"replayed_p{q}": percentile(latencies, q) for q in (50, 95, 99)},
+        }
+    return summary
+
+
+def print_summary(summary: dict[str, dict]) -> None:
+    print(f"{'':<40} {'':>9} {'':>10} {'captured ms':>29}   {'replayed ms':>29}")
+    print(
+        f"{'request':<40} {'requests':>9} {'mismatches':>10} {'p50':>9} {'p95':>9} {'p99':>9}"
+        f"   {'p50':>9} {'p95':>9} {'p99':>9}"
+    )
+    for name, row in summary.items():
+        captured = " ".join(f"{row[f'captured_p{q}'] * 1000:>9.2f}" for q in (50, 95, 99))
+        replayed = " ".join(f"{row[f'replayed_p{q}'] * 1000:>9.2f}" for q in (50, 95, 99))
+        print(f"{name:<40} {row['requests']:>9} {row['mismatches']:>10} {captured}   {replayed}")
+
+
+async def _run(args: argparse.Namespace, exchanges: list[CapturedExchange], base_url: str | None):
+    if base_url is None:
+        from src.main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://tech-adapter") as client:
+            return await replay(client, exchanges, args.speed, args.max_in_flight)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout) as client:
+        return await replay(client, exchanges, args.speed, args.max_in_flight)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", type=Path, help="Capture file, or directory of capture files")
+    parser.add_argument("--target", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--url", default=None, help="Base URL of a running instance, instead of --target")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers, with --target uvicorn")
+    parser.add_argument("--speed", type=float, default=1.0, help="Rate multiplier; 0 replays as fast as possible")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Outstanding requests")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before an HTTP request fails")
+    parser.add_argument("--show-diffs", type=int, default=3, help="Mismatching responses to print")
+    parser.add_argument("--json", action="store_true", help="Prints the summary as JSON")
+    args = parser.parse_args()
+    logger.remove()
+
+    exchanges = sorted(read_capture(args.capture), key=lambda exchange: exchange.timestamp)
+    if args.url is not None:
+        results = asyncio.run(_run(args, exchanges, args.url))
+    elif args.target == "uvicorn":
+        with uvicorn_server(args.workers) as base_url:
+            results = asyncio.run(_run(args, exchanges, base_url))
+    else:
+        results = asyncio.run(_run(args, exchanges, None))
+
+    for result in [result for result in results if not result.matches][: args.show_diffs]:
+        print(diff(result), end="\n\n")
+    summary = summarize(results)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+    if summary["total"]["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+An in-process stand-in for a target technology whose latency grows with the load.
+
+Operations take `base_latency_seconds` while at most `capacity` of them run at the same
+time; beyond that, the latency grows in proportion to the operations in flight, as when
+they share the resources of an overloaded backend. `error_rate` makes a share of the
+operations fail. All the parameters can be changed while operations run, e.g. to
+simulate a degradation of the backend, and `max_in_flight` reports the highest load
+seen.
+
+`simulate` runs operations limited by an `AimdLimiter` in virtual time instead, without
+sleeping nor threads, so that the behavior of the limit can be checked deterministically.
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from src.adaptive_limit import AimdLimiter
+
+
+class SimulatedBackendError(Exception):
+    pass
+
+
+class SimulatedBackend:
+    def __init__(
+        self, capacity: int, base_latency_seconds: float, error_rate: float = 0.0, seed: int | None = None
+    ) -> None:
+        self.capacity = capacity
+        self.base_latency_seconds = base_latency_seconds
+        self.error_rate = error_rate
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def latency(self, in_flight: int) -> float:
+        return self.base_latency_seconds * max(1.0, in_flight / self.capacity)
+
+    def call(self) -> None:
+        """
+        Runs an operation, blocking the calling thread for its latency.
+
+        Raises:
+            SimulatedBackendError: For a share `error_rate` of the operations.
+        """
+
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            latency = self.latency(self.in_flight)
+            fails = self._random.random() < self.error_rate
+        try:
+            time.sleep(latency)
+            if fails:
+                raise SimulatedBackendError("Simulated failure")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def simulate(self, limiter: AimdLimiter, operations: int, clients: int) -> float:
+        """
+        Runs `operations` calls from `clients` concurrent clients in virtual time, at most
+        `limiter.limit` of them at the same time, and returns the virtual time they took.
+
+        Each call takes the latency of the load when it starts, and its latency and outcome
+        adjust the limit when it completes, as `FairScheduler` does with the real calls.
+        """  # noqa: E501
+
+        now = 0.0
+        # Completion time, order and latency of the calls in flight
+        running: list[tuple[float, int, float, bool]] = []
+        order = itertools.count()
+        started = 0
+        while started < operations or running:
+            while started < operations and len(running) < min(limiter.limit, clients):
+                self.calls += 1
+                started += 1
+                latency = self.latency(len(running) + 1)
+                fails = self._random.random() < self.error_rate
+                heapq.heappush(running, (now + latency, next(order), latency, fails))
+                self.max_in_flight = max(self.max_in_flight, len(running))
+            now, _, latency, fails = heapq.heappop(running)
+            limiter.on_complete(latency, fails, len(running) + 1)
+        return now
@@ -0,0 +1,123 @@
+"""
+A local HTTP server standing in for a target technology in tests and benchmarks.
+
+It speaks HTTP/1.1 with keep-alive, answers every request with the same response after
+an optional delay, and counts the connections it accepts, so that tests can tell whether
+a client reuses its connections.
+
+Usage:
+
+    with StubServer(delay_seconds=0.01) as server:
+        httpx.get(server.url + "/anything")
+        print(server.connections, server.requests)
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.stub.connection_opened()
+
+    def do_GET(self) -> None:
+        self._respond()
+
+    def do_POST(self) -> None:
+        self._respond()
+
+    def _respond(self) -> None:
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        with stub.request():
+            if stub.delay_seconds:
+                time.sleep(stub.delay_seconds)
+            self.send_response(stub.status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(stub.body)))
+            self.end_headers()
+            self.wfile.write(stub.body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "StubServer"
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients that time out close their connection before the response is written
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubServer:
+    """
+    Serves a fixed response on a free local port, in a background thread, while used as a context manager.
+
+    `connections` counts the connections accepted, `requests` the requests served, and
+    `max_in_flight` the highest number of requests served at the same time.
+    """  # noqa: E501
+
+    def __init__(self, status: int = 200, body: bytes = b"{}", delay_seconds: float = 0.0) -> None:
+        self.status = status
+        self.body = body
+        self.delay_seconds = delay_seconds
+        self.connections = 0
+        self.requests = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server: _Server | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        assert self._server is not None, "The server is not started"
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def connection_opened(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def request(self) -> "_InFlight":
+        return _InFlight(self)
+
+    def __enter__(self) -> "StubServer":
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        assert self._server is not None and self._thread is not None
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+class _InFlight:
+    def __init__(self, stub: StubServer) -> None:
+        self.stub = stub
+
+    def __enter__(self) -> None:
+        with self.stub._lock:
+            self.stub.requests += 1
+            self.stub._in_flight += 1
+            self.stub.max_in_flight = max(self.stub.max_in_flight, self.stub._in_flight)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        with self.stub._lock:
+            self.stub._in_flight -= 1
@@ -2,17 +2,36 @@
 
 echo -e "Uvicorn server initialization...\n"
 
+# In-flight requests get the same grace period as the jobs on shutdown, see docs/shutdown.md
+GRACEFUL_SHUTDOWN="--timeout-graceful-shutdown ${SHUTDOWN_GRACE_PERIOD_SECONDS:-25}"
+
+# Several workers are needed to recycle them, see docs/recycling.md
+WORKERS="--workers ${SERVER_WORKERS:-1}"
+
+# The workers would share the job journal: it needs a single one, see docs/job_journal.md
+if [[ "${JOB_JOURNAL_ENABLED,,}" =~ ^(true|1|yes|on)$ ]] && (( ${SERVER_WORKERS:-1} > 1 ));
+then
+    echo "JOB_JOURNAL_ENABLED requires SERVER_WORKERS=1" >&2
+    exit 1
+fi
+
 if [[ $1 = open_telemetry_activation ]];
 then
     # The following configuration is set for the Dockerfile
     # If you want to test the service locally, change the IP address to 'localhost'
     echo -e "OpenTelemetry activation...\n"
 
-    exec opentelemetry-instrument uvicorn src.main:app --host 0.0.0.0 --port 5002
+    # Head sampling and URL exclusions of the agent follow the TRACING_* settings of the
+    # service (see docs/opentelemetry.md), unless the OTEL_* variables are set explicitly
+    export OTEL_TRACES_SAMPLER="${OTEL_TRACES_SAMPLER:-parentbased_traceidratio}"
+    export OTEL_TRACES_SAMPLER_ARG="${OTEL_TRACES_SAMPLER_ARG:-${TRACING_SAMPLING_RATIO:-1.0}}"
+    export OTEL_PYTHON_FASTAPI_EXCLUDED_URLS="${OTEL_PYTHON_FASTAPI_EXCLUDED_URLS:-${TRACING_EXCLUDED_URLS:-docs,openapi.json}}"
+
+    exec opentelemetry-instrument uvicorn src.main:app --host 0.0.0.0 --port 5002 $WORKERS $GRACEFUL_SHUTDOWN
 
 else
     # The following configuration is set for the Dockerfile
     # If you want to test the service locally, change the IP address to 'localhost'
-    exec uvicorn src.main:app --host 0.0.0.0 --port 5002
+    exec uvicorn src.main:app --host 0.0.0.0 --port 5002 $WORKERS $GRACEFUL_SHUTDOWN
 
 fi
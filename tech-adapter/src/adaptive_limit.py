@@ -0,0 +1,55 @@
+from opentelemetry.metrics import CallbackOptions, Observation
+
+from src.settings import AdaptiveConcurrencySettings, adaptive_concurrency_settings
+from src.telemetry import meter
+
+
+class AimdLimiter:
+    """
+    An additive increase, multiplicative decrease (AIMD) limit on the provisioning operations running at the same time.
+
+    Each completed operation adjusts the limit: a failure, or a latency above `latency_threshold_seconds`,
+    multiplies it by `backoff_ratio`, while a success grows it by 1 if at least half of it was in use,
+    so that the limit follows what the target technology can take, between `min_limit` and `max_limit`.
+    """  # noqa: E501
+
+    def __init__(self, settings: AdaptiveConcurrencySettings) -> None:
+        self.settings = settings
+        self._limit = float(min(max(settings.initial_limit, settings.min_limit), settings.max_limit))
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.enabled
+
+    @property
+    def limit(self) -> int:
+        return max(self.settings.min_limit, int(self._limit))
+
+    def on_complete(self, latency_seconds: float, failed: bool, in_flight: int) -> None:
+        """
+        Adjusts the limit after an operation completed.
+
+        Args:
+            latency_seconds (float): How long the operation took.
+            failed (bool): Whether the operation failed.
+            in_flight (int): The operations running when it completed, itself included.
+        """
+
+        if failed or latency_seconds > self.settings.latency_threshold_seconds:
+            self._limit = max(float(self.settings.min_limit), self._limit * self.settings.backoff_ratio)
+        elif in_flight * 2 >= self._limit:
+            self._limit = min(float(self.settings.max_limit), self._limit + 1)
+
+
+provisioning_limiter = AimdLimiter(adaptive_concurrency_settings)
+
+
+def _observe_limit(options: CallbackOptions) -> list[Observation]:
+    return [Observation(provisioning_limiter.limit)] if provisioning_limiter.enabled else []
+
+
+meter.create_observable_gauge(
+    "tech_adapter.concurrency.limit",
+    callbacks=[_observe_limit],
+    description="Current adaptive limit on the provisioning operations running at the same time",
+)
@@ -0,0 +1,49 @@
+import hmac
+import tracemalloc
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from starlette.responses import Response
+
+from src.check_return_type import check_response
+from src.memory import snapshot_store
+from src.models.api_models import MemorySnapshotDiff, SystemErr, ValidationError
+from src.settings import admin_settings, memory_settings
+
+
+def require_admin_token(x_admin_token: Annotated[str | None, Header()] = None) -> None:
+    """
+    Authorizes the admin endpoints with the token configured in `ADMIN_TOKEN`.
+    The endpoints are not found at all when no token is configured.
+    """
+
+    if admin_settings.token is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, admin_settings.token.get_secret_value()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin_token)])
+
+
+@router.post(
+    "/memory/snapshot",
+    response_model=None,
+    responses={
+        "200": {"model": MemorySnapshotDiff},
+        "400": {"model": ValidationError},
+        "500": {"model": SystemErr},
+    },
+)
+def memory_snapshot() -> Response:
+    """
+    Take a tracemalloc snapshot and compare it with the one taken by the previous call
+    """
+
+    if not tracemalloc.is_tracing():
+        error = ValidationError(errors=["Memory tracking is disabled; set MEMORY_TRACKING_ENABLED to enable it"])
+        return check_response(out_response=error)
+
+    resp = snapshot_store.take_and_compare(memory_settings.snapshot_top_stats)
+
+    return check_response(out_response=resp)
@@ -1,7 +1,24 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
+from src.http_client import http_client_lifespan
+from src.recycling import recycling_lifespan
+from src.shutdown import shutdown_lifespan
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # The jobs drain before the HTTP client they use is closed; the recycling of the worker
+    # needs the signal handler installed by the shutdown
+    async with http_client_lifespan(app), shutdown_lifespan(app), recycling_lifespan(app):
+        yield
+
+
 app = FastAPI(
     title="Tech Adapter Micro Service",
     description="Microservice responsible to handle provisioning and access control requests for one or more data product components.",  # noqa: E501
     version="2.2.0",
+    lifespan=lifespan,
 )
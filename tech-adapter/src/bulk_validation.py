@@ -0,0 +1,335 @@
+import asyncio
+import re
+from abc import ABC, abstractmethod
+from contextlib import suppress
+from typing import AsyncIterator, Callable
+
+import pydantic
+from loguru import logger
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from src.deadlines import DeadlineExceeded
+from src.models.api_models import (
+    BulkValidationResult,
+    ProvisioningRequest,
+    SystemErr,
+    ValidationError,
+    ValidationResult,
+)
+from src.settings import BulkValidationSettings
+from src.telemetry import meter
+
+BULK_VALIDATE_PATH = "/v1/validate/bulk"
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl")
+
+_WHITESPACE = b" \t\r\n"
+_STRUCTURE = re.compile(rb'["\[\]{}]')
+_STRING = re.compile(rb'["\\]')
+
+_validated_items = meter.create_counter(
+    "tech_adapter.validate.bulk.items",
+    description="Provisioning requests validated by the bulk endpoint, by outcome (valid, invalid or error)",
+)
+
+Validator = Callable[[ProvisioningRequest], ValidationResult | SystemErr]
+
+
+class MalformedBody(ValueError):
+    pass
+
+
+class NdjsonResponse(StreamingResponse):
+    """
+    Streams results while the body of the request is still being read.
+
+    `StreamingResponse` reads the messages of the request to notice a disconnection, which
+    would take the body from the endpoint: the disconnection is noticed by the endpoint
+    while it reads the body, and by `DeadlineMiddleware` once it is read.
+    """  # noqa: E501
+
+    media_type = NDJSON_MEDIA_TYPES[0]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+class Splitter(ABC):
+    """
+    Splits a body into its provisioning requests as it arrives, without parsing them.
+    """
+
+    def __init__(self, max_item_bytes: int) -> None:
+        self.max_item_bytes = max_item_bytes
+        self._error: MalformedBody | None = None
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """
+        Returns the provisioning requests completed by the chunk.
+
+        Raises:
+            MalformedBody: If the body is malformed, once the requests before the error are returned.
+        """  # noqa: E501
+
+        if self._error is not None:
+            raise self._error
+        items: list[bytes] = []
+        try:
+            self._split(chunk, items)
+            if self._pending_bytes() > self.max_item_bytes:
+                raise MalformedBody(f"The provisioning request is larger than {self.max_item_bytes} bytes")
+        except MalformedBody as ex:
+            if not items:
+                raise
+            self._error = ex
+        return items
+
+    def finish(self) -> list[bytes]:
+        """
+        Returns the last provisioning request, at the end of the body.
+        """
+
+        if self._error is not None:
+            raise self._error
+        return self._finish()
+
+    @abstractmethod
+    def _split(self, chunk: bytes, items: list[bytes]) -> None:
+        """
+        Appends to `items` the provisioning requests completed by the chunk.
+        """
+
+    @abstractmethod
+    def _pending_bytes(self) -> int:
+        """
+        Returns the size of the provisioning request being received.
+        """
+
+    @abstractmethod
+    def _finish(self) -> list[bytes]:
+        """
+        Returns the provisioning request left at the end of the body.
+        """
+
+
+class NdjsonSplitter(Splitter):
+    """
+    Splits a body into its lines, one provisioning request each; blank lines are skipped.
+    """
+
+    def __init__(self, max_item_bytes: int) -> None:
+        super().__init__(max_item_bytes)
+        self._line = bytearray()
+
+    def _split(self, chunk: bytes, items: list[bytes]) -> None:
+        start = 0
+        while (newline := chunk.find(b"\n", start)) != -1:
+            self._line += chunk[start:newline]
+            start = newline + 1
+            if self._line.strip():
+                items.append(bytes(self._line))
+            self._line.clear()
+        self._line += chunk[start:]
+
+    def _pending_bytes(self) -> int:
+        return len(self._line)
+
+    def _finish(self) -> list[bytes]:
+        items = [bytes(self._line)] if self._line.strip() else []
+        self._line.clear()
+        return items
+
+
+class JsonArraySplitter(Splitter):
+    """
+    Splits a JSON array of objects into the objects.
+
+    The body is scanned as it arrives, remembering where the scan stopped: only the object
+    being received is buffered, and no byte is scanned twice.
+    """  # noqa: E501
+
+    def __init__(self, max_item_bytes: int) -> None:
+        super().__init__(max_item_bytes)
+        self._buffer = bytearray()
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        # What is expected between the objects: "[", an object or "]" first, then "," or "]"
+        self._expected = b"["
+        self._closed = False
+
+    def _split(self, chunk: bytes, items: list[bytes]) -> None:
+        self._buffer += chunk
+        while self._depth > 0 or self._between_items():
+            item = self._scan_item()
+            if item is None:
+                return
+            items.append(item)
+
+    def _pending_bytes(self) -> int:
+        return len(self._buffer)
+
+    def _finish(self) -> list[bytes]:
+        if not self._closed:
+            raise MalformedBody("The JSON array of provisioning requests is not terminated")
+        return []
+
+    def _between_items(self) -> bool:
+        """
+        Reads the separators up to the next object, and returns whether one starts.
+        """
+
+        buffer = self._buffer
+        while self._position < len(buffer):
+            byte = buffer[self._position]
+            if byte in _WHITESPACE:
+                self._position += 1
+                continue
+            if self._closed or byte not in self._expected:
+                expected = "the end of the body" if self._closed else f"one of {self._expected.decode()}"
+                raise MalformedBody(f"Expecting {expected} instead of {chr(byte)!r} in the JSON array")
+            self._position += 1
+            if byte == ord("["):
+                self._expected = b"{]"
+            elif byte == ord(","):
+                self._expected = b"{"
+            elif byte == ord("]"):
+                self._closed = True
+            else:
+                # The buffer only keeps the object from now on
+                del buffer[: self._position - 1]
+                self._position = 1
+                self._depth = 1
+                return True
+        del buffer[:]
+        self._position = 0
+        return False
+
+    def _scan_item(self) -> bytes | None:
+        """
+        Scans the object being received, and returns it once complete.
+        """
+
+        buffer = self._buffer
+        while True:
+            if self._in_string:
+                match = _STRING.search(buffer, self._position)
+                if match is None:
+                    # Past the end after an escape whose character is not received yet
+                    self._position = max(self._position, len(buffer))
+                    return None
+                if buffer[match.start()] == ord("\\"):
+                    # The escaped character is skipped, even if it is not received yet
+                    self._position = match.start() + 2
+                    continue
+                self._in_string = False
+                self._position = match.end()
+                continue
+            match = _STRUCTURE.search(buffer, self._position)
+            if match is None:
+                self._position = len(buffer)
+                return None
+            self._position = match.end()
+            byte = buffer[match.start()]
+            if byte == ord('"'):
+                self._in_string = True
+            elif byte in b"[{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    item = bytes(buffer[: self._position])
+                    del buffer[: self._position]
+                    self._position = 0
+                    self._expected = b",]"
+                    return item
+
+
+def _validate_item(item: bytes, validate: Validator) -> ValidationResult | SystemErr:
+    try:
+        request = ProvisioningRequest.model_validate_json(item)
+    except pydantic.ValidationError as ex:
+        errors = [f"{'.'.join(map(str, error['loc'])) or 'body'}: {error['msg']}" for error in ex.errors()]
+        return ValidationResult(valid=False, error=ValidationError(errors=errors))
+    return validate(request)
+
+
+def _bulk_result(index: int, result: ValidationResult | SystemErr) -> BulkValidationResult:
+    if isinstance(result, SystemErr):
+        _validated_items.add(1, {"outcome": "error"})
+        return BulkValidationResult(index=index, valid=False, systemError=result)
+    _validated_items.add(1, {"outcome": "valid" if result.valid else "invalid"})
+    return BulkValidationResult(index=index, valid=result.valid, error=result.error)
+
+
+async def validate_bulk(
+    chunks: AsyncIterator[bytes],
+    splitter: Splitter,
+    validate: Validator,
+    settings: BulkValidationSettings,
+) -> AsyncIterator[bytes]:
+    """
+    Validates the provisioning requests of a body as it arrives, yielding one `BulkValidationResult`
+    per line as soon as each validation completes, so not in the order of the body.
+
+    Up to `concurrency` requests are validated at the same time in the worker threads.
+    The body is not read further while they all run, nor while their results wait for the
+    client to read them: the memory held stays bounded by the concurrency, whatever the
+    size of the body. A malformed body ends the results with an error at the index where
+    the next request was expected.
+    """  # noqa: E501
+
+    # Each result holds a slot until it is sent, so that the queue never grows past the concurrency
+    results: asyncio.Queue[BulkValidationResult | None] = asyncio.Queue()
+    slots = asyncio.Semaphore(settings.concurrency)
+
+    async def run(index: int, item: bytes) -> None:
+        try:
+            result = await run_in_threadpool(_validate_item, item, validate)
+        except DeadlineExceeded:
+            raise
+        except Exception as ex:
+            logger.exception("Unable to validate the provisioning request {} of the body", index)
+            result = SystemErr(error=f"Unable to validate the provisioning request: {ex}")
+        results.put_nowait(_bulk_result(index, result))
+
+    async def produce() -> None:
+        index = 0
+        try:
+            async with asyncio.TaskGroup() as group:
+                try:
+                    async for chunk in chunks:
+                        for item in splitter.feed(chunk):
+                            await slots.acquire()
+                            group.create_task(run(index, item))
+                            index += 1
+                    for item in splitter.finish():
+                        await slots.acquire()
+                        group.create_task(run(index, item))
+                        index += 1
+                except MalformedBody as ex:
+                    await slots.acquire()
+                    error = ValidationError(errors=["Unable to read the provisioning requests.", str(ex)])
+                    results.put_nowait(BulkValidationResult(index=index, valid=False, error=error))
+        finally:
+            logger.info("Bulk validation of {} provisioning requests", index)
+            results.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (result := await results.get()) is not None:
+            yield result.model_dump_json().encode() + b"\n"
+            slots.release()
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+            with suppress(asyncio.CancelledError):
+                await producer
@@ -10,7 +10,9 @@ from pydantic import BaseModel
 from starlette.responses import Response
 
 from src.app_config import app
+from src.memory import memory_stage
 from src.models.api_models import SystemErr
+from src.telemetry import start_span
 
 
 def check_response(
@@ -42,17 +44,36 @@ def check_response(
         the JSON or the text corresponding to the out_response parameter.
     """  # noqa: E501
 
-    if responses is not None:
-        return _check_response_type(responses, out_response)
+    span_attributes = {"response.type": type(out_response).__name__}
+    with start_span("check_response", attributes=span_attributes), memory_stage("serialize"):
+        if responses is not None:
+            return _check_response_type(responses, out_response)
 
-    if route_path is not None:
-        endpoint = _find_caller_endpoint_by_path(application=application, caller_path=route_path)
+        if route_path is not None:
+            endpoint = _find_caller_endpoint_by_path(application=application, caller_path=route_path)
 
-    else:
-        caller_function = _find_caller_function()
+        else:
+            caller_function = _find_caller_function()
+
+            if caller_function is None:
+                logger.error("Check_responses: caller function not found")
+                return Response(
+                    status_code=500,
+                    content=SystemErr(
+                        error="An unexpected error occurred while processing the request. "
+                        "If the issue still persists, contact the platform team for assistance!"  # noqa: E501
+                    ).model_dump_json(),
+                    media_type="application/json",
+                )
+
+            endpoint = _find_caller_endpoint_by_name(application=application, caller_name=caller_function)
+
+        responses = endpoint.responses if endpoint is not None else None
 
-        if caller_function is None:
-            logger.error("Check_responses: caller function not found")
+        if responses is None:
+            logger.error(
+                "Check_responses: endpoint not found in app.routes or responses parameter has no value "  # noqa: E501
+            )
             return Response(
                 status_code=500,
                 content=SystemErr(
@@ -62,24 +83,7 @@ def check_response(
                 media_type="application/json",
             )
 
-        endpoint = _find_caller_endpoint_by_name(application=application, caller_name=caller_function)
-
-    responses = endpoint.responses if endpoint is not None else None
-
-    if responses is None:
-        logger.error(
-            "Check_responses: endpoint not found in app.routes or responses parameter has no value "  # noqa: E501
-        )
-        return Response(
-            status_code=500,
-            content=SystemErr(
-                error="An unexpected error occurred while processing the request. "
-                "If the issue still persists, contact the platform team for assistance!"  # noqa: E501
-            ).model_dump_json(),
-            media_type="application/json",
-        )
-
-    return _check_response_type(responses, out_response)
+        return _check_response_type(responses, out_response)
 
 
 def _check_response_type(responses: dict, out_response: Any) -> Response:
@@ -0,0 +1,84 @@
+import asyncio
+from typing import Callable, Generic, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+from src.request_context import detached_context
+from src.telemetry import meter
+
+T = TypeVar("T")
+
+_coalesced_requests = meter.create_histogram(
+    "tech_adapter.coalescing.requests",
+    description="Requests served by each coalesced operation; its sum over its count is the coalescing ratio",
+)
+
+
+class _Batch(Generic[T]):
+    def __init__(self, apply: Callable[[], T], previous: "asyncio.Task[None] | None") -> None:
+        self.apply = apply
+        self.previous = previous
+        self.requests = 1
+        self.result: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+
+
+class Coalescer(Generic[T]):
+    """
+    Coalesces the operations submitted for the same key within a window into a single one.
+
+    The first operation submitted for a key opens a batch, which is applied `window_seconds`
+    later; the operations submitted meanwhile join it and replace its operation, so only the
+    last one submitted is applied, in a worker thread, and every caller of the batch gets its
+    result or its exception. The batches of a key are applied one at a time, in order: a batch
+    waiting for the previous one to complete still accepts new operations.
+
+    `requests` and `operations` count the operations submitted and the ones actually applied,
+    and are recorded with the `tech_adapter.coalescing.requests` histogram as well.
+    """  # noqa: E501
+
+    def __init__(self, name: str, window_seconds: float) -> None:
+        self.name = name
+        self.window_seconds = window_seconds
+        self.requests = 0
+        self.operations = 0
+        self._pending: dict[str, _Batch[T]] = {}
+        self._last: dict[str, asyncio.Task[None]] = {}
+
+    async def submit(self, key: str, apply: Callable[[], T]) -> T:
+        """
+        Submits an operation for `key` and returns the result of the batch it joins.
+
+        A caller that is cancelled does not cancel the batch, which is applied for the others.
+        """  # noqa: E501
+
+        self.requests += 1
+        batch = self._pending.get(key)
+        if batch is not None:
+            batch.apply = apply
+            batch.requests += 1
+        else:
+            batch = _Batch(apply, self._last.get(key))
+            self._pending[key] = batch
+            # The batch serves every request joining it, so it is not bound to the deadline of the first one
+            task = asyncio.create_task(self._run(key, batch), context=detached_context())
+            self._last[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(batch.result)
+
+    async def _run(self, key: str, batch: _Batch[T]) -> None:
+        await asyncio.sleep(self.window_seconds)
+        if batch.previous is not None:
+            await asyncio.wait([batch.previous])
+        del self._pending[key]
+        self.operations += 1
+        _coalesced_requests.record(batch.requests, {"operation": self.name})
+        try:
+            result = await run_in_threadpool(batch.apply)
+        except Exception as e:
+            batch.result.set_exception(e)
+        else:
+            batch.result.set_result(result)
+
+    def _forget(self, key: str, task: "asyncio.Task[None]") -> None:
+        if self._last.get(key) is task:
+            del self._last[key]
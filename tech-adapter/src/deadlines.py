@@ -0,0 +1,201 @@
+import asyncio
+import time
+
+from fastapi import Request
+from loguru import logger
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.models.api_models import SystemErr
+from src.request_context import get_request_context
+from src.settings import DeadlineSettings
+from src.telemetry import meter
+
+DEADLINE = "deadline"
+DISCONNECT = "disconnect"
+
+_abandoned_requests = meter.create_counter(
+    "tech_adapter.request.abandoned",
+    description="Requests abandoned because their deadline passed or their client disconnected, by reason and stage",
+)
+_wasted_time = meter.create_histogram(
+    "tech_adapter.request.wasted_time",
+    unit="s",
+    description="Time spent on the requests that were abandoned, by reason",
+)
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised by `check_deadline` when nobody is waiting for the result of the request anymore.
+    """
+
+    def __init__(self, reason: str, stage: str) -> None:
+        super().__init__(f"Request abandoned at stage {stage}: {reason}")
+        self.reason = reason
+        self.stage = stage
+
+
+def remaining_seconds() -> float | None:
+    """
+    Returns the seconds left before the deadline of the current request, None if it has none.
+
+    Meant to bound the timeouts of the calls to the target technology, e.g.
+    `http_client.get(url, timeout=remaining_seconds())`.
+    """  # noqa: E501
+
+    context = get_request_context()
+    if context is None or context.deadline is None:
+        return None
+    return max(context.deadline - time.monotonic(), 0.0)
+
+
+def check_deadline(stage: str) -> None:
+    """
+    Stops the current request if its deadline passed or its client disconnected.
+
+    Meant to be called between the stages of long operations, including the ones running
+    in worker threads, which cannot be cancelled otherwise. No-op outside a request.
+
+    Args:
+        stage (str): The stage about to start, reported in the metrics.
+
+    Raises:
+        DeadlineExceeded: If the request was abandoned.
+    """  # noqa: E501
+
+    context = get_request_context()
+    if context is None:
+        return
+    reason = context.abandoned
+    if reason is None and context.deadline is not None and time.monotonic() >= context.deadline:
+        reason = context.abandoned = DEADLINE
+    if reason is not None:
+        if context.abandoned_stage is None:
+            context.abandoned_stage = stage
+        raise DeadlineExceeded(reason, stage)
+
+
+def _error(reason: str) -> JSONResponse:
+    message = "The deadline of the request passed" if reason == DEADLINE else "The client disconnected"
+    return JSONResponse(SystemErr(error=message).model_dump(), status_code=504)
+
+
+async def deadline_exceeded_handler(request: Request, exc: Exception) -> JSONResponse:
+    return _error(exc.reason if isinstance(exc, DeadlineExceeded) else DEADLINE)
+
+
+class DeadlineMiddleware:
+    """
+    Gives each request a deadline and abandons the requests nobody is waiting for anymore.
+
+    The deadline comes from the timeout in seconds of the `header` of the request, or from
+    `route_timeouts` for its path, the earliest of the two. Once it passes, or once the client
+    disconnects, the request is cancelled: the awaiting coroutines stop right away, and the work
+    running in worker threads stops at its next `check_deadline`. A request whose deadline
+    passed gets a 504 `SystemErr`, unless its response already started.
+    """  # noqa: E501
+
+    def __init__(self, app: ASGIApp, settings: DeadlineSettings) -> None:
+        self.app = app
+        self.settings = settings
+
+    def timeout(self, scope: Scope) -> float | None:
+        timeouts = []
+        value = Headers(scope=scope).get(self.settings.header)
+        if value is not None:
+            try:
+                timeouts.append(float(value))
+            except ValueError:
+                logger.warning("Ignoring the invalid {} header: {}", self.settings.header, value)
+        route_timeout = self.settings.route_timeouts.get(scope["path"])
+        if route_timeout is not None:
+            timeouts.append(route_timeout)
+        return min(timeouts) if timeouts else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        context = get_request_context()
+        if scope["type"] != "http" or context is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        timeout = self.timeout(scope)
+        if timeout is not None:
+            context.deadline = started + timeout
+        loop = asyncio.get_running_loop()
+        disconnected: asyncio.Future[Message] = loop.create_future()
+        background: list[asyncio.Task] = []
+        body_received = False
+        response_started = False
+        response_complete = False
+
+        def abandon(reason: str) -> None:
+            # Work left after the response, e.g. background tasks, is not abandoned
+            if response_complete:
+                return
+            if context.abandoned is None:
+                context.abandoned = reason
+            task.cancel()
+
+        async def watch_disconnect() -> None:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set_result(message)
+                abandon(DISCONNECT)
+
+        async def watch_deadline(seconds: float) -> None:
+            await asyncio.sleep(seconds)
+            abandon(DEADLINE)
+
+        async def watched_receive() -> Message:
+            nonlocal body_received
+            if body_received:
+                # Once the body is received, the only message left is the disconnection, read by the watcher
+                return await asyncio.shield(disconnected)
+            message = await receive()
+            if message["type"] == "http.request" and not message.get("more_body", False):
+                body_received = True
+                background.append(asyncio.create_task(watch_disconnect()))
+            elif message["type"] == "http.disconnect" and not disconnected.done():
+                disconnected.set_result(message)
+                context.abandoned = context.abandoned or DISCONNECT
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        task: asyncio.Task[None] = asyncio.create_task(self._run(scope, watched_receive, tracking_send))
+        if timeout is not None:
+            background.append(asyncio.create_task(watch_deadline(timeout)))
+        try:
+            await task
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if context.abandoned is None or (current is not None and current.cancelling()):
+                task.cancel()
+                raise
+            if context.abandoned == DEADLINE and not response_started:
+                await _error(DEADLINE)(scope, receive, send)
+        finally:
+            for background_task in background:
+                background_task.cancel()
+            if context.abandoned is not None:
+                attributes = {"reason": context.abandoned, "url.path": scope["path"]}
+                _abandoned_requests.add(1, {**attributes, "stage": context.abandoned_stage or "cancelled"})
+                _wasted_time.record(time.monotonic() - started, attributes)
+                logger.warning(
+                    "Request to {} abandoned at stage {}: {}",
+                    scope["path"],
+                    context.abandoned_stage or "cancelled",
+                    context.abandoned,
+                )
+
+    async def _run(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.app(scope, receive, send)
@@ -1,8 +1,11 @@
-from typing import Annotated, Tuple
+from typing import Annotated, Any, Tuple
 
-import yaml
 from fastapi import Depends
+from opentelemetry.trace import Span
 
+from src.deadlines import DeadlineExceeded, check_deadline
+from src.large_body import SpooledDescriptor, get_spooled_descriptor
+from src.memory import memory_stage
 from src.models.api_models import (
     DescriptorKind,
     ProvisioningRequest,
@@ -10,7 +13,66 @@ from src.models.api_models import (
     ValidationError,
 )
 from src.models.data_product_descriptor import DataProduct
+from src.request_context import set_component_id
+from src.settings import component_extraction_settings, descriptor_limits_settings
+from src.telemetry import start_span
+from src.utility.component_extraction import extract_component
 from src.utility.parsing_pydantic_models import parse_yaml_with_model
+from src.utility.yaml_loader import (
+    DescriptorLimitExceeded,
+    TextStream,
+    is_json_object,
+    load_descriptor,
+    load_yaml,
+    utf8_size,
+)
+
+
+def _spooled_descriptor(descriptor: str) -> SpooledDescriptor | None:
+    # An empty descriptor stands for the one LargeBodyMiddleware kept in the spooled body
+    return get_spooled_descriptor() if descriptor == "" else None
+
+
+def _set_descriptor_attributes(span: Span, descriptor: str, spooled: SpooledDescriptor | None) -> None:
+    if spooled is not None:
+        span.set_attribute("descriptor.spooled", True)
+        span.set_attribute("descriptor.bytes", spooled.size)
+    elif span.is_recording():
+        span.set_attribute("descriptor.bytes", utf8_size(descriptor))
+
+
+def _load_descriptor(descriptor: str) -> Any:
+    spooled = _spooled_descriptor(descriptor)
+    with start_span("descriptor.parse_yaml") as span, memory_stage("parse"):
+        _set_descriptor_attributes(span, descriptor, spooled)
+        if spooled is not None:
+            return load_yaml(spooled.reader(descriptor_limits_settings.max_bytes))
+        return load_descriptor(descriptor)
+
+
+def _extract_component(descriptor: str) -> tuple[dict, Any] | None:
+    spooled = _spooled_descriptor(descriptor)
+
+    def open_descriptor() -> str | TextStream:
+        return spooled.reader(descriptor_limits_settings.max_bytes) if spooled is not None else descriptor
+
+    with start_span("descriptor.extract_component") as span, memory_stage("parse"):
+        _set_descriptor_attributes(span, descriptor, spooled)
+        extracted = extract_component(open_descriptor)
+        span.set_attribute("descriptor.extracted", extracted is not None)
+        return extracted
+
+
+def _only_component(data_product: Any, component_id: Any) -> Any:
+    """
+    Keeps only the component to provision in a loaded data product, if it has it.
+    """
+
+    components = data_product.get("components") if isinstance(data_product, dict) else None
+    if not isinstance(components, list):
+        return data_product
+    matching = [c for c in components if isinstance(c, dict) and c.get("id") == component_id]
+    return {**data_product, "components": matching} if matching else data_product
 
 
 async def unpack_provisioning_request(
@@ -38,6 +100,36 @@ async def unpack_provisioning_request(
 
     """  # noqa: E501
 
+    return _unpack_component_descriptor(provisioning_request, targeted=False)
+
+
+def parse_provisioning_request(
+    provisioning_request: ProvisioningRequest,
+) -> Tuple[DataProduct, str] | ValidationError:
+    """
+    Unpacks a Provisioning Request like `unpack_provisioning_request`, outside of a dependency,
+    e.g. from a worker thread for each request of a bulk validation.
+    """  # noqa: E501
+
+    return _unpack_component_descriptor(provisioning_request, targeted=False)
+
+
+async def unpack_component_provisioning_request(
+    provisioning_request: ProvisioningRequest,
+) -> Tuple[DataProduct, str] | ValidationError:
+    """
+    Unpacks a Provisioning Request like `unpack_provisioning_request`, but only loads the component to provision.
+
+    Unless the component extraction is disabled, the `components` of the returned `DataProduct`
+    only hold the component whose id is `componentIdToProvision`, see docs/component_extraction.md.
+    """  # noqa: E501
+
+    return _unpack_component_descriptor(provisioning_request, targeted=component_extraction_settings.enabled)
+
+
+def _unpack_component_descriptor(
+    provisioning_request: ProvisioningRequest, targeted: bool
+) -> Tuple[DataProduct, str] | ValidationError:
     if not provisioning_request.descriptorKind == DescriptorKind.COMPONENT_DESCRIPTOR:
         error = (
             "Expecting a COMPONENT_DESCRIPTOR but got a "
@@ -46,9 +138,21 @@ async def unpack_provisioning_request(
         )
         return ValidationError(errors=[error])
     try:
-        descriptor_dict = yaml.safe_load(provisioning_request.descriptor)
-        data_product = parse_yaml_with_model(descriptor_dict.get("dataProduct"), DataProduct)
-        component_to_provision = descriptor_dict.get("componentIdToProvision")
+        check_deadline("parse")
+        descriptor = provisioning_request.descriptor
+        # A JSON descriptor is decoded faster as a whole than its YAML events are read
+        extracted = _extract_component(descriptor) if targeted and not is_json_object(descriptor) else None
+        if extracted is not None:
+            data_product_dict, component_to_provision = extracted
+        else:
+            descriptor_dict = _load_descriptor(descriptor)
+            data_product_dict = descriptor_dict.get("dataProduct")
+            component_to_provision = descriptor_dict.get("componentIdToProvision")
+            if targeted:
+                data_product_dict = _only_component(data_product_dict, component_to_provision)
+        check_deadline("model")
+        data_product = parse_yaml_with_model(data_product_dict, DataProduct)
+        set_component_id(component_to_provision)
 
         if isinstance(data_product, DataProduct):
             return data_product, component_to_provision
@@ -62,10 +166,20 @@ async def unpack_provisioning_request(
                 ]
             )
 
+    except DeadlineExceeded:
+        raise
+    except DescriptorLimitExceeded as ex:
+        return ValidationError(errors=["The descriptor exceeds the limits of the service.", str(ex)])
     except Exception as ex:
         return ValidationError(errors=["Unable to parse the descriptor.", str(ex)])
 
 
+UnpackedComponentProvisioningRequestDep = Annotated[
+    Tuple[DataProduct, str] | ValidationError,
+    Depends(unpack_component_provisioning_request),
+]
+
+
 UnpackedProvisioningRequestDep = Annotated[
     Tuple[DataProduct, str] | ValidationError,
     Depends(unpack_provisioning_request),
@@ -98,7 +212,7 @@ async def unpack_unprovisioning_request(
 
     """  # noqa: E501
 
-    unpacked_request = await unpack_provisioning_request(provisioning_request)
+    unpacked_request = await unpack_component_provisioning_request(provisioning_request)
     remove_data = provisioning_request.removeData if provisioning_request.removeData is not None else False
 
     if isinstance(unpacked_request, ValidationError):
@@ -135,17 +249,20 @@ async def unpack_update_acl_request(
             - If unsuccessful, returns a `ValidationError` object with error details.
 
     Note:
-        This function expects the `update_acl_request` to contain a valid YAML string
-        in the 'provisionInfo.request' field. It will attempt to parse the YAML and
+        This function expects the `update_acl_request` to contain a valid JSON or YAML string
+        in the 'provisionInfo.request' field. It will attempt to parse it and
         return the relevant information. If parsing fails, a `ValidationError` will
         be returned.
 
     """  # noqa: E501
 
     try:
-        request = yaml.safe_load(update_acl_request.provisionInfo.request)
+        check_deadline("parse")
+        request = _load_descriptor(update_acl_request.provisionInfo.request)
+        check_deadline("model")
         data_product = parse_yaml_with_model(request.get("dataProduct"), DataProduct)
         component_to_provision = request.get("componentIdToProvision")
+        set_component_id(component_to_provision)
         if isinstance(data_product, DataProduct):
             return (
                 data_product,
@@ -156,6 +273,10 @@ async def unpack_update_acl_request(
             return data_product
         else:
             return ValidationError(errors=["An unexpected error occurred while parsing the update acl request."])
+    except DeadlineExceeded:
+        raise
+    except DescriptorLimitExceeded as ex:
+        return ValidationError(errors=["The descriptor exceeds the limits of the service.", str(ex)])
     except Exception as ex:
         return ValidationError(errors=["Unable to parse the descriptor.", str(ex)])
 
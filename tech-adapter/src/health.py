@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from starlette.responses import JSONResponse
+
+from src.shutdown import shutdown_coordinator
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live")
+def live() -> JSONResponse:
+    """
+    Liveness probe: the service is up
+    """
+
+    return JSONResponse({"status": "UP"})
+
+
+@router.get("/ready", responses={"503": {"description": "The service is shutting down"}})
+def ready() -> JSONResponse:
+    """
+    Readiness probe: the service accepts new requests, until it starts shutting down
+    """
+
+    if not shutdown_coordinator.ready:
+        return JSONResponse({"status": "DRAINING"}, status_code=503)
+    return JSONResponse({"status": "UP"})
@@ -0,0 +1,134 @@
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncIterator
+
+import httpx
+from fastapi import Depends, FastAPI, Request
+from loguru import logger
+
+from src.settings import HttpClientSettings, http_client_settings
+
+
+def http2_available() -> bool:
+    # HTTP/2 needs the optional `h2` package (`httpx[http2]`)
+    return importlib.util.find_spec("h2") is not None
+
+
+class _PerHostLimitTransport(httpx.AsyncBaseTransport):
+    """
+    Caps the requests in flight to each host, which httpx only limits for the whole pool.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_per_host: int) -> None:
+        self.transport = transport
+        self.max_per_host = max_per_host
+        self._semaphores: dict[tuple[bytes, bytes, int | None], asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = request.url
+        key = (url.raw_scheme, url.raw_host, url.port)
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._semaphores[key] = asyncio.Semaphore(self.max_per_host)
+        await semaphore.acquire()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        # The slot is held until the body is read and the connection goes back to the pool
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, semaphore),  # type: ignore[arg-type]
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, semaphore: asyncio.Semaphore) -> None:
+        self.stream = stream
+        self.semaphore = semaphore
+        self._released = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self.semaphore.release()
+
+
+def create_http_client(settings: HttpClientSettings = http_client_settings) -> httpx.AsyncClient:
+    """
+    Creates the async HTTP client for the calls to the target technologies.
+
+    Connections are kept alive and reused across requests, over HTTP/2 when it is enabled,
+    the `h2` package is installed and the server supports it.
+
+    Args:
+        settings (HttpClientSettings): The pool limits and timeouts.
+
+    Returns:
+        httpx.AsyncClient: The client, to be closed with `aclose`.
+    """  # noqa: E501
+
+    http2 = settings.http2 and http2_available()
+    limits = httpx.Limits(
+        max_connections=settings.max_connections,
+        max_keepalive_connections=settings.max_keepalive_connections,
+        keepalive_expiry=settings.keepalive_expiry_seconds,
+    )
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+    if settings.max_connections_per_host is not None:
+        transport = _PerHostLimitTransport(transport, settings.max_connections_per_host)
+    timeout = httpx.Timeout(
+        connect=settings.connect_timeout_seconds,
+        read=settings.read_timeout_seconds,
+        write=settings.write_timeout_seconds,
+        pool=settings.pool_timeout_seconds,
+    )
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+
+@asynccontextmanager
+async def http_client_lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Opens the shared HTTP client on startup, stores it in `app.state.http_client` and closes it on shutdown.
+    """  # noqa: E501
+
+    async with create_http_client() as client:
+        app.state.http_client = client
+        try:
+            yield
+        finally:
+            del app.state.http_client
+
+
+async def get_http_client(request: Request) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Returns the HTTP client shared by the requests.
+
+    Without the application lifespan, e.g. in tests with a `TestClient` not used as a context
+    manager, each request gets a client of its own, closed with the request.
+    """  # noqa: E501
+
+    client = getattr(request.app.state, "http_client", None)
+    if client is not None:
+        yield client
+        return
+    logger.debug("No shared HTTP client, using a client for the request")
+    async with create_http_client() as client:
+        yield client
+
+
+HttpClientDep = Annotated[httpx.AsyncClient, Depends(get_http_client)]
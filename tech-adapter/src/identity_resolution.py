@@ -0,0 +1,152 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Iterable, Mapping, Protocol, Sequence
+
+from src.settings import IdentityCacheSettings, identity_cache_settings
+from src.telemetry import meter
+
+_lookups = meter.create_counter(
+    "tech_adapter.identity_cache.lookups",
+    description="Identities resolved through the identity cache, by result: hit, negative_hit or miss",
+)
+
+
+class IdentityDirectory(Protocol):
+    """
+    Resolves the identities of the ACLs (e.g. `user:alice`, `group:dev`) to the principals of the target technology.
+    """  # noqa: E501
+
+    def lookup(self, refs: Sequence[str]) -> Mapping[str, list[str]]:
+        """
+        Resolves a batch of identities: a user to its principal, a group to the principals of its members.
+
+        Returns:
+            Mapping[str, list[str]]: The principals of each identity; identities that do not exist are left out.
+        """  # noqa: E501
+        ...
+
+
+class PassthroughDirectory:
+    """
+    Resolves every identity to itself, for technologies whose principals are the Witboost identities.
+    """
+
+    def lookup(self, refs: Sequence[str]) -> Mapping[str, list[str]]:
+        return {ref: [ref] for ref in refs}
+
+
+class InMemoryDirectory:
+    """
+    A directory of users and groups held in memory, to test and run the service locally.
+
+    Users resolve to their name without the `user:` prefix and groups to the names of their members.
+    Every call to `lookup` is recorded in `lookups`.
+    """  # noqa: E501
+
+    def __init__(self, users: Iterable[str] = (), groups: Mapping[str, Iterable[str]] | None = None) -> None:
+        self.users = set(users)
+        self.groups = {group: list(members) for group, members in (groups or {}).items()}
+        self.lookups: list[list[str]] = []
+
+    def lookup(self, refs: Sequence[str]) -> Mapping[str, list[str]]:
+        self.lookups.append(list(refs))
+        resolved = {}
+        for ref in refs:
+            kind, _, name = ref.partition(":")
+            if kind == "user" and name in self.users:
+                resolved[ref] = [name]
+            elif kind == "group" and name in self.groups:
+                resolved[ref] = self.groups[name]
+        return resolved
+
+
+class IdentityResolver:
+    """
+    Resolves identities through a directory, caching the results in memory.
+
+    Resolved identities are cached for `ttl_seconds` and the ones the directory does not know
+    for `negative_ttl_seconds`, so that repeated ACL updates for the same identities do not hit
+    the directory again. The cache holds at most `max_entries` identities, evicting the least
+    recently used ones, and the identities missing from it are looked up in batches of
+    `batch_size`. The resolver can be shared by concurrent threads.
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        directory: IdentityDirectory,
+        settings: IdentityCacheSettings,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.directory = directory
+        self.settings = settings
+        self.clock = clock
+        self._lock = Lock()
+        # Identity -> (expiry, principals or None if the directory does not know it)
+        self._cache: OrderedDict[str, tuple[float, list[str] | None]] = OrderedDict()
+
+    def resolve(self, refs: Iterable[str]) -> dict[str, list[str] | None]:
+        """
+        Resolves identities to principals.
+
+        Returns:
+            dict[str, list[str] | None]: The principals of each identity, None for the ones that do not exist.
+        """  # noqa: E501
+
+        resolved: dict[str, list[str] | None] = {}
+        misses = []
+        hits = negative_hits = 0
+        with self._lock:
+            now = self.clock()
+            for ref in dict.fromkeys(refs):
+                entry = self._cache.get(ref)
+                if entry is not None and entry[0] > now:
+                    self._cache.move_to_end(ref)
+                    resolved[ref] = entry[1]
+                    if entry[1] is None:
+                        negative_hits += 1
+                    else:
+                        hits += 1
+                else:
+                    misses.append(ref)
+        _lookups.add(hits, {"result": "hit"})
+        _lookups.add(negative_hits, {"result": "negative_hit"})
+        _lookups.add(len(misses), {"result": "miss"})
+
+        # The directory is called without holding the lock
+        for start in range(0, len(misses), self.settings.batch_size):
+            batch = misses[start : start + self.settings.batch_size]
+            found = self.directory.lookup(batch)
+            with self._lock:
+                now = self.clock()
+                for ref in batch:
+                    principals = found.get(ref)
+                    ttl = self.settings.ttl_seconds if principals is not None else self.settings.negative_ttl_seconds
+                    self._store(ref, now + ttl, principals)
+                    resolved[ref] = principals
+        return resolved
+
+    def invalidate(self, refs: Iterable[str] | None = None) -> None:
+        """
+        Removes identities from the cache, all of them if `refs` is None.
+        """
+
+        with self._lock:
+            if refs is None:
+                self._cache.clear()
+            else:
+                for ref in refs:
+                    self._cache.pop(ref, None)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _store(self, ref: str, expiry: float, principals: list[str] | None) -> None:
+        self._cache[ref] = (expiry, principals)
+        self._cache.move_to_end(ref)
+        while len(self._cache) > self.settings.max_entries:
+            self._cache.popitem(last=False)
+
+
+# Tech adapters replace the directory with one that queries the target technology
+identity_resolver = IdentityResolver(PassthroughDirectory(), identity_cache_settings)
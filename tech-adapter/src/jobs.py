@@ -0,0 +1,381 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, TypeVar
+
+from loguru import logger
+
+from src.models.api_models import Status1
+from src.settings import JobJournalSettings, job_journal_settings
+from src.telemetry import meter
+
+try:
+    import orjson
+
+    _json_dumps: Callable[[Any], bytes] = orjson.dumps
+    _json_loads: Callable[[bytes], Any] = orjson.loads
+except ImportError:  # pragma: no cover
+    _json_dumps = lambda value: json.dumps(value, separators=(",", ":")).encode()  # noqa: E731
+    _json_loads = json.loads
+
+T = TypeVar("T")
+
+INTERRUPTED = "Interrupted by a restart of the service"
+
+_journal_entries = meter.create_counter(
+    "tech_adapter.job_journal.entries", description="State transitions appended to the job journal, by state"
+)
+_journal_syncs = meter.create_counter(
+    "tech_adapter.job_journal.syncs", description="fsync calls of the job journal, each covering a batch of entries"
+)
+
+
+@dataclass(frozen=True)
+class Job:
+    """
+    A provisioning operation running in a worker thread.
+    """
+
+    operation: str
+    component_id: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started_at: float = field(default_factory=time.time)
+
+
+Resumer = Callable[["JournalEntry"], Status1]
+
+
+@dataclass(frozen=True)
+class JournalEntry:
+    """
+    A state transition of a job.
+    """
+
+    job_id: str
+    state: Status1
+    operation: str
+    component_id: str
+    at: float
+    error: str | None = None
+
+    def to_line(self) -> bytes:
+        record = {
+            "id": self.job_id,
+            "state": self.state.value,
+            "operation": self.operation,
+            "component_id": self.component_id,
+            "at": self.at,
+        }
+        if self.error is not None:
+            record["error"] = self.error
+        return _json_dumps(record) + b"\n"
+
+    @classmethod
+    def from_line(cls, line: bytes) -> "JournalEntry":
+        record = _json_loads(line)
+        return cls(
+            record["id"],
+            Status1(record["state"]),
+            record["operation"],
+            record["component_id"],
+            record["at"],
+            record.get("error"),
+        )
+
+
+class JobJournal:
+    """
+    Appends the state transitions of the jobs to a local file, replayed when the service starts.
+
+    Each transition is a JSON line. With `fsync`, `record` returns once its line reached the
+    disk: the threads recording at the same time share one fsync, the first one syncing every
+    line written so far while the others wait for it. Every `compaction_threshold` entries the
+    file is rewritten with the latest state of each job, dropping the jobs that ended more
+    than `retention_seconds` ago.
+
+    The replay rebuilds the latest states, so that the status of a job is still known after a
+    restart. The jobs still `RUNNING` were interrupted: the resumer registered for their
+    operation decides their state, e.g. by asking the target technology, and they are `FAILED`
+    otherwise, or if it raises. A truncated last line, left by a crash while writing, is dropped.
+    A failure of the journal is logged, and does not fail the job.
+
+    Once closed on shutdown, the journal is not replayed again until `recover` is called: the
+    transitions of the jobs still running are logged and dropped, so that they stay `RUNNING`
+    in the journal and are recovered on the next start.
+    """  # noqa: E501
+
+    def __init__(self, settings: JobJournalSettings, clock: Callable[[], float] = time.time) -> None:
+        self.settings = settings
+        self.clock = clock
+        self.entries = 0
+        self.syncs = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._file: BinaryIO | None = None
+        self._closed = False
+        self._states: dict[str, JournalEntry] = {}
+        self._resumers: dict[str, Resumer] = {}
+        self._written = 0
+        self._synced = 0
+        self._since_compaction = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.enabled
+
+    def register_resumer(self, operation: str, resumer: Resumer) -> None:
+        """
+        Registers how to find the state of the jobs of `operation` interrupted by a restart.
+        """
+
+        self._resumers[operation] = resumer
+
+    def recover(self) -> list[JournalEntry]:
+        """
+        Replays the journal, if not done yet, and returns the new states of the interrupted jobs.
+        """
+
+        with self._sync_lock, self._lock:
+            self._closed = False
+            if self._file is not None:
+                return []
+            return self._open()
+
+    def record(self, job: Job, state: Status1, error: str | None = None) -> None:
+        """
+        Appends a state transition of `job`, and waits for it to reach the disk with `fsync`.
+        """
+
+        entry = JournalEntry(job.id, state, job.operation, job.component_id, self.clock(), error)
+        try:
+            if self._file is None:
+                self._replay()
+            with self._lock:
+                if self._file is None:
+                    logger.warning("The job journal is closed, state {} of job {} not journaled", state.value, job.id)
+                    return
+                self._file.write(entry.to_line())
+                self._apply(entry)
+                position = self._written
+                compact = self._since_compaction >= self.settings.compaction_threshold
+            if compact:
+                self.compact()
+            else:
+                self._sync(position)
+        except OSError as e:
+            logger.warning("Unable to journal the state {} of job {}: {}", state.value, job.id, e)
+
+    def status(self, job_id: str) -> JournalEntry | None:
+        """
+        Returns the latest state of a job, None if it is unknown or no longer retained.
+        """
+
+        if self._file is None:
+            try:
+                self._replay()
+            except OSError as e:
+                logger.warning("Unable to replay the job journal: {}", e)
+                return None
+        with self._lock:
+            return self._states.get(job_id)
+
+    def compact(self) -> None:
+        """
+        Rewrites the journal with the latest state of the jobs still retained.
+        """
+
+        with self._sync_lock, self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._rewrite()
+
+    def close(self) -> None:
+        with self._sync_lock, self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+            self._closed = True
+            self._states.clear()
+
+    def _replay(self) -> None:
+        # Replays the journal on first use, but not once closed
+        with self._sync_lock, self._lock:
+            if self._file is None and not self._closed:
+                self._open()
+
+    def _open(self) -> list[JournalEntry]:
+        path = self.settings.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._states.clear()
+        replayed = 0
+        if path.exists():
+            with path.open("rb") as file:
+                for number, line in enumerate(file, 1):
+                    try:
+                        entry = JournalEntry.from_line(line)
+                    except (ValueError, KeyError) as e:
+                        logger.warning("Ignoring the journal from line {} of {}: {}", number, path, e)
+                        break
+                    self._states[entry.job_id] = entry
+                    replayed += 1
+        interrupted = [self._resume(entry) for entry in self._states.values() if entry.state == Status1.RUNNING]
+        for entry in interrupted:
+            self._states[entry.job_id] = entry
+        if replayed:
+            logger.info("Replayed {} journal entries: {} jobs interrupted", replayed, len(interrupted))
+        # Starting from a compacted journal also drops a truncated last line
+        self._rewrite()
+        return interrupted
+
+    def _resume(self, entry: JournalEntry) -> JournalEntry:
+        resumer = self._resumers.get(entry.operation)
+        state = Status1.FAILED
+        error: str | None = INTERRUPTED
+        if resumer is not None:
+            try:
+                state, error = resumer(entry), None
+            except Exception as e:
+                logger.warning("Unable to resume job {} of component {}: {}", entry.job_id, entry.component_id, e)
+        return JournalEntry(entry.job_id, state, entry.operation, entry.component_id, self.clock(), error)
+
+    def _apply(self, entry: JournalEntry) -> None:
+        self._states[entry.job_id] = entry
+        self._written += 1
+        self._since_compaction += 1
+        self.entries += 1
+        _journal_entries.add(1, {"state": entry.state.value})
+
+    def _sync(self, position: int) -> None:
+        with self._sync_lock:
+            if self._synced >= position:
+                # Synced by another thread meanwhile
+                return
+            with self._lock:
+                assert self._file is not None
+                self._file.flush()
+                position = self._written
+                file = self._file
+            if self.settings.fsync:
+                os.fsync(file.fileno())
+                self.syncs += 1
+                _journal_syncs.add(1)
+            self._synced = position
+
+    def _rewrite(self) -> None:
+        # Holding both locks: the journal is replaced by a new file with one line per retained job
+        path = self.settings.path
+        retained_since = self.clock() - self.settings.retention_seconds
+        self._states = {
+            job_id: entry
+            for job_id, entry in self._states.items()
+            if entry.state == Status1.RUNNING or entry.at >= retained_since
+        }
+        compacted = path.with_name(path.name + ".compacting")
+        with compacted.open("wb") as file:
+            file.writelines(entry.to_line() for entry in self._states.values())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(compacted, path)
+        directory = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        self._file = path.open("ab")
+        self._synced = self._written
+        self._since_compaction = 0
+
+
+_current_job: ContextVar[Job | None] = ContextVar("current_job", default=None)
+
+
+def current_job() -> Job | None:
+    """
+    Returns the job running in the current worker thread, whose id can serve as status token.
+    """
+
+    return _current_job.get()
+
+
+class JobRegistry:
+    """
+    Keeps track of the provisioning operations running in the worker threads, so that the
+    shutdown can wait for them and record the ones it could not wait for.
+
+    With an enabled `journal`, the state transitions of the jobs are journaled too: `RUNNING`
+    when they start, then the state returned by `outcome` for their result, or `FAILED` if
+    they raise. An outcome still `RUNNING`, e.g. for an operation the target technology
+    completes asynchronously, is journaled later by whoever follows it up.
+    """  # noqa: E501
+
+    def __init__(self, journal: JobJournal | None = None) -> None:
+        self.journal = journal
+        self._lock = threading.Lock()
+        self._jobs: dict[str, Job] = {}
+
+    def tracked(
+        self,
+        operation: str,
+        component_id: str,
+        run: Callable[[], T],
+        outcome: Callable[[T], Status1] = lambda result: Status1.COMPLETED,
+    ) -> Callable[[], T]:
+        """
+        Returns `run` registered as a running job while it runs, to be called in a worker thread.
+        """
+
+        def tracked_run() -> T:
+            job = Job(operation, component_id)
+            journal = self.journal if self.journal is not None and self.journal.enabled else None
+            with self._lock:
+                self._jobs[job.id] = job
+            token = _current_job.set(job)
+            try:
+                if journal is not None:
+                    journal.record(job, Status1.RUNNING)
+                try:
+                    result = run()
+                except Exception as e:
+                    if journal is not None:
+                        journal.record(job, Status1.FAILED, str(e))
+                    raise
+                if journal is not None:
+                    state = outcome(result)
+                    if state != Status1.RUNNING:
+                        journal.record(job, state)
+                return result
+            finally:
+                _current_job.reset(token)
+                with self._lock:
+                    del self._jobs[job.id]
+
+        return tracked_run
+
+    def running(self) -> list[Job]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.started_at)
+
+    async def wait_idle(self, timeout_seconds: float, poll_seconds: float = 0.1) -> bool:
+        """
+        Waits up to `timeout_seconds` for the running jobs to complete, and returns whether they did.
+        """
+
+        deadline = time.monotonic() + timeout_seconds
+        while self.running():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(poll_seconds, remaining))
+        return True
+
+
+job_journal = JobJournal(job_journal_settings)
+job_registry = JobRegistry(job_journal)
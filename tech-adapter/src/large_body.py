@@ -0,0 +1,297 @@
+import json
+import mmap
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import IO, Iterable, Iterator
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.request_context import get_request_context, request_context
+from src.settings import LargeBodySettings
+from src.utility.yaml_loader import DescriptorLimitExceeded, utf8_size
+
+# Location of the descriptor in the JSON body of the routes that parse it
+ROUTE_DESCRIPTOR_PATHS: dict[str, tuple[str, ...]] = {
+    "/v1/provision": ("descriptor",),
+    "/v1/unprovision": ("descriptor",),
+    "/v1/validate": ("descriptor",),
+    "/v1/updateacl": ("provisionInfo", "request"),
+}
+
+# Bytes read from the body for each chunk of the descriptor
+READ_SIZE = 64 * 1024
+# The longest JSON escape, a surrogate pair such as 😀
+_MAX_ESCAPE_BYTES = 12
+_BACKSLASH = ord("\\")
+_WHITESPACE = b" \t\r\n"
+_STRUCTURE = re.compile(rb'["\[\]{}]')
+_SCALAR = re.compile(rb"[^,\]}\s]*")
+
+
+class JsonStringReader:
+    """
+    A text stream over the content of a JSON string held in a buffer, e.g. a memory map.
+
+    The string is unescaped one chunk at a time, so it is never materialized as a whole:
+    this is what `yaml` reads when it parses the descriptor of a large body.
+    """  # noqa: E501
+
+    def __init__(self, buffer: bytes | mmap.mmap, start: int, end: int, max_bytes: int | None = None) -> None:
+        self.buffer = buffer
+        self.position = start
+        self.end = end
+        self.max_bytes = max_bytes
+        self.decoded_bytes = 0
+
+    def read(self, size: int = -1) -> str:
+        if self.position >= self.end:
+            return ""
+        # yaml asks for a few KB at a time: bigger chunks amortize the cost of json.loads
+        cut = self.end if size < 0 else min(self.end, self.position + max(size, READ_SIZE))
+        if cut < self.end:
+            cut = self._safe_cut(cut)
+        text = json.loads(b'"' + self.buffer[self.position : cut] + b'"')
+        if cut < self.end and text and "\ud800" <= text[-1] <= "\udbff":
+            # The high half of a surrogate pair, whose \uXXXX escape is read again with its low half
+            text = text[:-1]
+            cut -= 6
+        self.position = cut
+        self.decoded_bytes += utf8_size(text)
+        if self.max_bytes is not None and self.decoded_bytes > self.max_bytes:
+            raise DescriptorLimitExceeded(f"The descriptor is larger than {self.max_bytes} bytes")
+        return text
+
+    def _safe_cut(self, cut: int) -> int:
+        """
+        Moves the end of a chunk back so that it splits neither an escape sequence nor a UTF-8 character.
+        """  # noqa: E501
+
+        backslash = self.buffer.find(b"\\", max(self.position, cut - _MAX_ESCAPE_BYTES), cut)
+        if backslash != -1:
+            # A backslash preceded by any other character always starts an escape sequence
+            run_start = backslash
+            while run_start > self.position and self.buffer[run_start - 1] == _BACKSLASH:
+                run_start -= 1
+            if run_start > self.position:
+                cut = run_start
+            else:
+                # Only backslashes since the start of the chunk: they are \\ escapes
+                cut = self.position + (backslash - self.position) // 2 * 2
+        while cut > self.position and self.buffer[cut] & 0xC0 == 0x80:
+            cut -= 1
+        return cut
+
+
+@dataclass
+class SpooledDescriptor:
+    """
+    The descriptor of a large body, left in the spooled body at `[start, end)` as a JSON string.
+    """
+
+    buffer: mmap.mmap
+    start: int
+    end: int
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+    def reader(self, max_bytes: int | None = None) -> JsonStringReader:
+        return JsonStringReader(self.buffer, self.start, self.end, max_bytes)
+
+
+def get_spooled_descriptor() -> SpooledDescriptor | None:
+    """
+    Returns the descriptor spooled by `LargeBodyMiddleware` for the current request, if any.
+    """  # noqa: E501
+
+    context = get_request_context()
+    return context.spooled_descriptor if context is not None else None
+
+
+def _skip_whitespace(buffer: bytes | mmap.mmap, i: int) -> int:
+    while i < len(buffer) and buffer[i] in _WHITESPACE:
+        i += 1
+    return i
+
+
+def _string_end(buffer: bytes | mmap.mmap, i: int) -> int:
+    """
+    Returns the index of the quote closing the JSON string opened at `i`.
+    """
+
+    j = i + 1
+    while True:
+        j = buffer.find(b'"', j)
+        if j == -1:
+            raise ValueError("Unterminated string")
+        backslashes = 0
+        while buffer[j - 1 - backslashes] == _BACKSLASH:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return j
+        j += 1
+
+
+def _value_end(buffer: bytes | mmap.mmap, i: int) -> int:
+    """
+    Returns the index following the JSON value starting at `i`.
+    """
+
+    if buffer[i] == ord('"'):
+        return _string_end(buffer, i) + 1
+    if buffer[i] not in b"[{":
+        scalar = _SCALAR.match(buffer, i)  # type: ignore[call-overload]
+        return scalar.end() if scalar is not None else i
+    depth = 0
+    j = i
+    while True:
+        match = _STRUCTURE.search(buffer, j)  # type: ignore[call-overload]
+        if match is None:
+            raise ValueError("Unterminated collection")
+        j = match.start()
+        if buffer[j] == ord('"'):
+            j = _string_end(buffer, j) + 1
+            continue
+        depth += 1 if buffer[j] in b"[{" else -1
+        j += 1
+        if depth == 0:
+            return j
+
+
+def find_json_string(buffer: bytes | mmap.mmap, path: tuple[str, ...], i: int = 0) -> tuple[int, int] | None:
+    """
+    Finds a string in a JSON document by the keys of the objects enclosing it, without parsing the document.
+
+    Returns:
+        tuple[int, int] | None: The indexes of the opening and the closing quote of the string,
+            or None if the document has no string at that path.
+
+    Raises:
+        ValueError: If the document is not valid JSON.
+    """  # noqa: E501
+
+    i = _skip_whitespace(buffer, i)
+    if i >= len(buffer) or buffer[i] != ord("{"):
+        return None
+    i = _skip_whitespace(buffer, i + 1)
+    while i < len(buffer) and buffer[i] != ord("}"):
+        if buffer[i] != ord('"'):
+            raise ValueError(f"Expecting a key at {i}")
+        key_end = _string_end(buffer, i)
+        key = json.loads(buffer[i : key_end + 1])
+        i = _skip_whitespace(buffer, key_end + 1)
+        if i >= len(buffer) or buffer[i] != ord(":"):
+            raise ValueError(f"Expecting ':' at {i}")
+        i = _skip_whitespace(buffer, i + 1)
+        if i >= len(buffer):
+            raise ValueError("Unexpected end of document")
+        if key == path[0]:
+            if len(path) == 1:
+                return (i, _string_end(buffer, i)) if buffer[i] == ord('"') else None
+            return find_json_string(buffer, path[1:], i)
+        i = _skip_whitespace(buffer, _value_end(buffer, i))
+        if i < len(buffer) and buffer[i] == ord(","):
+            i = _skip_whitespace(buffer, i + 1)
+    return None
+
+
+class LargeBodyMiddleware:
+    """
+    Keeps the large request bodies out of memory.
+
+    The bodies larger than `threshold_bytes` of the routes parsing a descriptor are spooled
+    to a temporary file, which is memory mapped. The descriptor is found in the mapped JSON
+    without parsing it, and the application receives the body with an empty descriptor in
+    its place: the descriptor is parsed straight from the map by `JsonStringReader`, so
+    it is never held in memory as a whole, neither as bytes nor as a string.
+
+    The bodies whose descriptor can not be found (e.g. malformed JSON) are passed to the
+    application unchanged, reading them back from the file.
+
+    The middleware is only added to the application when the large body mode is enabled.
+    """  # noqa: E501
+
+    def __init__(self, app: ASGIApp, settings: LargeBodySettings) -> None:
+        self.app = app
+        self.settings = settings
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = ROUTE_DESCRIPTOR_PATHS.get(scope.get("path", "")) if scope["type"] == "http" else None
+        content_length = Headers(scope=scope).get("content-length") if path is not None else None
+        declared = int(content_length) if content_length is not None and content_length.isdigit() else None
+        if path is None or (declared is not None and declared <= self.settings.threshold_bytes):
+            await self.app(scope, receive, send)
+            return
+
+        directory = str(self.settings.directory) if self.settings.directory is not None else None
+        with tempfile.SpooledTemporaryFile(max_size=self.settings.threshold_bytes, dir=directory) as spool:
+            disconnected = await self._spool(receive, spool)
+            if disconnected:
+                return
+            size = spool.tell()
+            if size <= self.settings.threshold_bytes:
+                spool.seek(0)
+                await self.app(scope, _replay_receive([spool.read()], receive), send)
+                return
+
+            spool.rollover()  # type: ignore[attr-defined]
+            spool.flush()
+            with mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                try:
+                    span = find_json_string(buffer, path)
+                except ValueError:
+                    span = None
+                if span is None:
+                    await self.app(scope, _replay_receive(_chunks(buffer), receive), send)
+                    return
+
+                start, end = span
+                body = buffer[:start] + b'""' + buffer[end + 1 :]
+                headers = [(k, v) for k, v in scope["headers"] if k.lower() != b"content-length"]
+                headers.append((b"content-length", str(len(body)).encode()))
+                with request_context(scope) as context:
+                    context.spooled_descriptor = SpooledDescriptor(buffer, start + 1, end)
+                    try:
+                        await self.app(dict(scope, headers=headers), _replay_receive([body], receive), send)
+                    finally:
+                        context.spooled_descriptor = None
+
+    @staticmethod
+    async def _spool(receive: Receive, spool: IO[bytes]) -> bool:
+        # Writes go to the page cache, they do not block the event loop for long
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return True
+            spool.write(message.get("body", b""))
+            if not message.get("more_body", False):
+                return False
+
+
+def _chunks(buffer: mmap.mmap) -> Iterator[bytes]:
+    for i in range(0, len(buffer), READ_SIZE):
+        yield buffer[i : i + READ_SIZE]
+
+
+def _replay_receive(chunks: Iterable[bytes], receive: Receive) -> Receive:
+    """
+    Returns the body as a sequence of `http.request` messages, then waits on the original `receive`.
+    """  # noqa: E501
+
+    iterator = iter(chunks)
+    pending: bytes | None = next(iterator, b"")
+    done = False
+
+    async def replay() -> Message:
+        nonlocal pending, done
+        if done:
+            return await receive()
+        body = pending or b""
+        pending = next(iterator, None)
+        done = pending is None
+        return {"type": "http.request", "body": body, "more_body": not done}
+
+    return replay
@@ -1,51 +1,179 @@
 from __future__ import annotations
 
+import time
 import uuid
+from functools import partial
 
+import httpx
 from fastapi import Request
 from loguru import logger
 from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import Response
 
+from src.admin import router as admin_router
 from src.app_config import app
+from src.bulk_validation import (
+    BULK_VALIDATE_PATH,
+    NDJSON_MEDIA_TYPES,
+    JsonArraySplitter,
+    NdjsonResponse,
+    NdjsonSplitter,
+    validate_bulk,
+)
 from src.check_return_type import check_response
+from src.coalescing import Coalescer
+from src.deadlines import DeadlineExceeded, DeadlineMiddleware, check_deadline, deadline_exceeded_handler
 from src.dependencies import (
+    UnpackedComponentProvisioningRequestDep,
     UnpackedProvisioningRequestDep,
     UnpackedUnprovisioningRequestDep,
     UnpackedUpdateAclRequestDep,
+    parse_provisioning_request,
 )
+from src.health import router as health_router
+from src.http_client import HttpClientDep
+from src.identity_resolution import identity_resolver
+from src.jobs import job_journal, job_registry
+from src.large_body import LargeBodyMiddleware
+from src.memory import MemoryTrackingMiddleware
 from src.models.api_models import (
+    BulkValidationResult,
+    ProvisioningRequest,
     ProvisioningStatus,
+    Status1,
     SystemErr,
     ValidationError,
     ValidationRequest,
     ValidationResult,
     ValidationStatus,
 )
+from src.models.data_product_descriptor import DataProduct
+from src.profiling import ProfilingMiddleware
+from src.provisioning_store import provisioning_store
+from src.recycling import RecyclingMiddleware, worker_recycler
+from src.request_context import RequestContextMiddleware, get_request_context
+from src.request_limits import RequestSizeLimitMiddleware
+from src.scheduling import provisioning_scheduler
+from src.settings import (
+    acl_settings,
+    bulk_validation_settings,
+    capture_settings,
+    deadline_settings,
+    descriptor_limits_settings,
+    idempotency_settings,
+    large_body_settings,
+    memory_settings,
+    profiling_settings,
+)
+from src.telemetry import is_excluded_url, meter, start_span, suppress_tracing
+from src.traffic_capture import CapturedExchange, traffic_capture
+from src.utility.acl_delta import compute_acl_delta
+from src.utility.fingerprint import provisioning_fingerprint
 
+acl_coalescer: Coalescer[ProvisioningStatus | str | SystemErr] = Coalescer(
+    "updateacl", acl_settings.coalescing_window_seconds
+)
 
-def log_info(req_body, res_code, res_body):
-    id = str(uuid.uuid4())
+# Routes whose bodies and responses are streamed, of any size
+STREAMED_PATHS = frozenset({BULK_VALIDATE_PATH})
+
+_unchanged_provisions = meter.create_counter(
+    "tech_adapter.provision.unchanged",
+    description="Provisioning requests answered with the stored status of an identical component",
+)
+
+
+def log_info(req_body, res_code, res_body, id=None):
+    id = id or str(uuid.uuid4())
     logger.info("[{}] REQUEST: {}", id, req_body.decode("utf-8"))
     logger.info("[{}] RESPONSE({}): {}", id, res_code, res_body.decode("utf-8"))
 
 
+def capture_and_log_info(exchange: CapturedExchange, req_body, res_body):
+    log_info(req_body, exchange.status, res_body, exchange.id)
+    traffic_capture.record(exchange)
+
+
 @app.middleware("http")
 async def log_request_response_middleware(request: Request, call_next):
-    req_body = await request.body()
-    response = await call_next(request)
-    chunks = []
-    async for chunk in response.body_iterator:
-        chunks.append(chunk)
-    res_body = b"".join(chunks)
-    task = BackgroundTask(log_info, req_body, response.status_code, res_body)
-    return Response(
-        content=res_body,
-        status_code=response.status_code,
-        headers=dict(response.headers),
-        media_type=response.media_type,
-        background=task,
-    )
+    if request.url.path in STREAMED_PATHS:
+        # Buffering them would defeat the streaming; their results are logged by their endpoint
+        return await call_next(request)
+    if is_excluded_url(request.url.path):
+        with suppress_tracing():
+            return await _log_request_response(request, call_next)
+    return await _log_request_response(request, call_next)
+
+
+async def _log_request_response(request: Request, call_next) -> Response:
+    started = time.time()
+    with start_span("middleware.log_request_response") as span:
+        req_body = await request.body()
+        response = await call_next(request)
+        chunks = []
+        async for chunk in response.body_iterator:
+            chunks.append(chunk)
+        res_body = b"".join(chunks)
+        if span.is_recording():
+            span.set_attributes(
+                {
+                    "url.path": request.url.path,
+                    "http.request.body.size": len(req_body),
+                    "http.response.body.size": len(res_body),
+                    "http.response.status_code": response.status_code,
+                }
+            )
+        captured = capture_settings.enabled and traffic_capture.is_captured(request.url.path)
+        context = get_request_context()
+        if captured and context is not None and context.spooled_descriptor is not None:
+            # The body received has an empty descriptor in place of the spooled one, which is not held in memory
+            traffic_capture.skip("spooled")
+            captured = False
+        if captured:
+            deadline_header = request.headers.get(deadline_settings.header)
+            exchange = CapturedExchange(
+                id=str(uuid.uuid4()),
+                timestamp=started,
+                duration=time.time() - started,
+                method=request.method,
+                path=request.url.path,
+                query=request.url.query,
+                content_type=request.headers.get("content-type"),
+                request=req_body.decode("utf-8", errors="replace"),
+                status=response.status_code,
+                response=res_body.decode("utf-8", errors="replace"),
+                headers={deadline_settings.header: deadline_header} if deadline_header is not None else {},
+            )
+            task = BackgroundTask(capture_and_log_info, exchange, req_body, res_body)
+        else:
+            task = BackgroundTask(log_info, req_body, response.status_code, res_body)
+        return Response(
+            content=res_body,
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            media_type=response.media_type,
+            background=task,
+        )
+
+
+# Middlewares added last wrap the ones added before
+if memory_settings.tracking_enabled:
+    app.add_middleware(MemoryTrackingMiddleware, settings=memory_settings)
+if profiling_settings.enabled:
+    app.add_middleware(ProfilingMiddleware, settings=profiling_settings)
+if large_body_settings.enabled:
+    app.add_middleware(LargeBodyMiddleware, settings=large_body_settings)
+if worker_recycler.configured:
+    app.add_middleware(RecyclingMiddleware, recycler=worker_recycler)
+app.add_middleware(DeadlineMiddleware, settings=deadline_settings)
+app.add_middleware(RequestContextMiddleware)
+app.add_middleware(RequestSizeLimitMiddleware, settings=descriptor_limits_settings, streamed_paths=STREAMED_PATHS)
+
+app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+
+app.include_router(admin_router)
+app.include_router(health_router)
 
 
 @app.post(
@@ -59,9 +187,13 @@ async def log_request_response_middleware(request: Request, call_next):
     },
     tags=["TechAdapter"],
 )
-def provision(request: UnpackedProvisioningRequestDep) -> Response:
+async def provision(
+    request: UnpackedComponentProvisioningRequestDep, http_client: HttpClientDep, force: bool = False
+) -> Response:
     """
-    Deploy a data product or a single component starting from a provisioning descriptor
+    Deploy a data product or a single component starting from a provisioning descriptor.
+    Unless `force` is set, a component identical to the last one successfully provisioned
+    gets the stored status back, when the idempotent provisioning is enabled
     """
 
     if isinstance(request, ValidationError):
@@ -69,16 +201,64 @@ def provision(request: UnpackedProvisioningRequestDep) -> Response:
 
     data_product, component_id = request
 
+    fingerprint = provisioning_fingerprint(data_product, component_id) if idempotency_settings.enabled else None
+    if fingerprint is not None and not force:
+        stored_status = await run_in_threadpool(provisioning_store.get_status, component_id, fingerprint)
+        if stored_status is not None:
+            logger.info("Component with id {} is unchanged since its last provisioning", component_id)
+            _unchanged_provisions.add(1)
+            return check_response(out_response=stored_status)
+
+    resp = await provisioning_scheduler.run(
+        data_product.domain,
+        data_product.id,
+        job_registry.tracked(
+            "provision",
+            component_id,
+            partial(provision_component, data_product, component_id, fingerprint, http_client),
+            _job_state,
+        ),
+        failed=_failed,
+    )
+
+    return check_response(out_response=resp)
+
+
+def _failed(resp: ProvisioningStatus | str | SystemErr) -> bool:
+    # Errors of the service or of the target technology lower the adaptive concurrency limit
+    return isinstance(resp, SystemErr)
+
+
+def _job_state(resp: ProvisioningStatus | str | SystemErr) -> Status1:
+    # The state journaled for a job; a token means the target technology is still running the operation
+    if isinstance(resp, ProvisioningStatus):
+        return resp.status
+    return Status1.FAILED if isinstance(resp, SystemErr) else Status1.RUNNING
+
+
+def provision_component(
+    data_product: DataProduct, component_id: str, fingerprint: str | None, http_client: httpx.AsyncClient
+) -> ProvisioningStatus | str | SystemErr:
+    """
+    Provisions a component, in a worker thread
+    """
+
+    check_deadline("provision")
     logger.info("Provisioning component with id: " + component_id)
 
     # todo: define correct response. You can define your pydantic component type with the expected specific schema
-    #  and use `.get_type_component_by_id` to extract it from the data product
+    #  and use `.get_type_component_by_id` to extract it from the data product.
+    #  Call the target technology with the shared `http_client`, see docs/http_client.md,
+    #  bounding the timeouts with `remaining_seconds()` and calling `check_deadline` between long stages
 
     # componentToProvision = data_product.get_typed_component_by_id(component_id, MyTypedComponent)
 
     resp = SystemErr(error="Response not yet implemented")
 
-    return check_response(out_response=resp)
+    if fingerprint is not None and isinstance(resp, ProvisioningStatus) and resp.status == Status1.COMPLETED:
+        provisioning_store.put_status(component_id, fingerprint, resp)
+
+    return resp
 
 
 @app.get(
@@ -96,6 +276,11 @@ def get_status(token: str) -> Response:
     Get the status for a provisioning request
     """
 
+    # With the job journal enabled, the id of a job (see `current_job`) is a valid token, even after a restart
+    entry = job_journal.status(token) if job_journal.enabled else None
+    if entry is not None:
+        return check_response(out_response=ProvisioningStatus(status=entry.state, result=entry.error or ""))
+
     # todo: define correct response
     resp = SystemErr(error="Response not yet implemented")
 
@@ -113,7 +298,7 @@ def get_status(token: str) -> Response:
     },
     tags=["TechAdapter"],
 )
-def unprovision(request: UnpackedUnprovisioningRequestDep) -> Response:
+async def unprovision(request: UnpackedUnprovisioningRequestDep, http_client: HttpClientDep) -> Response:
     """
     Undeploy a data product or a single component
     given the provisioning descriptor relative to the latest complete provisioning request
@@ -124,16 +309,46 @@ def unprovision(request: UnpackedUnprovisioningRequestDep) -> Response:
 
     data_product, component_id, remove_data = request
 
+    resp = await provisioning_scheduler.run(
+        data_product.domain,
+        data_product.id,
+        job_registry.tracked(
+            "unprovision",
+            component_id,
+            partial(unprovision_component, data_product, component_id, remove_data, http_client),
+            _job_state,
+        ),
+        failed=_failed,
+    )
+
+    return check_response(out_response=resp)
+
+
+def unprovision_component(
+    data_product: DataProduct, component_id: str, remove_data: bool, http_client: httpx.AsyncClient
+) -> ProvisioningStatus | str | SystemErr:
+    """
+    Unprovisions a component, in a worker thread
+    """
+
+    check_deadline("unprovision")
     logger.info("Unprovisioning component with id: " + component_id)
 
+    if idempotency_settings.enabled:
+        provisioning_store.delete_status(component_id)
+    if acl_settings.delta_enabled:
+        provisioning_store.delete_identities(component_id)
+
     # todo: define correct response. You can define your pydantic component type with the expected specific schema
-    #  and use `.get_type_component_by_id` to extract it from the data product
+    #  and use `.get_type_component_by_id` to extract it from the data product.
+    #  Call the target technology with the shared `http_client`, see docs/http_client.md,
+    #  bounding the timeouts with `remaining_seconds()` and calling `check_deadline` between long stages
 
     # componentToUnprovision = data_product.get_typed_component_by_id(component_id, MyTypedComponent)
 
     resp = SystemErr(error="Response not yet implemented")
 
-    return check_response(out_response=resp)
+    return resp
 
 
 @app.post(
@@ -147,7 +362,7 @@ def unprovision(request: UnpackedUnprovisioningRequestDep) -> Response:
     },
     tags=["TechAdapter"],
 )
-def updateacl(request: UnpackedUpdateAclRequestDep) -> Response:
+async def updateacl(request: UnpackedUpdateAclRequestDep, http_client: HttpClientDep) -> Response:
     """
     Request the access to a tech adapter component
     """
@@ -157,14 +372,64 @@ def updateacl(request: UnpackedUpdateAclRequestDep) -> Response:
 
     data_product, component_id, witboost_users = request
 
+    apply = job_registry.tracked(
+        "updateacl",
+        component_id,
+        partial(apply_acl, data_product, component_id, witboost_users, http_client),
+        _job_state,
+    )
+    if acl_coalescer.window_seconds > 0:
+        # The requests for the same component within the window share the outcome of the last one
+        resp = await acl_coalescer.submit(component_id, apply)
+    else:
+        resp = await run_in_threadpool(apply)
+
+    return check_response(out_response=resp)
+
+
+def apply_acl(
+    data_product: DataProduct, component_id: str, witboost_users: list[str], http_client: httpx.AsyncClient
+) -> ProvisioningStatus | str | SystemErr:
+    """
+    Applies the ACL of a component, in a worker thread
+    """
+
+    check_deadline("updateacl")
+
+    # With the delta enabled, only the identities added and removed since the last applied ACL
+    # are granted and revoked; otherwise every identity is granted and none is revoked
+    previous = provisioning_store.get_identities(component_id) if acl_settings.delta_enabled else None
+    delta = compute_acl_delta(previous, witboost_users)
+    logger.info(
+        "Updating the ACL of component with id {}: {} identities to grant, {} to revoke",
+        component_id,
+        len(delta.added),
+        len(delta.removed),
+    )
+
+    check_deadline("resolve_identities")
+    # Users and groups resolved to the principals of the target technology, None for unknown ones
+    principals = identity_resolver.resolve(delta.added | delta.removed)
+    unknown = sorted(ref for ref, found in principals.items() if found is None)
+    if unknown:
+        logger.warning("Identities not found in the directory: {}", unknown)
+
     # todo: define correct response. You can define your pydantic component type with the expected specific schema
-    #  and use `.get_type_component_by_id` to extract it from the data product
+    #  and use `.get_type_component_by_id` to extract it from the data product, then apply the delta
+    #  in batches of at most `acl_settings.batch_size` identities, using their `principals`.
+    #  Call the target technology with the shared `http_client`, see docs/http_client.md,
+    #  bounding the timeouts with `remaining_seconds()` and calling `check_deadline` between long stages
 
     # componentToProvision = data_product.get_typed_component_by_id(component_id, MyTypedComponent)
+    # for identities in delta.grant_batches(acl_settings.batch_size): ...
+    # for identities in delta.revoke_batches(acl_settings.batch_size): ...
 
     resp = SystemErr(error="Response not yet implemented")
 
-    return check_response(out_response=resp)
+    if acl_settings.delta_enabled and isinstance(resp, ProvisioningStatus) and resp.status == Status1.COMPLETED:
+        provisioning_store.put_identities(component_id, delta.current)
+
+    return resp
 
 
 @app.post(
@@ -173,7 +438,7 @@ def updateacl(request: UnpackedUpdateAclRequestDep) -> Response:
     responses={"200": {"model": ValidationResult}, "500": {"model": SystemErr}},
     tags=["TechAdapter"],
 )
-def validate(request: UnpackedProvisioningRequestDep) -> Response:
+def validate(request: UnpackedProvisioningRequestDep, http_client: HttpClientDep) -> Response:
     """
     Validate a provisioning request
     """
@@ -183,14 +448,67 @@ def validate(request: UnpackedProvisioningRequestDep) -> Response:
 
     data_product, component_id = request
 
+    return check_response(out_response=validate_component(data_product, component_id))
+
+
+def validate_component(data_product: DataProduct, component_id: str) -> ValidationResult | SystemErr:
+    """
+    Validates a component of a data product, for both `/v1/validate` and `/v1/validate/bulk`.
+    """
+
+    check_deadline("validate")
+
     # todo: define correct response. You can define your pydantic component type with the expected specific schema
-    #  and use `.get_type_component_by_id` to extract it from the data product
+    #  and use `.get_type_component_by_id` to extract it from the data product.
+    #  Call the target technology with the shared HTTP client, see docs/http_client.md,
+    #  bounding the timeouts with `remaining_seconds()` and calling `check_deadline` between long stages
 
     # componentToProvision = data_product.get_typed_component_by_id(component_id, MyTypedComponent)
 
-    resp = SystemErr(error="Response not yet implemented")
+    return SystemErr(error="Response not yet implemented")
 
-    return check_response(out_response=resp)
+
+def validate_provisioning_request(provisioning_request: ProvisioningRequest) -> ValidationResult | SystemErr:
+    unpacked = parse_provisioning_request(provisioning_request)
+    if isinstance(unpacked, ValidationError):
+        return ValidationResult(valid=False, error=unpacked)
+    data_product, component_id = unpacked
+    return validate_component(data_product, component_id)
+
+
+@app.post(
+    BULK_VALIDATE_PATH,
+    response_model=None,
+    response_class=NdjsonResponse,
+    responses={
+        "200": {
+            "model": BulkValidationResult,
+            "description": "One result per line as NDJSON, in the order the validations complete",
+        }
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/ProvisioningRequest"}}
+                },
+                "application/x-ndjson": {"schema": {"$ref": "#/components/schemas/ProvisioningRequest"}},
+            },
+        }
+    },
+    tags=["TechAdapter"],
+)
+async def bulk_validate(request: Request) -> Response:
+    """
+    Validate many provisioning requests, sent as a JSON array or as NDJSON, streaming one result per line as NDJSON
+    """  # noqa: E501
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    splitter_class = NdjsonSplitter if content_type in NDJSON_MEDIA_TYPES else JsonArraySplitter
+    splitter = splitter_class(bulk_validation_settings.max_item_bytes)
+    results = validate_bulk(request.stream(), splitter, validate_provisioning_request, bulk_validation_settings)
+    return NdjsonResponse(results)
 
 
 @app.post(
@@ -205,13 +523,16 @@ def validate(request: UnpackedProvisioningRequestDep) -> Response:
 )
 def async_validate(
     body: ValidationRequest,
+    http_client: HttpClientDep,
 ) -> Response:
     """
     Validate a deployment request
     """
 
     # todo: define correct response. You can define your pydantic component type with the expected specific schema
-    #  and use `.get_type_component_by_id` to extract it from the data product
+    #  and use `.get_type_component_by_id` to extract it from the data product.
+    #  Call the target technology with the shared `http_client`, see docs/http_client.md,
+    #  bounding the timeouts with `remaining_seconds()` and calling `check_deadline` between long stages
 
     # componentToProvision = data_product.get_typed_component_by_id(component_id, MyTypedComponent)
 
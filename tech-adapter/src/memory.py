@@ -0,0 +1,170 @@
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from threading import Lock
+from typing import Iterator
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.models.api_models import MemoryAllocationDiff, MemorySnapshotDiff
+from src.request_context import get_request_context, request_context
+from src.settings import MemorySettings
+from src.telemetry import meter
+
+REQUEST_STAGE = "request"
+
+_peak_memory = meter.create_histogram(
+    "tech_adapter.request.memory.peak",
+    unit="By",
+    description="Peak memory traced by tracemalloc during a request, or during one of its stages",
+)
+
+
+def current_rss() -> int:
+    """
+    Returns the resident set size of the process in bytes.
+
+    Read from /proc on Linux; elsewhere, the peak resident set size is the closest figure available.
+    """  # noqa: E501
+
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Reported in bytes on macOS, in kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def start_tracking(settings: MemorySettings) -> None:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(settings.traceback_frames)
+
+
+def _record_peak(stage: str, peak: int, path: str) -> None:
+    _peak_memory.record(peak, {"stage": stage, "url.path": path})
+
+
+@contextmanager
+def memory_stage(stage: str) -> Iterator[None]:
+    """
+    Records the peak memory allocated by a stage of the request (e.g. parse, validate or serialize).
+
+    The peak is measured with tracemalloc relative to the memory traced when the stage starts,
+    and stored in the request context as well as in the `tech_adapter.request.memory.peak` histogram.
+    tracemalloc has a single process-wide peak, so the figures are exact only when
+    stages of concurrent requests do not overlap. This is a no-op unless memory tracking is enabled.
+    """  # noqa: E501
+
+    if not tracemalloc.is_tracing():
+        yield
+        return
+
+    start, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        stage_peak = max(peak - start, 0)
+        context = get_request_context()
+        if context is None:
+            _record_peak(stage, stage_peak, "")
+        else:
+            context.memory_peaks[stage] = max(context.memory_peaks.get(stage, 0), stage_peak)
+            if context.memory_baseline is not None:
+                # Resetting the peak hides it from the enclosing request, which is updated here
+                request_peak = max(peak - context.memory_baseline, 0)
+                context.memory_peaks[REQUEST_STAGE] = max(context.memory_peaks.get(REQUEST_STAGE, 0), request_peak)
+            _record_peak(stage, stage_peak, context.path)
+
+
+class MemoryTrackingMiddleware:
+    """
+    Records the peak memory traced during each request. The breakdown by stage is
+    recorded by `memory_stage` along the pipeline.
+
+    The middleware is only added to the application when memory tracking is enabled.
+    """  # noqa: E501
+
+    def __init__(self, app: ASGIApp, settings: MemorySettings) -> None:
+        self.app = app
+        start_tracking(settings)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracemalloc.is_tracing():
+            await self.app(scope, receive, send)
+            return
+
+        with request_context(scope) as context:
+            start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            context.memory_baseline = start
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _, peak = tracemalloc.get_traced_memory()
+                request_peak = max(context.memory_peaks.get(REQUEST_STAGE, 0), peak - start)
+                context.memory_peaks[REQUEST_STAGE] = request_peak
+                _record_peak(REQUEST_STAGE, request_peak, context.path)
+
+
+class SnapshotStore:
+    """
+    Keeps the last tracemalloc snapshot, so that the next one can be compared with it.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._taken_at: float | None = None
+
+    def take_and_compare(self, top_stats: int) -> MemorySnapshotDiff:
+        """
+        Takes a snapshot and compares it with the previous one, which is replaced.
+        The first call has nothing to compare with and returns an empty diff.
+
+        Args:
+            top_stats (int): The number of source lines with the biggest growth to return.
+
+        Returns:
+            MemorySnapshotDiff: The difference between the two snapshots, grouped by source line.
+        """  # noqa: E501
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+        taken_at = time.time()
+        with self._lock:
+            previous, previous_taken_at = self._snapshot, self._taken_at
+            self._snapshot, self._taken_at = snapshot, taken_at
+
+        if previous is None:
+            return MemorySnapshotDiff(takenAt=taken_at, previousTakenAt=None, sizeDiff=0, allocations=[])
+
+        stats = snapshot.compare_to(previous, "lineno")
+        return MemorySnapshotDiff(
+            takenAt=taken_at,
+            previousTakenAt=previous_taken_at,
+            sizeDiff=sum(stat.size_diff for stat in stats),
+            allocations=[
+                MemoryAllocationDiff(
+                    location=str(stat.traceback),
+                    size=stat.size,
+                    sizeDiff=stat.size_diff,
+                    count=stat.count,
+                    countDiff=stat.count_diff,
+                )
+                for stat in stats[:top_stats]
+            ],
+        )
+
+
+snapshot_store = SnapshotStore()
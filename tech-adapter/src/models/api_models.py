@@ -160,6 +160,31 @@ class ValidationResult(BaseModel):
     error: Optional[ValidationError] = None
 
 
+class BulkValidationResult(ValidationResult):
+    index: int = Field(..., description="Position of the provisioning request in the body, from 0")
+    systemError: Optional[SystemErr] = Field(
+        default=None, description="Set when the provisioning request could not be validated, e.g. after a failure"
+    )
+
+
 class ValidationStatus(BaseModel):
     status: Status
     result: Optional[ValidationResult] = None
+
+
+class MemoryAllocationDiff(BaseModel):
+    location: str = Field(..., description="Source line of the allocations")
+    size: int = Field(..., description="Bytes allocated by the source line in the newer snapshot")
+    sizeDiff: int = Field(..., description="Difference of the allocated bytes between the two snapshots")
+    count: int = Field(..., description="Number of memory blocks allocated by the source line in the newer snapshot")
+    countDiff: int = Field(..., description="Difference of the number of memory blocks between the two snapshots")
+
+
+class MemorySnapshotDiff(BaseModel):
+    takenAt: float = Field(..., description="Unix time of the snapshot")
+    previousTakenAt: Optional[float] = Field(
+        default=None,
+        description="Unix time of the previous snapshot; null if this is the first one",
+    )
+    sizeDiff: int = Field(..., description="Difference of the traced bytes between the two snapshots")
+    allocations: List[MemoryAllocationDiff] = Field(..., description="Source lines with the biggest growth")
@@ -43,3 +43,6 @@ OPENMETADATA_SUPPORTED_DATATYPES = [
     "POLYGON",
     "BYTEA",
 ]
+
+# OPENMETADATA_SUPPORTED_DATATYPES as a frozenset, for constant time membership checks
+OPENMETADATA_SUPPORTED_DATATYPES_SET = frozenset(OPENMETADATA_SUPPORTED_DATATYPES)
@@ -1,3 +1,4 @@
+from contextvars import ContextVar
 from datetime import datetime
 from enum import StrEnum
 from typing import Annotated, List, Literal, Optional, Type
@@ -9,10 +10,23 @@ from pydantic import (
     BeforeValidator,
     ConfigDict,
     Field,
+    ModelWrapValidatorHandler,
+    PrivateAttr,
+    ValidationError,
+    ValidationInfo,
     field_validator,
+    model_validator,
 )
+from pydantic_core import ErrorDetails, InitErrorDetails, PydanticCustomError, PydanticKnownError
 
-from src.models.constants import OPENMETADATA_SUPPORTED_DATATYPES
+from src.models.constants import OPENMETADATA_SUPPORTED_DATATYPES_SET
+from src.telemetry import start_span
+
+# Invalid columns listed in the message of a DataContract validation error
+MAX_REPORTED_COLUMNS = 20
+
+# Set while a DataContract validates its columns, whose data types it checks all at once
+_validating_data_contract: ContextVar[bool] = ContextVar("validating_data_contract", default=False)
 
 
 class ComponentKind(StrEnum):
@@ -50,6 +64,7 @@ class StateTagLabel(CaseInsensitiveEnum):
 
 
 class OpenMetadataTagLabel(BaseModel):
+    model_config = ConfigDict(extra="allow")
     tagFQN: str
     description: Optional[str] = None
     source: TagSourceTagLabel = TagSourceTagLabel.CLASSIFICATION
@@ -64,6 +79,7 @@ class ConnectionTypeWorkload(CaseInsensitiveEnum):
 
 
 class OpenMetadataColumn(BaseModel):
+    model_config = ConfigDict(extra="allow")
     name: str
     dataType: str
     dataLength: Optional[int] = None
@@ -74,23 +90,111 @@ class OpenMetadataColumn(BaseModel):
 
     @field_validator("dataType")
     @classmethod
-    def check_dataType(cls, value, values):
-        if value.upper() not in OPENMETADATA_SUPPORTED_DATATYPES:
+    def check_dataType(cls, value: str, values: dict | ValidationInfo):
+        """
+        Checks the dataType of a single column. The columns of a `DataContract` are not checked
+        one by one: the contract checks all of them at once and reports every invalid column.
+        """  # noqa: E501
+        if _validating_data_contract.get():
+            return value
+        if value.upper() not in OPENMETADATA_SUPPORTED_DATATYPES_SET:
+            data = values if isinstance(values, dict) else values.data
             raise ValueError(
-                'Column "'
-                + values["name"]
-                + '" specifies dataType of "'
-                + value
-                + '" but this is not a valid OpenMetadata data type'
+                f'Column "{data.get("name")}" specifies dataType of "{value}" but this is not a valid OpenMetadata data type'  # noqa: E501
             )
         return value
 
 
+def _column_field(column: object, field: str) -> object:
+    value = column.get(field) if isinstance(column, dict) else getattr(column, field, None)
+    try:
+        hash(value)
+    except TypeError:
+        return None
+    return value
+
+
+def _invalid_data_types(schema: list) -> PydanticCustomError | None:
+    """
+    Checks the dataType of all the columns in a single pass, and returns one error listing all the invalid ones.
+
+    The distinct data types are collected in a set and checked against the supported ones,
+    so the columns are only scanned one by one to report the invalid ones.
+    """  # noqa: E501
+    supported = OPENMETADATA_SUPPORTED_DATATYPES_SET
+    try:
+        data_types = {column.get("dataType") for column in schema}
+    except (AttributeError, TypeError):
+        # Columns created in code, or malformed ones
+        data_types = {_column_field(column, "dataType") for column in schema}
+    unknown = {
+        data_type
+        for data_type in data_types - supported
+        if isinstance(data_type, str) and data_type.upper() not in supported
+    }
+    if not unknown:
+        # Missing or non string data types are reported by the validation of the columns
+        return None
+
+    invalid = [
+        {"name": _column_field(column, "name"), "dataType": _column_field(column, "dataType")}
+        for column in schema
+        if _column_field(column, "dataType") in unknown
+    ]
+    shown = ", ".join(f'"{column["name"]}" ({column["dataType"]})' for column in invalid[:MAX_REPORTED_COLUMNS])
+    if len(invalid) > MAX_REPORTED_COLUMNS:
+        shown += f" and {len(invalid) - MAX_REPORTED_COLUMNS} more"
+    return PydanticCustomError(
+        "invalid_data_type",
+        "{count} column(s) specify a dataType that is not a valid OpenMetadata data type: {columns}",
+        {"count": len(invalid), "columns": shown, "invalid_columns": invalid},
+    )
+
+
+def _line_error(error: ErrorDetails) -> InitErrorDetails:
+    # Errors of the pydantic types are raised again as they are, the other ones with their message
+    ctx = error.get("ctx", {})
+    try:
+        PydanticKnownError(error["type"], ctx)  # type: ignore[arg-type]
+        error_type: str | PydanticCustomError = error["type"]
+    except KeyError:
+        error_type = PydanticCustomError(error["type"], "{message}", {"message": error["msg"]})
+        ctx = {}
+    return InitErrorDetails(type=error_type, loc=error["loc"], input=error["input"], ctx=ctx)
+
+
 class DataContract(BaseModel):
+    model_config = ConfigDict(extra="allow")
     schema_: Optional[List[OpenMetadataColumn]] = Field(..., alias="schema")
 
+    @model_validator(mode="wrap")
+    @classmethod
+    def check_dataTypes(cls, data, handler: ModelWrapValidatorHandler["DataContract"]) -> "DataContract":
+        """
+        Checks the dataType of all the columns at once, reporting all the invalid ones in a single error
+        together with the other errors of the data contract.
+        """  # noqa: E501
+        schema = data.get("schema") if isinstance(data, dict) else None
+        data_type_error = _invalid_data_types(schema) if isinstance(schema, list) and schema else None
+        token = _validating_data_contract.set(True)
+        try:
+            data_contract = handler(data)
+        except ValidationError as ex:
+            if data_type_error is None:
+                raise
+            errors = [_line_error(error) for error in ex.errors()]
+        else:
+            if data_type_error is None:
+                return data_contract
+            errors = []
+        finally:
+            _validating_data_contract.reset(token)
+        errors.insert(0, InitErrorDetails(type=data_type_error, loc=("schema",), input=schema))
+        raise ValidationError.from_exception_data(cls.__name__, errors)
+
 
 class DataSharingAgreement(BaseModel):
+    model_config = ConfigDict(extra="allow")
     purpose: Optional[str] = None
     billing: Optional[str] = None
     security: Optional[str] = None
@@ -110,6 +214,9 @@ class Component(BaseModel):
     description: str
     specific: dict
 
+    # Cache of src.utility.fingerprint.component_fingerprint
+    _fingerprint: Optional[str] = PrivateAttr(default=None)
+
 
 class OutputPort(Component):
     model_config = ConfigDict(extra="allow")
@@ -237,6 +344,7 @@ def parse_component(data: dict | Component) -> Component:
 
 
 class DataProduct(BaseModel):
+    model_config = ConfigDict(extra="allow")
     id: str
     name: str
     fullyQualifiedName: Optional[str] = None
@@ -258,6 +366,9 @@ class DataProduct(BaseModel):
     specific: dict
     components: List[Annotated[Component, BeforeValidator(parse_component)]]
 
+    # Cache of src.utility.fingerprint.data_product_fingerprint
+    _fingerprint: Optional[str] = PrivateAttr(default=None)
+
     def get_components_by_kind(self, kind: str) -> List[Component]:
         """
         Filters the components associated with the data product and returns
@@ -301,15 +412,19 @@ class DataProduct(BaseModel):
            ... else:
            ...     print("Component not found.")
         """  # noqa: E501
-        for component in self.components:
-            if component.id == component_id:
-                return component
-        return None
+        with start_span("data_product.component_lookup", attributes={"component.id": component_id}) as span:
+            for component in self.components:
+                if component.id == component_id:
+                    if span.is_recording():
+                        span.set_attribute("component.kind", str(component.kind))
+                    return component
+            return None
 
     def get_typed_component_by_id(self, component_id: str, component_type: Type[BaseModel]):
         component = self.get_component_by_id(component_id)
         if component is not None:
-            return component_type.parse_obj(component.dict(by_alias=True))
+            with start_span("component.validate", attributes={"model.name": component_type.__name__}):
+                return component_type.parse_obj(component.dict(by_alias=True))
         else:
             return None
 
@@ -0,0 +1,139 @@
+import cProfile
+import hmac
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+
+from loguru import logger
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.request_context import request_context
+from src.settings import ProfilingSettings
+
+# cProfile hooks the thread it is enabled in: two sessions on the event loop thread would
+# replace each other's hook, so only one request at a time is profiled with it
+_cprofile_session = threading.Lock()
+
+
+class SamplingProfiler:
+    """
+    A minimal stack sampling profiler.
+
+    A background thread periodically collects the stacks of all the other threads,
+    so that the work running in the threadpool (i.e. the sync endpoints) is profiled
+    together with the event loop. The result is written in the collapsed stack format
+    understood by flame graph tools such as speedscope or flamegraph.pl.
+    """  # noqa: E501
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.samples[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame: FrameType | None) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def dump_stats(self, file: Path) -> None:
+        with open(file, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", value).strip("_")[:80] or "none"
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a sampled fraction of the requests, plus the ones carrying the trusted
+    profiling header, and stores the profiles in a local directory with bounded retention.
+
+    The middleware is only added to the application when profiling is enabled,
+    so it costs nothing otherwise.
+    """  # noqa: E501
+
+    def __init__(self, app: ASGIApp, settings: ProfilingSettings) -> None:
+        self.app = app
+        self.settings = settings
+        self.settings.directory.mkdir(parents=True, exist_ok=True)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        with request_context(scope) as context:
+            profiler: cProfile.Profile | SamplingProfiler
+            if self.settings.mode == "cprofile" and _cprofile_session.acquire(blocking=False):
+                # cProfile only sees the event loop thread: dependencies, parsing and validation
+                profiler = cProfile.Profile()
+                profiler.enable()
+            else:
+                # Sampling mode, or a cProfile session is already running for another request
+                profiler = SamplingProfiler(self.settings.sampling_interval)
+                profiler.start()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                if isinstance(profiler, SamplingProfiler):
+                    profiler.stop()
+                else:
+                    profiler.disable()
+                    _cprofile_session.release()
+                route = str(getattr(scope.get("route"), "path", scope["path"]))
+                await run_in_threadpool(self._store, profiler, route, context.component_id)
+
+    def _should_profile(self, scope: Scope) -> bool:
+        token = self.settings.token
+        if token is not None:
+            header_value = Headers(scope=scope).get(self.settings.header)
+            if header_value is not None and hmac.compare_digest(header_value, token.get_secret_value()):
+                return True
+        return self.settings.sample_rate > 0 and random.random() < self.settings.sample_rate
+
+    def _store(self, profiler: cProfile.Profile | SamplingProfiler, route: str, component_id: str | None) -> None:
+        extension = "collapsed" if isinstance(profiler, SamplingProfiler) else "prof"
+        file_name = f"{time.time_ns()}-{_slug(route)}-{_slug(component_id or '')}.{extension}"
+        file = self.settings.directory / file_name
+        try:
+            profiler.dump_stats(file)
+            self._enforce_retention()
+            logger.info("Stored profile of request {} for component {} in {}", route, component_id, file)
+        except OSError:
+            logger.exception("Unable to store the profile of request {}", route)
+
+    def _enforce_retention(self) -> None:
+        profiles = sorted(
+            (p for p in self.settings.directory.iterdir() if p.suffix in (".prof", ".collapsed")),
+            key=lambda p: p.name,
+        )
+        for profile in profiles[: max(len(profiles) - self.settings.max_profiles, 0)]:
+            profile.unlink(missing_ok=True)
@@ -0,0 +1,193 @@
+import json
+import sqlite3
+import time
+from threading import Lock
+from typing import Iterable, Sequence
+
+from loguru import logger
+
+from src.jobs import Job
+from src.models.api_models import ProvisioningStatus
+from src.settings import ProvisioningStoreSettings, provisioning_store_settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS provisioned (
+    component_id TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS acl (
+    component_id TEXT PRIMARY KEY,
+    identities TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS interrupted_jobs (
+    id TEXT PRIMARY KEY,
+    operation TEXT NOT NULL,
+    component_id TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    interrupted_at REAL NOT NULL
+);
+"""
+
+
+class ProvisioningStore:
+    """
+    Keeps the state of the provisioned components in a local SQLite database: the status of
+    their last provisioning, the identities of their last applied ACL, and the operations
+    interrupted by a shutdown.
+
+    The database is opened on first use, in WAL mode, so that the replicas sharing the file
+    do not block each other's reads. A failure of the store is logged and reported as a
+    missing entry: the worst it can cause is a provisioning that was not needed.
+    """  # noqa: E501
+
+    def __init__(self, settings: ProvisioningStoreSettings) -> None:
+        self.settings = settings
+        self._lock = Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    def get_status(self, component_id: str, fingerprint: str) -> ProvisioningStatus | None:
+        """
+        Returns the status of the last successful provisioning of a component, if its fingerprint was `fingerprint`.
+        """  # noqa: E501
+
+        try:
+            with self._lock:
+                row = (
+                    self._connect()
+                    .execute(
+                        "SELECT status FROM provisioned WHERE component_id = ? AND fingerprint = ?",
+                        (component_id, fingerprint),
+                    )
+                    .fetchone()
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Unable to read the provisioning state of {}: {}", component_id, e)
+            return None
+        return ProvisioningStatus.model_validate_json(row[0]) if row is not None else None
+
+    def put_status(self, component_id: str, fingerprint: str, status: ProvisioningStatus) -> None:
+        """
+        Stores the status of a successful provisioning of a component, replacing the previous one.
+        """
+
+        try:
+            with self._lock, self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO provisioned (component_id, fingerprint, status, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (component_id, fingerprint, status.model_dump_json(), time.time()),
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Unable to store the provisioning state of {}: {}", component_id, e)
+
+    def delete_status(self, component_id: str) -> None:
+        """
+        Forgets the provisioning of a component, so that the next one is never skipped.
+        """
+
+        try:
+            with self._lock, self._connect() as connection:
+                connection.execute("DELETE FROM provisioned WHERE component_id = ?", (component_id,))
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Unable to delete the provisioning state of {}: {}", component_id, e)
+
+    def get_identities(self, component_id: str) -> set[str] | None:
+        """
+        Returns the identities of the last ACL applied to a component, None if there is none.
+        """
+
+        try:
+            with self._lock:
+                row = (
+                    self._connect()
+                    .execute("SELECT identities FROM acl WHERE component_id = ?", (component_id,))
+                    .fetchone()
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Unable to read the ACL state of {}: {}", component_id, e)
+            return None
+        return set(json.loads(row[0])) if row is not None else None
+
+    def put_identities(self, component_id: str, identities: Iterable[str]) -> None:
+        """
+        Stores the identities of the ACL applied to a component, replacing the previous ones.
+        """
+
+        try:
+            with self._lock, self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO acl (component_id, identities, updated_at) VALUES (?, ?, ?)",
+                    (component_id, json.dumps(sorted(identities)), time.time()),
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Unable to store the ACL state of {}: {}", component_id, e)
+
+    def delete_identities(self, component_id: str) -> None:
+        """
+        Forgets the ACL of a component, so that the next one is applied in full.
+        """
+
+        try:
+            with self._lock, self._connect() as connection:
+                connection.execute("DELETE FROM acl WHERE component_id = ?", (component_id,))
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Unable to delete the ACL state of {}: {}", component_id, e)
+
+    def put_interrupted_jobs(self, jobs: Sequence[Job]) -> None:
+        """
+        Records the jobs that were still running when the service shut down.
+        """
+
+        interrupted_at = time.time()
+        try:
+            with self._lock, self._connect() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO interrupted_jobs (id, operation, component_id, started_at, interrupted_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(job.id, job.operation, job.component_id, job.started_at, interrupted_at) for job in jobs],
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Unable to record {} interrupted jobs: {}", len(jobs), e)
+
+    def take_interrupted_jobs(self) -> list[Job]:
+        """
+        Returns the jobs recorded as interrupted by a shutdown, oldest first, and forgets them.
+        """
+
+        try:
+            with self._lock, self._connect() as connection:
+                rows = connection.execute(
+                    "SELECT operation, component_id, id, started_at FROM interrupted_jobs ORDER BY started_at"
+                ).fetchall()
+                connection.execute("DELETE FROM interrupted_jobs")
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Unable to read the interrupted jobs: {}", e)
+            return []
+        return [Job(*row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.settings.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.settings.path, timeout=self.settings.timeout_seconds, check_same_thread=False
+            )
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(_SCHEMA)
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self._connection = connection
+        return self._connection
+
+
+provisioning_store = ProvisioningStore(provisioning_store_settings)
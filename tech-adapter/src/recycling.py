@@ -0,0 +1,184 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator, Callable
+
+from fastapi import FastAPI
+from loguru import logger
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.memory import current_rss
+from src.settings import RecyclingSettings, recycling_settings
+from src.shutdown import ShutdownCoordinator, is_supervised_worker, shutdown_coordinator
+from src.telemetry import meter
+
+REQUESTS = "requests"
+RSS = "rss"
+AGE = "age"
+
+_recycled_workers = meter.create_counter(
+    "tech_adapter.worker.recycled",
+    description="Server workers recycled because they reached one of their limits, by reason",
+)
+
+
+class WorkerRecycler:
+    """
+    Replaces a server worker once it served `max_requests` requests, its resident memory
+    crossed `max_rss_bytes`, or it ran for `max_age_seconds`, to bound the effect of leaks
+    and fragmentation on a long-running process.
+
+    The limits get a random jitter for each worker, so that the workers started together are
+    not replaced together. A worker reaching a limit stops the server gracefully: it no longer
+    accepts connections, which the other workers take, and completes its in-flight requests and
+    jobs before exiting. The uvicorn supervisor then starts a new worker in its place.
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        settings: RecyclingSettings,
+        coordinator: ShutdownCoordinator,
+        rss: Callable[[], int] = current_rss,
+        clock: Callable[[], float] = time.monotonic,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.settings = settings
+        self.coordinator = coordinator
+        self._rss = rss
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self.active = False
+        self.requests = 0
+        self.reason: str | None = None
+        self.max_requests: int | None = None
+        self.max_age_seconds: float | None = None
+        self._started_at = 0.0
+
+    @property
+    def configured(self) -> bool:
+        return any(
+            limit is not None
+            for limit in (self.settings.max_requests, self.settings.max_rss_bytes, self.settings.max_age_seconds)
+        )
+
+    def start(self) -> None:
+        """
+        Draws the jittered limits of the worker and starts counting its requests and age.
+        """
+
+        settings = self.settings
+        self.requests = 0
+        self.reason = None
+        self._started_at = self._clock()
+        self.max_requests = None
+        if settings.max_requests is not None:
+            self.max_requests = settings.max_requests + self._rng.randint(0, settings.max_requests_jitter)
+        self.max_age_seconds = None
+        if settings.max_age_seconds is not None:
+            self.max_age_seconds = settings.max_age_seconds + self._rng.uniform(0, settings.max_age_jitter_seconds)
+        self.active = True
+        logger.info(
+            "Worker recycling limits: {} requests, {} bytes of resident memory, {} seconds",
+            self.max_requests,
+            settings.max_rss_bytes,
+            self.max_age_seconds,
+        )
+
+    def check(self) -> str | None:
+        """
+        Returns the reason to recycle the worker, or None while it is within its limits.
+        """
+
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            return REQUESTS
+        if self.settings.max_rss_bytes is not None and self._rss() >= self.settings.max_rss_bytes:
+            return RSS
+        if self.max_age_seconds is not None and self._clock() - self._started_at >= self.max_age_seconds:
+            return AGE
+        return None
+
+    def request_done(self) -> None:
+        self.requests += 1
+        if self.active and self.max_requests is not None and self.requests >= self.max_requests:
+            self.recycle(REQUESTS)
+
+    def recycle(self, reason: str) -> None:
+        """
+        Stops the worker gracefully, once, see `ShutdownCoordinator.stop_server`.
+        """
+
+        if self.reason is not None:
+            return
+        self.reason = reason
+        logger.warning(
+            "Recycling the worker ({}): {} requests served, {} bytes of resident memory, running for {:.0f} seconds",
+            reason,
+            self.requests,
+            self._rss(),
+            self._clock() - self._started_at,
+        )
+        _recycled_workers.add(1, {"reason": reason})
+        if not self.coordinator.stop_server():
+            logger.warning("The worker cannot be recycled: the signal handler of the server is not available")
+
+    async def watch(self) -> None:
+        """
+        Checks the limits of the worker every `check_interval_seconds` until it is recycled.
+        """
+
+        while self.reason is None:
+            await asyncio.sleep(self.settings.check_interval_seconds)
+            reason = self.check()
+            if reason is not None:
+                self.recycle(reason)
+
+
+class RecyclingMiddleware:
+    """
+    Counts the requests served by the worker, see `WorkerRecycler`.
+
+    The middleware is only added to the application when a recycling limit is set.
+    """
+
+    def __init__(self, app: ASGIApp, recycler: WorkerRecycler) -> None:
+        self.app = app
+        self.recycler = recycler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.recycler.request_done()
+
+
+worker_recycler = WorkerRecycler(recycling_settings, shutdown_coordinator)
+
+
+@asynccontextmanager
+async def recycling_lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Watches the limits of the worker while the application runs, when a recycling limit is set.
+
+    Recycling needs the uvicorn supervisor, which replaces the workers that exit: a single
+    worker, without a supervisor, would stop the service instead, so it is not recycled.
+    """  # noqa: E501
+
+    if not worker_recycler.configured:
+        yield
+        return
+    if not is_supervised_worker():
+        logger.warning("Worker recycling disabled: it needs several server workers, see docs/recycling.md")
+        yield
+        return
+    worker_recycler.start()
+    watch = asyncio.create_task(worker_recycler.watch())
+    try:
+        yield
+    finally:
+        watch.cancel()
+        with suppress(asyncio.CancelledError):
+            await watch
@@ -0,0 +1,95 @@
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterator
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+if TYPE_CHECKING:
+    from src.large_body import SpooledDescriptor
+
+
+@dataclass
+class RequestContext:
+    """
+    Per-request information collected along the pipeline.
+
+    The context is a mutable object shared by reference, so values set by a dependency
+    or by an endpoint running in the threadpool are visible to the middlewares too.
+    """  # noqa: E501
+
+    path: str
+    component_id: str | None = None
+    memory_baseline: int | None = None
+    memory_peaks: dict[str, int] = field(default_factory=dict)
+    spooled_descriptor: "SpooledDescriptor | None" = None
+    # Monotonic time after which nobody waits for the response anymore, see src/deadlines.py
+    deadline: float | None = None
+    # Why and at which stage the request was abandoned, if it was
+    abandoned: str | None = None
+    abandoned_stage: str | None = None
+
+
+_request_context: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+
+
+def get_request_context() -> RequestContext | None:
+    return _request_context.get()
+
+
+@contextmanager
+def request_context(scope: Scope) -> Iterator[RequestContext]:
+    """
+    Opens the context of the request described by the ASGI scope.
+    If a context is already open (e.g. by an outer middleware) it is reused.
+    """
+
+    current = _request_context.get()
+    if current is not None:
+        yield current
+        return
+
+    context = RequestContext(path=scope["path"])
+    token = _request_context.set(context)
+    try:
+        yield context
+    finally:
+        _request_context.reset(token)
+
+
+def detached_context() -> Context:
+    """
+    Returns a copy of the current context without the request context, for the work that
+    outlives the request that started it or serves several requests.
+    """
+
+    context = copy_context()
+    context.run(_request_context.set, None)
+    return context
+
+
+def set_component_id(component_id: str | None) -> None:
+    """
+    Records the id of the component the current request is about. No-op outside a request.
+    """
+
+    context = _request_context.get()
+    if context is not None:
+        context.component_id = component_id
+
+
+class RequestContextMiddleware:
+    """
+    Opens a `RequestContext` for every HTTP request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with request_context(scope):
+            await self.app(scope, receive, send)
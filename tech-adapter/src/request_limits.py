@@ -0,0 +1,68 @@
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.models.api_models import ValidationError
+from src.settings import DescriptorLimitsSettings
+
+
+class _RequestTooLarge(Exception):
+    pass
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Rejects the requests whose body is larger than `max_request_bytes` with a 400 `ValidationError`.
+
+    Requests declaring a larger `Content-Length` are rejected before their body is read.
+    Requests without it (i.e. chunked) are rejected as soon as the received body exceeds the limit.
+    The `streamed_paths` read their body as it arrives, and limit the size of its parts themselves.
+    """  # noqa: E501
+
+    def __init__(
+        self, app: ASGIApp, settings: DescriptorLimitsSettings, streamed_paths: frozenset[str] = frozenset()
+    ) -> None:
+        self.app = app
+        self.settings = settings
+        self.streamed_paths = streamed_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.streamed_paths:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.settings.max_request_bytes
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _RequestTooLarge()
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _RequestTooLarge:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        error = ValidationError(errors=[f"The request body is larger than {self.settings.max_request_bytes} bytes"])
+        response = JSONResponse(error.model_dump(), status_code=400)
+        await response(scope, receive, send)
@@ -0,0 +1,200 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Callable, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+from src.adaptive_limit import AimdLimiter, provisioning_limiter
+from src.settings import SchedulingSettings, scheduling_settings
+from src.telemetry import meter
+
+T = TypeVar("T")
+
+_queue_depth = meter.create_up_down_counter(
+    "tech_adapter.scheduler.queue_depth",
+    description="Provisioning operations waiting for a worker, by domain and data product",
+)
+_wait_time = meter.create_histogram(
+    "tech_adapter.scheduler.wait_time",
+    unit="s",
+    description="Time a provisioning operation waited for a worker, by domain and data product",
+)
+
+
+class _Waiter:
+    def __init__(self, domain: str, data_product_id: str) -> None:
+        self.domain = domain
+        self.data_product_id = data_product_id
+        self.enqueued = time.monotonic()
+        self.ready: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+
+
+class FairScheduler:
+    """
+    Runs the provisioning operations in worker threads, sharing the workers fairly among domains and data products.
+
+    At most `max_concurrency` operations run at the same time. The others wait in a queue
+    per data product, and a free worker goes to the domain served least recently, then to
+    its data product served least recently, so that a domain deploying a data product with
+    hundreds of components takes turns with the others instead of holding every worker.
+    `max_per_domain` and `max_per_data_product` cap the operations running for the same key.
+    With an enabled `limiter`, its adaptive limit replaces `max_concurrency`.
+    """  # noqa: E501
+
+    def __init__(self, settings: SchedulingSettings, limiter: AimdLimiter | None = None) -> None:
+        self.settings = settings
+        self.limiter = limiter
+        # Domain -> data product id -> waiters
+        self._queues: dict[str, dict[str, deque[_Waiter]]] = {}
+        # When each domain and (domain, data product id) with operations waiting or running was last served
+        self._last_served: dict[str | tuple[str, str], int] = {}
+        self._served = itertools.count()
+        self._running = 0
+        self._running_per_domain: dict[str, int] = {}
+        self._running_per_data_product: dict[tuple[str, str], int] = {}
+
+    async def run(
+        self,
+        domain: str,
+        data_product_id: str,
+        operation: Callable[[], T],
+        failed: Callable[[T], bool] = lambda result: False,
+    ) -> T:
+        """
+        Runs `operation` in a worker thread once it is its turn, and returns its result.
+
+        With the scheduling disabled, the operation runs right away. With the adaptive limit,
+        its latency and outcome, an exception or a result for which `failed` is true, adjust
+        the limit.
+        """  # noqa: E501
+
+        if not self.settings.enabled:
+            return await run_in_threadpool(operation)
+        await self._acquire(domain, data_product_id)
+        started = time.monotonic()
+
+        def complete(task: asyncio.Task[T]) -> None:
+            succeeded = not task.cancelled() and task.exception() is None and not failed(task.result())
+            if self.limiter is not None and self.limiter.enabled:
+                self.limiter.on_complete(time.monotonic() - started, not succeeded, self._running)
+            self._release(domain, data_product_id)
+
+        # A cancelled request, e.g. past its deadline, does not stop the worker thread: the worker
+        # stays taken until the operation returns, so the limits hold against the target technology
+        task: asyncio.Task[T] = asyncio.ensure_future(run_in_threadpool(operation))
+        task.add_done_callback(complete)
+        return await asyncio.shield(task)
+
+    @property
+    def max_concurrency(self) -> int:
+        if self.limiter is not None and self.limiter.enabled:
+            return self.limiter.limit
+        return self.settings.max_concurrency
+
+    def queue_depth(self, domain: str | None = None, data_product_id: str | None = None) -> int:
+        """
+        Returns the number of operations waiting, in total or for a domain or data product.
+        """
+
+        return sum(
+            len(waiters)
+            for queue_domain, data_products in self._queues.items()
+            if domain is None or queue_domain == domain
+            for queue_data_product_id, waiters in data_products.items()
+            if data_product_id is None or queue_data_product_id == data_product_id
+        )
+
+    def running(self) -> int:
+        return self._running
+
+    async def _acquire(self, domain: str, data_product_id: str) -> None:
+        waiter = _Waiter(domain, data_product_id)
+        self._queues.setdefault(domain, {}).setdefault(data_product_id, deque()).append(waiter)
+        _queue_depth.add(1, self._attributes(waiter))
+        self._dispatch()
+        try:
+            await waiter.ready
+        except asyncio.CancelledError:
+            if waiter.ready.done() and not waiter.ready.cancelled():
+                # Granted a worker right before being cancelled
+                self._release(domain, data_product_id)
+            else:
+                self._remove(waiter)
+            raise
+
+    def _release(self, domain: str, data_product_id: str) -> None:
+        self._running -= 1
+        self._running_per_domain[domain] -= 1
+        if not self._running_per_domain[domain]:
+            del self._running_per_domain[domain]
+        self._running_per_data_product[(domain, data_product_id)] -= 1
+        if not self._running_per_data_product[(domain, data_product_id)]:
+            del self._running_per_data_product[(domain, data_product_id)]
+        self._forget_if_idle(domain, data_product_id)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrency:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._running += 1
+            self._running_per_domain[waiter.domain] = self._running_per_domain.get(waiter.domain, 0) + 1
+            key = (waiter.domain, waiter.data_product_id)
+            self._running_per_data_product[key] = self._running_per_data_product.get(key, 0) + 1
+            _wait_time.record(time.monotonic() - waiter.enqueued, self._attributes(waiter))
+            waiter.ready.set_result(None)
+
+    def _next_waiter(self) -> _Waiter | None:
+        """
+        Takes the first waiter of the least recently served domain, and of its least recently served data product, under their caps.
+        """  # noqa: E501
+
+        max_per_domain = self.settings.max_per_domain
+        max_per_data_product = self.settings.max_per_data_product
+        for domain in sorted(self._queues, key=lambda domain: self._last_served.get(domain, -1)):
+            if max_per_domain is not None and self._running_per_domain.get(domain, 0) >= max_per_domain:
+                continue
+            data_products = self._queues[domain]
+            for data_product_id in sorted(data_products, key=lambda id: self._last_served.get((domain, id), -1)):
+                running = self._running_per_data_product.get((domain, data_product_id), 0)
+                if max_per_data_product is not None and running >= max_per_data_product:
+                    continue
+                waiter = data_products[data_product_id].popleft()
+                _queue_depth.add(-1, self._attributes(waiter))
+                served = next(self._served)
+                self._last_served[domain] = served
+                self._last_served[(domain, data_product_id)] = served
+                self._drop_empty_queue(domain, data_product_id)
+                return waiter
+        return None
+
+    def _remove(self, waiter: _Waiter) -> None:
+        self._queues[waiter.domain][waiter.data_product_id].remove(waiter)
+        _queue_depth.add(-1, self._attributes(waiter))
+        self._drop_empty_queue(waiter.domain, waiter.data_product_id)
+        self._forget_if_idle(waiter.domain, waiter.data_product_id)
+
+    def _drop_empty_queue(self, domain: str, data_product_id: str) -> None:
+        data_products = self._queues[domain]
+        if not data_products[data_product_id]:
+            del data_products[data_product_id]
+            if not data_products:
+                del self._queues[domain]
+
+    def _forget_if_idle(self, domain: str, data_product_id: str) -> None:
+        # A key with nothing waiting nor running is served first when it comes back
+        key = (domain, data_product_id)
+        if key not in self._running_per_data_product and data_product_id not in self._queues.get(domain, {}):
+            self._last_served.pop(key, None)
+        if domain not in self._running_per_domain and domain not in self._queues:
+            self._last_served.pop(domain, None)
+
+    @staticmethod
+    def _attributes(waiter: _Waiter) -> dict[str, str]:
+        return {"domain": waiter.domain, "data_product": waiter.data_product_id}
+
+
+provisioning_scheduler = FairScheduler(scheduling_settings, provisioning_limiter)
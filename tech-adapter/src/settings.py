@@ -0,0 +1,453 @@
+import tempfile
+from pathlib import Path
+from typing import Literal
+
+from pydantic import Field, SecretStr
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class TracingSettings(BaseSettings):
+    """
+    Settings for the manual OpenTelemetry spans of the descriptor pipeline.
+
+    The same values are forwarded to the OpenTelemetry agent by `server_start.sh`,
+    so that auto-instrumented and manual spans share one sampling decision.
+    """  # noqa: E501
+
+    model_config = SettingsConfigDict(env_prefix="TRACING_")
+
+    sampling_ratio: float = Field(
+        default=1.0,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of root traces to sample (parent based head sampling)",
+    )
+    excluded_urls: str = Field(
+        default="docs,openapi.json",
+        description="Comma separated list of regexes; requests whose path matches any of them are not traced",
+    )
+
+
+tracing_settings = TracingSettings()
+
+
+class ProfilingSettings(BaseSettings):
+    """
+    Settings for the opt-in per-request profiling, see docs/profiling.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="PROFILING_")
+
+    enabled: bool = Field(default=False, description="Adds the profiling middleware to the application")
+    mode: Literal["cprofile", "sampling"] = Field(
+        default="cprofile",
+        description="cProfile deterministic profiling of the event loop thread, or stack sampling of all the threads",
+    )
+    sample_rate: float = Field(default=0.0, ge=0.0, le=1.0, description="Fraction of the requests to profile")
+    header: str = Field(default="X-Profile-Request", description="Header requesting the profiling of a request")
+    token: SecretStr | None = Field(
+        default=None,
+        description="Value the profiling header must carry to be trusted; if unset the header is ignored",
+    )
+    directory: Path = Field(
+        default=Path(tempfile.gettempdir()) / "tech-adapter-profiles",
+        description="Directory where the profiles are stored",
+    )
+    max_profiles: int = Field(default=100, gt=0, description="Number of profiles kept in the directory")
+    sampling_interval: float = Field(default=0.005, gt=0.0, description="Seconds between two stack samples")
+
+
+profiling_settings = ProfilingSettings()
+
+
+class MemorySettings(BaseSettings):
+    """
+    Settings for the per-request memory accounting, see docs/memory.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="MEMORY_")
+
+    tracking_enabled: bool = Field(
+        default=False,
+        description="Traces the Python allocations with tracemalloc and records the peak memory of each request",
+    )
+    traceback_frames: int = Field(default=1, gt=0, description="Frames stored by tracemalloc for each allocation")
+    snapshot_top_stats: int = Field(default=20, gt=0, description="Entries returned by a snapshot diff")
+
+
+memory_settings = MemorySettings()
+
+
+class AdminSettings(BaseSettings):
+    """
+    Settings for the admin endpoints.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="ADMIN_")
+
+    token: SecretStr | None = Field(
+        default=None,
+        description="Token expected in the X-Admin-Token header; if unset the admin endpoints are disabled",
+    )
+
+
+admin_settings = AdminSettings()
+
+
+class CaptureSettings(BaseSettings):
+    """
+    Settings for the traffic capture, see docs/traffic_capture.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="CAPTURE_")
+
+    enabled: bool = Field(default=False, description="Writes every request and response to the capture files")
+    directory: Path = Field(
+        default=Path(tempfile.gettempdir()) / "tech-adapter-captures",
+        description="Directory where the capture files are stored",
+    )
+    excluded_urls: str = Field(
+        default="docs,openapi.json,admin",
+        description="Comma separated list of regexes; requests whose path matches any of them are not captured",
+    )
+    max_file_bytes: int = Field(
+        default=100 * 1024 * 1024,
+        gt=0,
+        description="Uncompressed bytes after which a new capture file is started",
+    )
+    max_files: int = Field(default=10, gt=0, description="Number of capture files kept in the directory")
+
+
+capture_settings = CaptureSettings()
+
+
+class DescriptorLimitsSettings(BaseSettings):
+    """
+    Limits on the requests and descriptors accepted by the service. Requests exceeding
+    them are rejected with a validation error before any expensive work is done.
+    """  # noqa: E501
+
+    model_config = SettingsConfigDict(env_prefix="DESCRIPTOR_")
+
+    max_request_bytes: int = Field(default=64 * 1024 * 1024, gt=0, description="Maximum size of a request body")
+    max_bytes: int = Field(default=32 * 1024 * 1024, gt=0, description="Maximum size of a YAML descriptor")
+    max_depth: int = Field(default=64, gt=0, description="Maximum nesting depth of a descriptor")
+    max_nodes: int = Field(
+        default=2_000_000,
+        gt=0,
+        description="Maximum number of nodes of a descriptor, counting aliased nodes once per alias",
+    )
+    max_aliases: int = Field(default=1_000, ge=0, description="Maximum number of aliases in a descriptor")
+
+
+descriptor_limits_settings = DescriptorLimitsSettings()
+
+
+class LargeBodySettings(BaseSettings):
+    """
+    Settings for the large body mode, see docs/large_bodies.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="LARGE_BODY_")
+
+    enabled: bool = Field(default=False, description="Spools the large request bodies to disk instead of memory")
+    threshold_bytes: int = Field(
+        default=8 * 1024 * 1024,
+        gt=0,
+        description="Size above which the body of a request parsing a descriptor is spooled to disk",
+    )
+    directory: Path | None = Field(
+        default=None,
+        description="Directory of the spooled bodies; the system temporary directory if unset",
+    )
+
+
+large_body_settings = LargeBodySettings()
+
+
+class ComponentExtractionSettings(BaseSettings):
+    """
+    Settings of the extraction of the component to provision, see docs/component_extraction.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="COMPONENT_EXTRACTION_")
+
+    enabled: bool = Field(
+        default=True,
+        description="Loads only the component to provision from the descriptors of /v1/provision and /v1/unprovision",
+    )
+
+
+component_extraction_settings = ComponentExtractionSettings()
+
+
+class ProvisioningStoreSettings(BaseSettings):
+    """
+    Settings of the local store of the provisioning state, see docs/idempotency.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="PROVISIONING_STORE_")
+
+    path: Path = Field(
+        default=Path(tempfile.gettempdir()) / "tech-adapter-state.sqlite3",
+        description="SQLite database file; it must be on a persistent volume to survive restarts",
+    )
+    timeout_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        description="Seconds to wait for a lock held by another process on the database",
+    )
+
+
+provisioning_store_settings = ProvisioningStoreSettings()
+
+
+class IdempotencySettings(BaseSettings):
+    """
+    Settings of the idempotent provisioning, see docs/idempotency.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="IDEMPOTENCY_")
+
+    enabled: bool = Field(
+        default=False,
+        description="Returns the stored status of a component provisioned with an identical descriptor",
+    )
+
+
+idempotency_settings = IdempotencySettings()
+
+
+class AclSettings(BaseSettings):
+    """
+    Settings of the application of the ACLs of /v1/updateacl, see docs/acl.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="ACL_")
+
+    delta_enabled: bool = Field(
+        default=False,
+        description="Applies only the identities added and removed since the last ACL applied to the component",
+    )
+    batch_size: int = Field(default=500, gt=0, description="Maximum number of identities per grant or revoke operation")
+    coalescing_window_seconds: float = Field(
+        default=0.0,
+        ge=0.0,
+        description="Window within which the requests for the same component are coalesced; 0 disables coalescing",
+    )
+
+
+acl_settings = AclSettings()
+
+
+class IdentityCacheSettings(BaseSettings):
+    """
+    Settings of the cache of the identity resolution, see docs/acl.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="IDENTITY_CACHE_")
+
+    ttl_seconds: float = Field(default=300.0, ge=0.0, description="Seconds a resolved identity is cached")
+    negative_ttl_seconds: float = Field(
+        default=60.0, ge=0.0, description="Seconds an identity unknown to the directory is cached"
+    )
+    max_entries: int = Field(default=10000, gt=0, description="Maximum number of identities in the cache")
+    batch_size: int = Field(default=100, gt=0, description="Maximum number of identities per directory lookup")
+
+
+identity_cache_settings = IdentityCacheSettings()
+
+
+class HttpClientSettings(BaseSettings):
+    """
+    Settings of the HTTP client shared by the calls to the target technologies, see docs/http_client.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="HTTP_CLIENT_")
+
+    http2: bool = Field(
+        default=True, description="Uses HTTP/2 when the h2 package is installed and the server supports it"
+    )
+    max_connections: int = Field(default=100, gt=0, description="Maximum number of connections of the pool")
+    max_keepalive_connections: int = Field(
+        default=20, ge=0, description="Maximum number of idle connections kept alive in the pool"
+    )
+    keepalive_expiry_seconds: float = Field(
+        default=30.0, ge=0.0, description="Seconds an idle connection is kept alive"
+    )
+    max_connections_per_host: int | None = Field(
+        default=None, gt=0, description="Maximum number of requests in flight to the same host; unlimited if unset"
+    )
+    connect_timeout_seconds: float = Field(default=5.0, gt=0.0, description="Timeout to establish a connection")
+    read_timeout_seconds: float = Field(default=30.0, gt=0.0, description="Timeout to receive a chunk of the response")
+    write_timeout_seconds: float = Field(default=30.0, gt=0.0, description="Timeout to send a chunk of the request")
+    pool_timeout_seconds: float = Field(
+        default=5.0, gt=0.0, description="Timeout to get a connection from the pool when all are in use"
+    )
+
+
+http_client_settings = HttpClientSettings()
+
+
+class SchedulingSettings(BaseSettings):
+    """
+    Settings of the fair scheduling of the provisioning operations, see docs/scheduling.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="SCHEDULING_")
+
+    enabled: bool = Field(default=False, description="Shares the workers fairly among domains and data products")
+    max_concurrency: int = Field(
+        default=16,
+        gt=0,
+        description="Maximum number of provisioning operations running at the same time, at most the 40 worker threads",
+    )
+    max_per_domain: int | None = Field(
+        default=None, gt=0, description="Maximum number of operations running for the same domain; unlimited if unset"
+    )
+    max_per_data_product: int | None = Field(
+        default=None,
+        gt=0,
+        description="Maximum number of operations running for the same data product; unlimited if unset",
+    )
+
+
+scheduling_settings = SchedulingSettings()
+
+
+class AdaptiveConcurrencySettings(BaseSettings):
+    """
+    Settings of the adaptive concurrency limit of the provisioning operations, see docs/scheduling.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="ADAPTIVE_CONCURRENCY_")
+
+    enabled: bool = Field(
+        default=False,
+        description="Adapts the limit on the running operations to the latency and errors of the target technology",
+    )
+    initial_limit: int = Field(default=8, gt=0, description="Limit when the service starts")
+    min_limit: int = Field(default=1, gt=0, description="Lowest limit")
+    max_limit: int = Field(default=32, gt=0, description="Highest limit, at most the 40 worker threads")
+    latency_threshold_seconds: float = Field(
+        default=10.0, gt=0.0, description="Operations slower than this count as a sign of overload"
+    )
+    backoff_ratio: float = Field(
+        default=0.9, gt=0.0, lt=1.0, description="Factor applied to the limit on a failure or a slow operation"
+    )
+
+
+adaptive_concurrency_settings = AdaptiveConcurrencySettings()
+
+
+class DeadlineSettings(BaseSettings):
+    """
+    Settings of the request deadlines, see docs/deadlines.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="DEADLINE_")
+
+    header: str = Field(
+        default="X-Request-Timeout", description="Request header carrying the timeout of the request, in seconds"
+    )
+    route_timeouts: dict[str, float] = Field(
+        default={},
+        description='Timeout in seconds per path, e.g. {"/v1/provision": 30}; the header can only shorten it',
+    )
+
+
+deadline_settings = DeadlineSettings()
+
+
+class ShutdownSettings(BaseSettings):
+    """
+    Settings of the graceful shutdown, see docs/shutdown.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="SHUTDOWN_")
+
+    drain_delay_seconds: int = Field(
+        default=5,
+        ge=0,
+        description="Seconds the service keeps serving after SIGTERM, while reporting not ready, before closing",
+    )
+    grace_period_seconds: int = Field(
+        default=25,
+        ge=0,
+        description="Seconds the in-flight requests and jobs have to complete once the service closes",
+    )
+
+
+shutdown_settings = ShutdownSettings()
+
+
+class JobJournalSettings(BaseSettings):
+    """
+    Settings of the write-ahead journal of the provisioning jobs, see docs/job_journal.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="JOB_JOURNAL_")
+
+    enabled: bool = Field(default=False, description="Journals the state transitions of the jobs")
+    path: Path = Field(
+        default=Path(tempfile.gettempdir()) / "tech-adapter-jobs.journal",
+        description="Journal file; it must be on a persistent volume to survive restarts",
+    )
+    fsync: bool = Field(
+        default=True, description="Waits for the transitions to reach the disk, in batches, before going on"
+    )
+    compaction_threshold: int = Field(
+        default=10000, gt=0, description="Entries appended before the journal is rewritten with the latest states"
+    )
+    retention_seconds: float = Field(
+        default=86400.0, ge=0.0, description="Seconds the completed and failed jobs are kept, with their status tokens"
+    )
+
+
+job_journal_settings = JobJournalSettings()
+
+
+class RecyclingSettings(BaseSettings):
+    """
+    Settings of the recycling of the server workers, see docs/recycling.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="RECYCLING_")
+
+    max_requests: int | None = Field(
+        default=None, gt=0, description="Requests a worker serves before being replaced; unlimited if unset"
+    )
+    max_requests_jitter: int = Field(
+        default=0, ge=0, description="Random extra requests added to `max_requests` for each worker"
+    )
+    max_rss_bytes: int | None = Field(
+        default=None, gt=0, description="Resident memory above which a worker is replaced; unlimited if unset"
+    )
+    max_age_seconds: float | None = Field(
+        default=None, gt=0.0, description="Seconds a worker runs before being replaced; unlimited if unset"
+    )
+    max_age_jitter_seconds: float = Field(
+        default=0.0, ge=0.0, description="Random extra seconds added to `max_age_seconds` for each worker"
+    )
+    check_interval_seconds: float = Field(
+        default=5.0, gt=0.0, description="Seconds between two checks of the limits of a worker"
+    )
+
+
+recycling_settings = RecyclingSettings()
+
+
+class BulkValidationSettings(BaseSettings):
+    """
+    Settings of the bulk validation endpoint, see docs/bulk_validation.md.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="BULK_VALIDATION_")
+
+    concurrency: int = Field(default=4, gt=0, description="Provisioning requests of a body validated at the same time")
+    max_item_bytes: int = Field(
+        default=64 * 1024 * 1024, gt=0, description="Maximum size of each provisioning request of a body"
+    )
+
+
+bulk_validation_settings = BulkValidationSettings()
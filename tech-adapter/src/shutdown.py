@@ -0,0 +1,162 @@
+import asyncio
+import multiprocessing
+import signal
+import threading
+import time
+from contextlib import asynccontextmanager
+from types import FrameType
+from typing import AsyncIterator, Callable
+
+from fastapi import FastAPI
+from loguru import logger
+
+from src.jobs import JobRegistry, job_journal, job_registry
+from src.provisioning_store import ProvisioningStore, provisioning_store
+from src.settings import ShutdownSettings, shutdown_settings
+
+
+class ShutdownCoordinator:
+    """
+    Drains the service before it stops, so that a rolling deploy does not lose the provisioning in progress.
+
+    On SIGTERM the service reports not ready, so that Kubernetes stops routing requests to it,
+    but keeps serving for `drain_delay_seconds`, the time the endpoints take to be updated.
+    Then uvicorn stops accepting connections and waits for the in-flight requests, and the
+    application shutdown waits for the jobs still running in the worker threads, both within
+    `grace_period_seconds`. The jobs that do not complete in time are recorded in the store.
+    """  # noqa: E501
+
+    def __init__(self, settings: ShutdownSettings, jobs: JobRegistry, store: ProvisioningStore) -> None:
+        self.settings = settings
+        self.jobs = jobs
+        self.store = store
+        self._draining_since: float | None = None
+        self._server_handler: Callable[[int, FrameType | None], object] | None = None
+        self._server_stopped = False
+
+    @property
+    def ready(self) -> bool:
+        return self._draining_since is None
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Reports ready, and takes over the SIGTERM handler of the server, see `install_signal_handler`.
+        """
+
+        self._draining_since = None
+        self._server_stopped = False
+        self.install_signal_handler(loop)
+
+    def start_draining(self) -> None:
+        if self._draining_since is None:
+            self._draining_since = time.monotonic()
+            logger.info("Draining: {} jobs running", len(self.jobs.running()))
+
+    def install_signal_handler(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Delays the SIGTERM handler of the server by `drain_delay_seconds`, draining meanwhile.
+
+        Only possible in the main thread, where the server installs its handler before the
+        application starts. A second SIGTERM is handed to the server right away.
+        """  # noqa: E501
+
+        if threading.current_thread() is not threading.main_thread():
+            return
+        server_handler = signal.getsignal(signal.SIGTERM)
+        if not callable(server_handler):
+            return
+        self._server_handler = server_handler
+
+        def handle_sigterm(signum: int, frame: FrameType | None) -> None:
+            if not self.ready:
+                server_handler(signum, frame)
+                return
+            self.start_draining()
+            loop.call_soon_threadsafe(loop.call_later, self.settings.drain_delay_seconds, server_handler, signum, frame)
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+
+    def stop_server(self, settle_seconds: float = 0.5) -> bool:
+        """
+        Asks the server to shut down, without the drain delay, and returns whether it could.
+
+        Meant for a worker replaced by its supervisor: it still completes its in-flight requests
+        and jobs, while the other workers accept the new connections. The service stays ready,
+        since the readiness probe of the pod reaches the other workers. Must be called from the
+        event loop.
+        """  # noqa: E501
+
+        if self._server_handler is None:
+            return False
+        self._server_stopped = True
+        # The server closes the connections without a request as idle: the listeners of uvicorn
+        # are closed first, so that the connections just accepted have the time to send theirs.
+        # `servers` is not a public attribute of uvicorn: without it the server is stopped anyway
+        server = getattr(self._server_handler, "__self__", None)
+        listeners = getattr(server, "servers", None)
+        if listeners is None:
+            logger.warning("Unable to close the listeners of the server, the connections just accepted may be dropped")
+        for listener in listeners or []:
+            listener.close()
+        asyncio.get_running_loop().call_later(settle_seconds, self._server_handler, signal.SIGTERM, None)
+        return True
+
+    async def drain(self) -> None:
+        """
+        Waits for the running jobs until the end of the grace period, and records the ones left.
+        """
+
+        self.start_draining()
+        assert self._draining_since is not None
+        delay = 0 if self._server_stopped else self.settings.drain_delay_seconds
+        deadline = self._draining_since + delay + self.settings.grace_period_seconds
+        if await self.jobs.wait_idle(max(deadline - time.monotonic(), 0.0)):
+            logger.info("Drained: no jobs running")
+            return
+        unfinished = self.jobs.running()
+        for job in unfinished:
+            logger.warning("Job {} of component {} interrupted by the shutdown", job.operation, job.component_id)
+        await asyncio.to_thread(self.store.put_interrupted_jobs, unfinished)
+
+    def report_interrupted_jobs(self) -> None:
+        """
+        Logs the jobs interrupted by the previous shutdown, which the platform has to retry.
+        """
+
+        if not self.store.settings.path.exists():
+            return
+        for job in self.store.take_interrupted_jobs():
+            logger.warning(
+                "Job {} of component {} was interrupted by the previous shutdown", job.operation, job.component_id
+            )
+
+
+shutdown_coordinator = ShutdownCoordinator(shutdown_settings, job_registry, provisioning_store)
+
+
+def is_supervised_worker() -> bool:
+    """
+    Returns whether the service runs in one of the worker processes of the uvicorn supervisor,
+    i.e. with several workers, which replaces the workers that exit.
+    """  # noqa: E501
+
+    return multiprocessing.parent_process() is not None
+
+
+@asynccontextmanager
+async def shutdown_lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Replays the job journal on startup, and drains the jobs of the service on shutdown, see `ShutdownCoordinator`.
+    """  # noqa: E501
+
+    if job_journal.enabled and is_supervised_worker():
+        # Each worker would recover the journal of the others, failing their running jobs
+        raise RuntimeError("The job journal needs a single server worker, see docs/job_journal.md")
+    shutdown_coordinator.start(asyncio.get_running_loop())
+    await asyncio.to_thread(shutdown_coordinator.report_interrupted_jobs)
+    if job_journal.enabled:
+        await asyncio.to_thread(job_journal.recover)
+    yield
+    await shutdown_coordinator.drain()
+    if job_journal.enabled:
+        await asyncio.to_thread(job_journal.close)
@@ -0,0 +1,121 @@
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Iterator, Sequence
+
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.trace import SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import INVALID_SPAN, Span
+from opentelemetry.util.types import Attributes
+
+from src.settings import CaptureSettings, TracingSettings, tracing_settings
+
+INSTRUMENTATION_NAME = "tech-adapter"
+
+# Instruments created from this meter are no-ops until a meter provider is configured,
+# e.g. by the OpenTelemetry agent (see `OTEL_METRICS_EXPORTER`)
+meter = metrics.get_meter(INSTRUMENTATION_NAME)
+
+# Overrides the global tracer provider, see `set_tracer_provider`
+_tracer_provider: trace.TracerProvider | None = None
+
+_tracing_suppressed: ContextVar[bool] = ContextVar("tracing_suppressed", default=False)
+
+
+def create_tracer_provider(
+    settings: TracingSettings = tracing_settings,
+    span_processors: Sequence[SpanProcessor] = (),
+) -> TracerProvider:
+    """
+    Creates an SDK tracer provider using the head sampling configured in the settings.
+
+    When the service runs with `opentelemetry-instrument` the agent already configures
+    a global provider (see `server_start.sh`); this function is meant for running
+    without the agent and for tests, e.g. together with an `InMemorySpanExporter`.
+
+    Args:
+        settings (TracingSettings, optional): The tracing settings. Defaults to the ones read from the environment.
+        span_processors (Sequence[SpanProcessor], optional): The span processors to register on the provider.
+
+    Returns:
+        TracerProvider: A tracer provider sampling `settings.sampling_ratio` of the root traces.
+    """  # noqa: E501
+
+    provider = TracerProvider(sampler=ParentBased(TraceIdRatioBased(settings.sampling_ratio)))
+    for span_processor in span_processors:
+        provider.add_span_processor(span_processor)
+    return provider
+
+
+def set_tracer_provider(provider: trace.TracerProvider | None) -> None:
+    """
+    Sets the tracer provider used by the manual spans of the service, in place of the global one.
+    Unlike `opentelemetry.trace.set_tracer_provider` it can be called more than once; pass None to
+    go back to the global provider.
+    """  # noqa: E501
+
+    global _tracer_provider
+    _tracer_provider = provider
+
+
+def get_tracer() -> trace.Tracer:
+    provider = _tracer_provider if _tracer_provider is not None else trace.get_tracer_provider()
+    return provider.get_tracer(INSTRUMENTATION_NAME)
+
+
+@lru_cache(maxsize=8)
+def _compile_excluded_urls(excluded_urls: str) -> re.Pattern | None:
+    patterns = [pattern.strip() for pattern in excluded_urls.split(",") if pattern.strip()]
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+def is_excluded_url(path: str, settings: TracingSettings | CaptureSettings = tracing_settings) -> bool:
+    """
+    Checks whether the path matches one of the excluded URLs of the settings.
+    Patterns are searched anywhere in the path, like the OpenTelemetry agent does
+    with `OTEL_PYTHON_FASTAPI_EXCLUDED_URLS`.
+    """
+
+    pattern = _compile_excluded_urls(settings.excluded_urls)
+    return pattern is not None and pattern.search(path) is not None
+
+
+@contextmanager
+def suppress_tracing() -> Iterator[None]:
+    """
+    Disables the manual spans for the current context, i.e. for the rest of the request.
+    """
+
+    token = _tracing_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _tracing_suppressed.reset(token)
+
+
+@contextmanager
+def start_span(name: str, attributes: Attributes = None) -> Iterator[Span]:
+    """
+    Starts a span as child of the current one.
+
+    Attributes that are expensive to compute should be set on the yielded span only
+    if `span.is_recording()`, so that they cost nothing when the trace is not sampled.
+
+    Args:
+        name (str): The name of the span.
+        attributes (Attributes, optional): Attributes set when the span is created.
+
+    Yields:
+        Span: The started span, or an invalid non recording span if tracing is suppressed.
+    """  # noqa: E501
+
+    if _tracing_suppressed.get():
+        yield INVALID_SPAN
+        return
+
+    with get_tracer().start_as_current_span(name, attributes=attributes) as span:
+        yield span
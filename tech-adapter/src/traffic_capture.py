@@ -0,0 +1,121 @@
+import dataclasses
+import gzip
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import IO, Iterator
+
+from loguru import logger
+
+from src.settings import CaptureSettings, capture_settings
+from src.telemetry import is_excluded_url, meter
+
+CAPTURE_FILE_SUFFIX = ".ndjson.gz"
+
+_skipped_exchanges = meter.create_counter(
+    "tech_adapter.capture.skipped",
+    description="Exchanges not captured although their path is, by reason (spooled)",
+)
+
+
+@dataclass
+class CapturedExchange:
+    """
+    A request and its response, as written in a line of a capture file.
+    `id` is the correlation id of the request in the logs, and `headers` the request headers
+    replayed besides the content type, e.g. the deadline header.
+    """
+
+    id: str
+    timestamp: float
+    duration: float
+    method: str
+    path: str
+    query: str
+    content_type: str | None
+    request: str
+    status: int
+    response: str
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+class TrafficCapture:
+    """
+    Appends the exchanges to gzip compressed NDJSON files in a local directory.
+
+    Each exchange is flushed as soon as it is written, so the files can be read
+    even if the process dies before closing them. A new file is started once the
+    current one reaches `max_file_bytes` uncompressed bytes, and only the newest
+    `max_files` files are kept.
+    """  # noqa: E501
+
+    def __init__(self, settings: CaptureSettings) -> None:
+        self.settings = settings
+        self._lock = Lock()
+        self._file: IO[str] | None = None
+        self._file_bytes = 0
+
+    def is_captured(self, path: str) -> bool:
+        return not is_excluded_url(path, self.settings)
+
+    def skip(self, reason: str) -> None:
+        """
+        Counts an exchange that is not captured, e.g. a request whose descriptor was spooled.
+        """
+
+        _skipped_exchanges.add(1, {"reason": reason})
+
+    def record(self, exchange: CapturedExchange) -> None:
+        line = json.dumps(dataclasses.asdict(exchange)) + "\n"
+        with self._lock:
+            try:
+                if self._file is None or self._file_bytes >= self.settings.max_file_bytes:
+                    self._rotate()
+                assert self._file is not None
+                self._file.write(line)
+                self._file.flush()
+                self._file_bytes += len(line)
+            except OSError as e:
+                logger.warning("Unable to capture request {}: {}", exchange.id, e)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self.settings.directory.mkdir(parents=True, exist_ok=True)
+        path = self.settings.directory / f"capture-{time.time_ns()}{CAPTURE_FILE_SUFFIX}"
+        # Bodies may carry sensitive data, so the files are readable by the owner only
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._file_bytes = 0
+        files = sorted(self.settings.directory.glob(f"capture-*{CAPTURE_FILE_SUFFIX}"))
+        for old in files[: -self.settings.max_files]:
+            old.unlink(missing_ok=True)
+
+
+def read_capture(path: Path) -> Iterator[CapturedExchange]:
+    """
+    Reads the exchanges of a capture file, or of all the capture files of a directory in order.
+    A file whose writer has not been closed is read up to its last complete line.
+    """  # noqa: E501
+
+    paths = sorted(path.glob(f"capture-*{CAPTURE_FILE_SUFFIX}")) if path.is_dir() else [path]
+    for file in paths:
+        with gzip.open(file, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    if line.endswith("\n"):
+                        yield CapturedExchange(**json.loads(line))
+            except EOFError:
+                pass
+
+
+traffic_capture = TrafficCapture(capture_settings)
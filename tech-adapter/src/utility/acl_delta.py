@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+from typing import AbstractSet, Iterable, Iterator
+
+
+def _batches(identities: AbstractSet[str], size: int) -> Iterator[list[str]]:
+    # Sorted, so that the same delta always gives the same operations
+    ordered = sorted(identities)
+    for start in range(0, len(ordered), size):
+        yield ordered[start : start + size]
+
+
+@dataclass(frozen=True)
+class AclDelta:
+    """
+    The identities (users and groups) to grant and to revoke to move from the last applied ACL of a component to the requested one.
+
+    `current` is the whole requested identity set, to be stored once the delta is applied.
+    """  # noqa: E501
+
+    added: frozenset[str]
+    removed: frozenset[str]
+    current: frozenset[str]
+
+    def is_empty(self) -> bool:
+        return not self.added and not self.removed
+
+    def grant_batches(self, size: int) -> Iterator[list[str]]:
+        """
+        Yields the identities to grant, at most `size` at a time.
+        """
+
+        return _batches(self.added, size)
+
+    def revoke_batches(self, size: int) -> Iterator[list[str]]:
+        """
+        Yields the identities to revoke, at most `size` at a time.
+        """
+
+        return _batches(self.removed, size)
+
+
+def compute_acl_delta(previous: AbstractSet[str] | None, refs: Iterable[str]) -> AclDelta:
+    """
+    Computes the identities added and removed from the last applied identity set of a component.
+
+    Args:
+        previous (AbstractSet[str] | None): The last applied identity set, None if no ACL was applied yet.
+        refs (Iterable[str]): The requested identities; duplicates are ignored.
+
+    Returns:
+        AclDelta: The identities to grant and to revoke. Without a previous set, every requested
+            identity is granted and none is revoked.
+    """  # noqa: E501
+
+    current = frozenset(refs)
+    if previous is None:
+        return AclDelta(added=current, removed=frozenset(), current=current)
+    return AclDelta(added=current - previous, removed=frozenset(previous - current), current=current)
@@ -0,0 +1,263 @@
+from typing import Any, Callable
+
+import yaml
+from yaml.constructor import SafeConstructor
+from yaml.events import (
+    AliasEvent,
+    CollectionStartEvent,
+    DocumentEndEvent,
+    DocumentStartEvent,
+    Event,
+    MappingEndEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+    StreamEndEvent,
+    StreamStartEvent,
+)
+from yaml.resolver import Resolver
+
+from src.settings import DescriptorLimitsSettings, descriptor_limits_settings
+from src.utility.yaml_loader import DescriptorLimitExceeded, GuardedComposer, TextStream, check_size
+
+_MAP_TAGS = (None, "tag:yaml.org,2002:map")
+_SEQ_TAGS = (None, "tag:yaml.org,2002:seq")
+
+
+class _UnusualLayout(Exception):
+    pass
+
+
+class _EventBuffer:
+    """
+    Replays a list of events with the interface of a `yaml.parser.Parser`.
+    """
+
+    def __init__(self, events: list[Event]) -> None:
+        self.events = events
+        self.index = 0
+
+    def check_event(self, *choices) -> bool:
+        if self.index >= len(self.events):
+            return False
+        return not choices or isinstance(self.events[self.index], choices)
+
+    def peek_event(self) -> Event | None:
+        return self.events[self.index] if self.index < len(self.events) else None
+
+    def get_event(self) -> Event | None:
+        event = self.peek_event()
+        self.index += 1
+        return event
+
+
+class _SubtreeLoader(GuardedComposer, SafeConstructor, Resolver):
+    """
+    Builds the Python object of a single node of a document, reading its events from a parser or an `_EventBuffer`.
+
+    Anchors are shared by the nodes loaded by the same instance, so an alias to a node that
+    was skipped is reported as an undefined alias.
+    """  # noqa: E501
+
+    def __init__(self, settings: DescriptorLimitsSettings) -> None:
+        GuardedComposer.__init__(self)
+        SafeConstructor.__init__(self)
+        Resolver.__init__(self)
+        self.settings = settings
+        self.events: Any = None
+
+    def check_event(self, *choices) -> bool:
+        return self.events.check_event(*choices)
+
+    def peek_event(self) -> Event:
+        return self.events.peek_event()
+
+    def get_event(self) -> Event:
+        return self.events.get_event()
+
+    def load(self, events: Any, depth: int) -> Any:
+        """
+        Loads the node starting at the next event of `events`, nested at `depth` in the document.
+        """  # noqa: E501
+
+        self.events = events
+        self._depth = depth - 1
+        node = self.compose_node(None, None)
+        return self.construct_document(node)
+
+
+class _Extraction:
+    """
+    A single pass over the events of a COMPONENT_DESCRIPTOR.
+
+    The fields of `dataProduct` are loaded, except `components`: once `componentIdToProvision`
+    is known, the events of each component are buffered until its `id` is read, and only
+    the matching one is loaded, while the others are skipped without building anything.
+    """  # noqa: E501
+
+    def __init__(self, parser: Any, settings: DescriptorLimitsSettings, component_id: Any) -> None:
+        self.parser = parser
+        self.settings = settings
+        self.loader = _SubtreeLoader(settings)
+        self.component_id = component_id
+        self.header: dict[Any, Any] = {}
+        self.component: dict | None = None
+
+    def run(self) -> None:
+        self._expect(StreamStartEvent)
+        self._expect(DocumentStartEvent)
+        self._expect(MappingStartEvent, _MAP_TAGS)
+        while not self.parser.check_event(MappingEndEvent):
+            key = self._key()
+            if key == "componentIdToProvision":
+                self.component_id = self.loader.load(self.parser, 2)
+            elif key == "dataProduct":
+                self._data_product()
+            else:
+                self._skip(2)
+        self.parser.get_event()
+        self._expect(DocumentEndEvent)
+        # More than one document is an error of the full parse
+        self._expect(StreamEndEvent)
+
+    def _data_product(self) -> None:
+        self._expect(MappingStartEvent, _MAP_TAGS)
+        while not self.parser.check_event(MappingEndEvent):
+            key = self._key()
+            if key == "components":
+                self._components()
+            else:
+                self.header[key] = self.loader.load(self.parser, 3)
+        self.parser.get_event()
+
+    def _components(self) -> None:
+        self._expect(SequenceStartEvent, _SEQ_TAGS)
+        while not self.parser.check_event(SequenceEndEvent):
+            if self.component_id is None or self.component is not None:
+                self._skip(4)
+                continue
+            events = self._component_events()
+            if events is not None:
+                component = self.loader.load(_EventBuffer(events), 4)
+                if not isinstance(component, dict):
+                    raise _UnusualLayout()
+                self.component = component
+        self.parser.get_event()
+
+    def _component_events(self) -> list[Event] | None:
+        """
+        Returns the events of the next component if it is the one to provision, or skips it.
+        """  # noqa: E501
+
+        events = [self._expect(MappingStartEvent, _MAP_TAGS)]
+        found = False
+        while not self.parser.check_event(MappingEndEvent):
+            key = self.parser.get_event()
+            if not isinstance(key, ScalarEvent) or key.value == "<<":
+                raise _UnusualLayout()
+            events.append(key)
+            if key.value == "id":
+                value = self._expect(ScalarEvent)
+                events.append(value)
+                if value.value != self.component_id:
+                    while not self.parser.check_event(MappingEndEvent):
+                        self._skip(5)
+                    self.parser.get_event()
+                    return None
+                found = True
+            else:
+                events.extend(self._subtree(5, keep=True))
+        events.append(self.parser.get_event())
+        return events if found else None
+
+    def _key(self) -> str:
+        event = self.parser.get_event()
+        # Merge keys and complex keys are only resolved by the full parse
+        if not isinstance(event, ScalarEvent) or event.value == "<<":
+            raise _UnusualLayout()
+        return event.value
+
+    def _expect(self, event_type: type, tags: tuple[str | None, ...] | None = None) -> Any:
+        event = self.parser.get_event()
+        if not isinstance(event, event_type) or (tags is not None and getattr(event, "tag", None) not in tags):
+            raise _UnusualLayout()
+        return event
+
+    def _skip(self, depth: int) -> None:
+        self._subtree(depth, keep=False)
+
+    def _subtree(self, depth: int, keep: bool) -> list[Event]:
+        """
+        Reads the events of the node nested at `depth`, keeping them if `keep`.
+        """
+
+        event = self.parser.get_event()
+        events = [event] if keep else []
+        if isinstance(event, (ScalarEvent, AliasEvent)):
+            return events
+        level = 1
+        while level:
+            if depth + level - 1 > self.settings.max_depth:
+                raise DescriptorLimitExceeded(f"The descriptor is nested deeper than {self.settings.max_depth} levels")
+            event = self.parser.get_event()
+            if keep:
+                events.append(event)
+            if isinstance(event, CollectionStartEvent):
+                level += 1
+            elif isinstance(event, (MappingEndEvent, SequenceEndEvent)):
+                level -= 1
+        return events
+
+
+def _parse(data: str | TextStream) -> Any:
+    return yaml.cyaml.CParser(data)  # type: ignore[attr-defined]
+
+
+def extract_component(
+    open_descriptor: Callable[[], str | TextStream],
+    settings: DescriptorLimitsSettings = descriptor_limits_settings,
+) -> tuple[dict, Any] | None:
+    """
+    Extracts the data product and the component to provision from a COMPONENT_DESCRIPTOR, without loading the other components.
+
+    The descriptor is read as a stream of YAML events by libyaml: only the fields of the data
+    product and the component whose `id` is `componentIdToProvision` are built as Python
+    objects, so the time to extract them hardly depends on the size of the data product.
+    When `componentIdToProvision` follows `dataProduct`, as it usually does, the events are
+    read a second time to extract the component.
+
+    Args:
+        open_descriptor (Callable[[], str | TextStream]): Returns the descriptor, called once per pass.
+        settings (DescriptorLimitsSettings): The limits on the size and shape of the descriptor.
+
+    Returns:
+        tuple[dict, Any] | None: The data product, whose `components` only hold the component
+            to provision, and `componentIdToProvision`. None if libyaml is not available, or the
+            descriptor has a layout that needs a full parse: e.g. it is not valid YAML, has merge
+            keys or aliases outside of the component, or no component has that id.
+
+    Raises:
+        DescriptorLimitExceeded: If the descriptor exceeds any of the limits.
+    """  # noqa: E501
+
+    if not yaml.__with_libyaml__:
+        return None
+    component_id = None
+    for _ in range(2):
+        data = open_descriptor()
+        check_size(data, settings)
+        parser = _parse(data)
+        extraction = _Extraction(parser, settings, component_id)
+        try:
+            extraction.run()
+        except (_UnusualLayout, yaml.YAMLError):
+            return None
+        finally:
+            parser.dispose()
+        if extraction.component is not None:
+            return {**extraction.header, "components": [extraction.component]}, extraction.component_id
+        if extraction.component_id is None or component_id is not None:
+            return None
+        component_id = extraction.component_id
+    return None
@@ -0,0 +1,101 @@
+import hashlib
+import json
+from typing import Any, Mapping
+
+from src.models.data_product_descriptor import Component, DataProduct
+
+# Part of every fingerprint, to be changed whenever the canonical form changes,
+# so that fingerprints stored by a previous version never match
+FINGERPRINT_VERSION = "2"
+
+
+def _digest(data: Any) -> str:
+    # Sorted keys and no whitespace: the fingerprint only depends on the content
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def component_fingerprint(component: Component) -> str:
+    """
+    Returns the canonical hash of a component, computed once and cached on the model.
+
+    The hash is computed on the parsed model, so it does not depend on the key order,
+    whitespace or formatting of the descriptor, nor on fields that are omitted rather
+    than set to their default. The models keep the fields they do not declare, which
+    count as well. Models are expected not to be changed once fingerprinted.
+
+    Args:
+        component (Component): The component.
+
+    Returns:
+        str: The SHA-256 of the canonical JSON of the component, as hex.
+    """  # noqa: E501
+
+    if component._fingerprint is None:
+        component._fingerprint = _digest([FINGERPRINT_VERSION, component.model_dump(mode="json", by_alias=True)])
+    return component._fingerprint
+
+
+def component_fingerprints(data_product: DataProduct) -> dict[str, str]:
+    """
+    Returns the fingerprint of each component of a data product, by component id.
+    """
+
+    return {component.id: component_fingerprint(component) for component in data_product.components}
+
+
+def data_product_fingerprint(data_product: DataProduct) -> str:
+    """
+    Returns the canonical hash of a data product, computed once and cached on the model.
+
+    The hash combines the fields of the data product with the fingerprints of its components,
+    sorted by id, so every component is serialized once, and only once across the fingerprints
+    of the data product and of its components. The order of the components does not count.
+
+    Args:
+        data_product (DataProduct): The data product.
+
+    Returns:
+        str: The SHA-256 of the canonical JSON of the data product, as hex.
+    """  # noqa: E501
+
+    if data_product._fingerprint is None:
+        header = data_product.model_dump(mode="json", by_alias=True, exclude={"components"})
+        components = sorted(component_fingerprints(data_product).items())
+        data_product._fingerprint = _digest([FINGERPRINT_VERSION, header, components])
+    return data_product._fingerprint
+
+
+def provisioning_fingerprint(data_product: DataProduct, component_id: str) -> str | None:
+    """
+    Returns the canonical hash of what the provisioning of a component depends on:
+    the fields of its data product and the component itself, but not the other components.
+
+    Args:
+        data_product (DataProduct): The data product.
+        component_id (str): The id of the component to provision.
+
+    Returns:
+        str | None: The SHA-256 of the canonical JSON, as hex. None if the data product has no such component.
+    """  # noqa: E501
+
+    component = data_product.get_component_by_id(component_id)
+    if component is None:
+        return None
+    header = data_product.model_dump(mode="json", by_alias=True, exclude={"components"})
+    return _digest([FINGERPRINT_VERSION, header, component_id, component_fingerprint(component)])
+
+
+def changed_components(previous: Mapping[str, str], current: Mapping[str, str]) -> set[str]:
+    """
+    Compares two results of `component_fingerprints`.
+
+    Returns:
+        set[str]: The ids of the components added, removed or changed from `previous` to `current`.
+    """  # noqa: E501
+
+    return {
+        component_id
+        for component_id in previous.keys() | current.keys()
+        if previous.get(component_id) != current.get(component_id)
+    }
@@ -1,11 +1,13 @@
 from typing import Type, TypeVar
 
 import pydantic
-import yaml
 from loguru import logger
 from pydantic import BaseModel
 
+from src.memory import memory_stage
 from src.models.api_models import ValidationError
+from src.telemetry import start_span
+from src.utility.yaml_loader import DescriptorLimitExceeded, load_yaml, utf8_size
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -55,11 +57,20 @@ def parse_yaml_with_model(yaml_data: dict | str, model: Type[T]) -> T | Validati
     """  # noqa: E501
     try:
         if isinstance(yaml_data, str):
-            yaml_dict = yaml.safe_load(yaml_data)
+            with start_span("descriptor.parse_yaml") as span, memory_stage("parse"):
+                if span.is_recording():
+                    span.set_attribute("descriptor.bytes", utf8_size(yaml_data))
+                yaml_dict = load_yaml(yaml_data)
         else:
             yaml_dict = yaml_data
 
-        data = model(**yaml_dict)
+        span_attributes = {"model.name": model.__name__}
+        with start_span("descriptor.validate", attributes=span_attributes) as span, memory_stage("validate"):
+            data = model(**yaml_dict)
+            if span.is_recording():
+                components = getattr(data, "components", None)
+                if isinstance(components, list):
+                    span.set_attribute("data_product.components", len(components))
         return data
     except pydantic.ValidationError as ve:
         error_msg = "Failed to parse the descriptor. Details: \n"
@@ -74,6 +85,9 @@ def parse_yaml_with_model(yaml_data: dict | str, model: Type[T]) -> T | Validati
             )
         ]
         return ValidationError(errors=combined)
+    except DescriptorLimitExceeded as e:
+        logger.warning("Rejected descriptor: {}", e)
+        return ValidationError(errors=["The descriptor exceeds the limits of the service.", str(e)])
     except Exception as e:
         logger.exception("Unexpected error")
         raise e
@@ -0,0 +1,194 @@
+import json
+import re
+from typing import Any, Callable, Protocol
+
+import yaml
+from yaml.composer import Composer
+from yaml.events import AliasEvent
+from yaml.nodes import MappingNode, Node, SequenceNode
+
+from src.settings import DescriptorLimitsSettings, descriptor_limits_settings
+
+try:
+    import orjson
+
+    _json_loads: Callable[[str], Any] = orjson.loads
+except ImportError:  # pragma: no cover
+    _json_loads = json.loads
+
+_JSON_OBJECT = re.compile(r"\s*\{")
+
+
+class DescriptorLimitExceeded(ValueError):
+    """
+    Raised when a descriptor exceeds one of the limits configured in `DescriptorLimitsSettings`.
+    """
+
+
+def utf8_size(text: str) -> int:
+    # Descriptors are almost always ASCII, whose size is known without encoding them
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+class TextStream(Protocol):
+    def read(self, size: int = -1) -> str: ...
+
+
+def check_size(data: str | TextStream, settings: DescriptorLimitsSettings) -> None:
+    # The size of a stream is up to the stream, e.g. `JsonStringReader`
+    if isinstance(data, str) and (len(data) > settings.max_bytes or utf8_size(data) > settings.max_bytes):
+        raise DescriptorLimitExceeded(f"The descriptor is larger than {settings.max_bytes} bytes")
+
+
+class GuardedComposer(Composer):
+    """
+    A `yaml.composer.Composer` that bounds the work done on a document.
+
+    The limits are checked while the document is composed, before any Python object
+    is constructed, and are:
+    - the nesting depth of collections
+    - the number of aliases
+    - the number of nodes of the document once every alias is expanded. Aliases are
+      not copied by the loader, but any code walking the loaded data (validation,
+      serialization, logging) visits an aliased node once per alias, so a few aliases
+      nested on each other (an "alias bomb") can stand for billions of nodes.
+    """  # noqa: E501
+
+    settings: DescriptorLimitsSettings
+    check_event: Callable[..., bool]
+    _depth = 0
+    _aliases = 0
+
+    def compose_node(self, parent: Node | None, index: Any) -> Node | None:
+        if self.check_event(AliasEvent):
+            self._aliases += 1
+            if self._aliases > self.settings.max_aliases:
+                raise DescriptorLimitExceeded(f"The descriptor has more than {self.settings.max_aliases} aliases")
+            node = super().compose_node(parent, index)
+            if getattr(node, "expanded_size", None) is None:
+                raise DescriptorLimitExceeded("The descriptor has a recursive alias")
+            return node
+
+        self._depth += 1
+        if self._depth > self.settings.max_depth:
+            raise DescriptorLimitExceeded(f"The descriptor is nested deeper than {self.settings.max_depth} levels")
+        try:
+            node = super().compose_node(parent, index)
+        finally:
+            self._depth -= 1
+
+        if node is None:
+            return None
+        if isinstance(node, SequenceNode):
+            size = 1 + sum(child.expanded_size for child in node.value)
+        elif isinstance(node, MappingNode):
+            size = 1 + sum(key.expanded_size + value.expanded_size for key, value in node.value)
+        else:
+            size = 1
+        if size > self.settings.max_nodes:
+            raise DescriptorLimitExceeded(f"The descriptor has more than {self.settings.max_nodes} nodes")
+        node.expanded_size = size  # type: ignore[attr-defined]
+        return node
+
+
+class GuardedLoader(GuardedComposer, yaml.SafeLoader):
+    """
+    A `yaml.SafeLoader` that bounds the work done on a document, see `GuardedComposer`.
+    """
+
+    def __init__(self, stream, settings: DescriptorLimitsSettings) -> None:
+        super().__init__(stream)
+        self.settings = settings
+
+
+def load_yaml(data: str | TextStream, settings: DescriptorLimitsSettings = descriptor_limits_settings) -> Any:
+    """
+    Loads a YAML document like `yaml.safe_load`, within the limits of `settings`.
+
+    Args:
+        data (str | TextStream): The YAML document, or a stream reading it. A stream is not checked
+            against `max_bytes`, which is up to the stream, e.g. `JsonStringReader`.
+        settings (DescriptorLimitsSettings): The limits on the size and shape of the document.
+
+    Returns:
+        Any: The loaded document.
+
+    Raises:
+        DescriptorLimitExceeded: If the document exceeds any of the limits.
+        yaml.YAMLError: If the document is not valid YAML.
+    """  # noqa: E501
+
+    check_size(data, settings)
+    loader = GuardedLoader(data, settings)
+    try:
+        return loader.get_single_data()
+    finally:
+        loader.dispose()
+
+
+def is_json_object(data: str | TextStream) -> bool:
+    """
+    Tells whether a descriptor looks like a JSON object, from its first character only.
+    """
+
+    return isinstance(data, str) and _JSON_OBJECT.match(data) is not None
+
+
+def _check_json_shape(value: Any, settings: DescriptorLimitsSettings) -> None:
+    """
+    Checks the nesting depth and the nodes of a decoded JSON document, one level at a time.
+    """
+
+    containers = [value] if isinstance(value, (dict, list)) else []
+    depth = 0
+    nodes = 1
+    while containers:
+        depth += 1
+        if depth > settings.max_depth:
+            raise DescriptorLimitExceeded(f"The descriptor is nested deeper than {settings.max_depth} levels")
+        children = []
+        for container in containers:
+            if isinstance(container, dict):
+                nodes += 2 * len(container)
+                children.extend([child for child in container.values() if isinstance(child, (dict, list))])
+            else:
+                nodes += len(container)
+                children.extend([child for child in container if isinstance(child, (dict, list))])
+        if nodes > settings.max_nodes:
+            raise DescriptorLimitExceeded(f"The descriptor has more than {settings.max_nodes} nodes")
+        containers = children
+
+
+def load_descriptor(data: str | TextStream, settings: DescriptorLimitsSettings = descriptor_limits_settings) -> Any:
+    """
+    Loads a descriptor, decoding it with a JSON parser (orjson, if installed) when it looks like a JSON object.
+
+    The JSON parser is many times faster than `load_yaml`, and gives the same strings, integers,
+    booleans and nulls. Numbers in exponent notation may differ: JSON decodes `1e3` as a float,
+    while the YAML 1.1 resolver of `load_yaml` only does with a dot and a signed exponent, as in
+    `1.0e+3`, and keeps `1e3` a string.
+    A descriptor that is not valid JSON, e.g. YAML in flow style, is loaded by `load_yaml`.
+    The limits of `settings` apply to JSON descriptors too, except the aliases JSON does not have.
+
+    Args:
+        data (str | TextStream): The descriptor, or a stream reading it. Streams are loaded by `load_yaml`.
+        settings (DescriptorLimitsSettings): The limits on the size and shape of the descriptor.
+
+    Returns:
+        Any: The loaded descriptor.
+
+    Raises:
+        DescriptorLimitExceeded: If the descriptor exceeds any of the limits.
+        yaml.YAMLError: If the descriptor is neither valid JSON nor valid YAML.
+    """  # noqa: E501
+
+    if is_json_object(data):
+        check_size(data, settings)
+        try:
+            loaded = _json_loads(data)  # type: ignore[arg-type]
+        except (ValueError, RecursionError):
+            # e.g. YAML in flow style, or JSON too deep for the recursion of the stdlib parser
+            return load_yaml(data, settings)
+        _check_json_shape(loaded, settings)
+        return loaded
+    return load_yaml(data, settings)
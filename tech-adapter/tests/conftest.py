@@ -0,0 +1,32 @@
+import pytest
+from opentelemetry import metrics
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+# The global meter provider can only be set once per process, so all the tests share
+# the same reader. Metrics are cumulative: compare values before and after an action.
+_metric_reader = InMemoryMetricReader()
+metrics.set_meter_provider(MeterProvider(metric_readers=[_metric_reader]))
+
+
+def collect_data_points(name: str) -> list:
+    """
+    Returns the data points currently recorded for the metric with the given name.
+    """
+
+    data = _metric_reader.get_metrics_data()
+    if data is None:
+        return []
+    return [
+        data_point
+        for resource_metrics in data.resource_metrics
+        for scope_metrics in resource_metrics.scope_metrics
+        for metric in scope_metrics.metrics
+        if metric.name == name
+        for data_point in metric.data.data_points
+    ]
+
+
+@pytest.fixture
+def data_points():
+    return collect_data_points
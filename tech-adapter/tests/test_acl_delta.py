@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.encoders import jsonable_encoder
+from starlette.testclient import TestClient
+
+from src import main
+from src.main import app
+from src.models.api_models import ProvisionInfo, UpdateAclRequest
+from src.provisioning_store import ProvisioningStore
+from src.settings import ProvisioningStoreSettings, acl_settings
+from src.utility.acl_delta import compute_acl_delta
+
+descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+component_id = "urn:dmb:cmp:healthcare:vaccinations:0:snowflake-output-port"
+
+
+class TestComputeAclDelta(unittest.TestCase):
+    def test_added_and_removed(self):
+        delta = compute_acl_delta({"user:alice", "user:bob", "group:dev"}, ["user:bob", "group:dev", "user:carol"])
+
+        self.assertEqual(delta.added, {"user:carol"})
+        self.assertEqual(delta.removed, {"user:alice"})
+        self.assertEqual(delta.current, {"user:bob", "group:dev", "user:carol"})
+        self.assertFalse(delta.is_empty())
+
+    def test_unchanged(self):
+        delta = compute_acl_delta({"user:alice", "user:bob"}, ["user:bob", "user:alice", "user:bob"])
+
+        self.assertTrue(delta.is_empty())
+
+    def test_first_acl(self):
+        delta = compute_acl_delta(None, ["user:alice", "user:alice", "group:dev"])
+
+        self.assertEqual(delta.added, {"user:alice", "group:dev"})
+        self.assertEqual(delta.removed, set())
+
+    def test_batches(self):
+        previous = {f"user:{i:04}" for i in range(2500)}
+        current = [f"user:{i:04}" for i in range(1000, 4200)]
+        delta = compute_acl_delta(previous, current)
+
+        grants = list(delta.grant_batches(500))
+        revokes = list(delta.revoke_batches(500))
+
+        self.assertEqual([len(batch) for batch in grants], [500, 500, 500, 200])
+        self.assertEqual([len(batch) for batch in revokes], [500, 500])
+        self.assertEqual(sum(grants, []), [f"user:{i:04}" for i in range(2500, 4200)])
+        self.assertEqual(sum(revokes, []), [f"user:{i:04}" for i in range(1000)])
+        self.assertEqual(list(compute_acl_delta(previous, previous).grant_batches(500)), [])
+
+
+class TestUpdateAclDelta(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ProvisioningStore(ProvisioningStoreSettings(path=Path(self.directory.name) / "store.sqlite3"))
+        self.client = TestClient(app)
+        for patcher in (
+            patch.object(main, "provisioning_store", self.store),
+            patch.object(acl_settings, "delta_enabled", True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def update_acl(self, refs: list[str]):
+        request = UpdateAclRequest(provisionInfo=ProvisionInfo(request=descriptor_str, result=""), refs=refs)
+        return self.client.post("/v1/updateacl", json=jsonable_encoder(request))
+
+    def test_delta_from_the_stored_identities(self):
+        self.store.put_identities(component_id, ["user:alice", "user:bob"])
+
+        with patch.object(main, "compute_acl_delta", wraps=compute_acl_delta) as compute:
+            resp = self.update_acl(["user:bob", "user:carol"])
+
+        self.assertEqual(resp.status_code, 500)
+        compute.assert_called_once_with({"user:alice", "user:bob"}, ["user:bob", "user:carol"])
+        # The identities are stored only once the ACL is applied
+        self.assertEqual(self.store.get_identities(component_id), {"user:alice", "user:bob"})
+
+    def test_disabled(self):
+        self.store.put_identities(component_id, ["user:alice"])
+
+        with patch.object(acl_settings, "delta_enabled", False), patch.object(
+            main, "compute_acl_delta", wraps=compute_acl_delta
+        ) as compute:
+            self.update_acl(["user:bob"])
+
+        compute.assert_called_once_with(None, ["user:bob"])
@@ -0,0 +1,115 @@
+import asyncio
+import unittest
+
+from perf.simulated_backend import SimulatedBackend, SimulatedBackendError
+from src.adaptive_limit import AimdLimiter
+from src.scheduling import FairScheduler
+from src.settings import AdaptiveConcurrencySettings, SchedulingSettings
+
+
+def limiter(**settings) -> AimdLimiter:
+    defaults = {"enabled": True, "initial_limit": 4, "min_limit": 1, "max_limit": 20, "latency_threshold_seconds": 1}
+    return AimdLimiter(AdaptiveConcurrencySettings(**{**defaults, **settings}))
+
+
+async def load(fair_scheduler: FairScheduler, backend: SimulatedBackend, operations: int, clients: int) -> int:
+    """
+    Runs `operations` calls to the backend from `clients` concurrent clients, and returns the number of failures.
+    """  # noqa: E501
+
+    remaining = iter(range(operations))
+    failures = 0
+
+    async def client():
+        nonlocal failures
+        for _ in remaining:
+            try:
+                await fair_scheduler.run("domain", "data product", backend.call)
+            except SimulatedBackendError:
+                failures += 1
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return failures
+
+
+class TestAimdLimiter(unittest.TestCase):
+    def test_additive_increase_when_in_use(self):
+        aimd = limiter()
+
+        aimd.on_complete(0.1, failed=False, in_flight=2)
+        self.assertEqual(aimd.limit, 5)
+        # Less than half of the limit in use
+        aimd.on_complete(0.1, failed=False, in_flight=2)
+        self.assertEqual(aimd.limit, 5)
+
+    def test_multiplicative_decrease(self):
+        aimd = limiter(initial_limit=10, backoff_ratio=0.5)
+
+        aimd.on_complete(0.1, failed=True, in_flight=10)
+        self.assertEqual(aimd.limit, 5)
+        aimd.on_complete(2.0, failed=False, in_flight=5)
+        self.assertEqual(aimd.limit, 2)
+
+    def test_bounds(self):
+        aimd = limiter(initial_limit=3, min_limit=2, max_limit=4)
+
+        for _ in range(10):
+            aimd.on_complete(0.1, failed=False, in_flight=4)
+        self.assertEqual(aimd.limit, 4)
+        for _ in range(10):
+            aimd.on_complete(0.1, failed=True, in_flight=4)
+        self.assertEqual(aimd.limit, 2)
+
+    def test_limit_follows_the_capacity_of_the_backend(self):
+        # The latency exceeds the threshold once more than 6 operations run at the same time
+        backend = SimulatedBackend(capacity=4, base_latency_seconds=0.01)
+        aimd = limiter(initial_limit=1, latency_threshold_seconds=0.015)
+
+        backend.simulate(aimd, operations=300, clients=30)
+
+        self.assertGreaterEqual(aimd.limit, 3)
+        self.assertLessEqual(aimd.limit, 8)
+        # Without the limit, the 30 clients would all be in flight
+        self.assertLess(backend.max_in_flight, 20)
+
+
+class TestAdaptiveScheduling(unittest.TestCase):
+    def scheduler(self, aimd: AimdLimiter) -> FairScheduler:
+        return FairScheduler(SchedulingSettings(enabled=True, max_concurrency=100), aimd)
+
+    def test_limit_drops_when_the_backend_degrades(self):
+        backend = SimulatedBackend(capacity=10, base_latency_seconds=0.005)
+        aimd = limiter(initial_limit=10, latency_threshold_seconds=0.05)
+        fair_scheduler = self.scheduler(aimd)
+
+        asyncio.run(load(fair_scheduler, backend, operations=100, clients=20))
+        healthy = aimd.limit
+        backend.base_latency_seconds = 0.06
+        asyncio.run(load(fair_scheduler, backend, operations=40, clients=20))
+
+        self.assertGreaterEqual(healthy, 10)
+        self.assertEqual(aimd.limit, 1)
+
+    def test_failures_lower_the_limit(self):
+        backend = SimulatedBackend(capacity=100, base_latency_seconds=0.001, error_rate=1.0)
+        aimd = limiter(initial_limit=10)
+
+        failures = asyncio.run(load(self.scheduler(aimd), backend, operations=30, clients=10))
+
+        self.assertEqual(failures, 30)
+        self.assertEqual(aimd.limit, 1)
+
+    def test_failed_results(self):
+        aimd = limiter(initial_limit=10, backoff_ratio=0.5)
+
+        asyncio.run(self.scheduler(aimd).run("domain", "data product", lambda: "error", failed=lambda r: r == "error"))
+
+        self.assertEqual(aimd.limit, 5)
+
+    def test_disabled(self):
+        aimd = limiter(enabled=False, initial_limit=1)
+        fair_scheduler = self.scheduler(aimd)
+
+        self.assertEqual(fair_scheduler.max_concurrency, 100)
+        asyncio.run(fair_scheduler.run("domain", "data product", lambda: None, failed=lambda r: True))
+        self.assertEqual(aimd.limit, 1)
@@ -0,0 +1,38 @@
+import unittest
+
+from perf.benchmarks import Case, collect_cases, compare, measure
+
+
+def results(**medians) -> dict:
+    return {"results": {case_id: {"median": median} for case_id, median in medians.items()}}
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_case_ids_are_unique(self):
+        cases = collect_cases(quick=False)
+
+        self.assertEqual(len(cases), len({case.id for case in cases}))
+        self.assertIn("parse_yaml_with_model[components=5000,columns=10]", [case.id for case in cases])
+        self.assertIn("parse_yaml_with_model[components=2,columns=10000]", [case.id for case in cases])
+
+    def test_case_id(self):
+        case = Case("check_response", {"errors": 1, "kind": "x"}, lambda: lambda: None)
+
+        self.assertEqual(case.id, "check_response[errors=1,kind=x]")
+
+    def test_measure(self):
+        result = measure(lambda: None, repeat=3, budget=0.1)
+
+        self.assertEqual(result["repeat"], 3)
+        self.assertLessEqual(result["min"], result["median"])
+
+    def test_quick_cases_run(self):
+        for case in collect_cases(quick=True):
+            if case.params.get("components") == 1 or case.name.startswith("check_response"):
+                case.setup()()
+
+    def test_compare_flags_regressions_above_threshold(self):
+        baseline = results(a=1.0, b=1.0, c=1.0)
+        current = results(a=1.05, b=1.2, c=0.5, d=9.0)
+
+        self.assertEqual(compare(current, baseline, threshold=0.1), ["b"])
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from starlette.testclient import TestClient
+
+from src.bulk_validation import JsonArraySplitter, MalformedBody, NdjsonSplitter, validate_bulk
+from src.main import app
+from src.models.api_models import ValidationResult
+from src.settings import BulkValidationSettings, descriptor_limits_settings
+
+REQUEST = {"descriptorKind": "COMPONENT_DESCRIPTOR", "descriptor": "a: 1"}
+
+
+def _split(splitter, body: bytes, chunk_size: int) -> list[bytes]:
+    items = []
+    for start in range(0, len(body), chunk_size):
+        items += splitter.feed(body[start : start + chunk_size])
+    return items + splitter.finish()
+
+
+class TestSplitters(unittest.TestCase):
+    def test_json_array_in_any_chunks(self):
+        objects = [{"descriptor": 'tricky "]}{[\\', "nested": [{"i": i}], "text": "é😀"} for i in range(5)]
+        body = json.dumps(objects, indent=2).encode()
+
+        for chunk_size in (1, 2, 7, 64, len(body)):
+            items = _split(JsonArraySplitter(1024), body, chunk_size)
+            self.assertEqual([json.loads(item) for item in items], objects)
+
+    def test_ndjson_skips_blank_lines(self):
+        body = b'{"i": 0}\n\n{"i": 1}\r\n{"i": 2}'
+
+        for chunk_size in (1, 3, len(body)):
+            items = _split(NdjsonSplitter(1024), body, chunk_size)
+            self.assertEqual([json.loads(item) for item in items], [{"i": 0}, {"i": 1}, {"i": 2}])
+
+    def test_malformed_array_returns_the_objects_before_the_error(self):
+        splitter = JsonArraySplitter(1024)
+
+        self.assertEqual(splitter.feed(b'[{"i": 0}, 5]'), [b'{"i": 0}'])
+        with self.assertRaisesRegex(MalformedBody, "instead of '5'"):
+            splitter.feed(b"")
+        with self.assertRaisesRegex(MalformedBody, "not terminated"):
+            _split(JsonArraySplitter(1024), b'[{"i": 0}', 4)
+
+    def test_items_are_limited(self):
+        with self.assertRaisesRegex(MalformedBody, "larger than 8 bytes"):
+            _split(JsonArraySplitter(8), b'[{"descriptor": "long"}]', 4)
+        with self.assertRaisesRegex(MalformedBody, "larger than 8 bytes"):
+            _split(NdjsonSplitter(8), b'{"descriptor": "long"}\n', 4)
+
+
+class TestValidateBulk(unittest.TestCase):
+    def test_body_is_read_as_far_as_the_concurrency_allows(self):
+        settings = BulkValidationSettings(concurrency=2)
+        release = threading.Event()
+        read = []
+
+        def validate(request):
+            release.wait()
+            return ValidationResult(valid=True)
+
+        async def chunks():
+            for index in range(10):
+                read.append(index)
+                yield json.dumps(REQUEST).encode() + b"\n"
+
+        async def run():
+            results = validate_bulk(chunks(), NdjsonSplitter(1024), validate, settings)
+            first = asyncio.ensure_future(anext(results))
+            await asyncio.sleep(0.1)
+            read_while_blocked = len(read)
+            release.set()
+            lines = [await first] + [line async for line in results]
+            return read_while_blocked, lines
+
+        try:
+            read_while_blocked, lines = asyncio.run(run())
+        finally:
+            release.set()
+
+        # Two validations running, and the request of the third chunk waiting for a slot
+        self.assertEqual(read_while_blocked, 3)
+        self.assertEqual(sorted(json.loads(line)["index"] for line in lines), list(range(10)))
+
+
+class TestBulkValidateEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        descriptor = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+        self.requests = [
+            {"descriptorKind": "COMPONENT_DESCRIPTOR", "descriptor": descriptor},
+            {"descriptorKind": "COMPONENT_DESCRIPTOR", "descriptor": "a: ["},
+            {"descriptor": "a: 1"},
+        ]
+
+    def results(self, response) -> dict[int, dict]:
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        results = [json.loads(line) for line in response.text.splitlines()]
+        return {result.pop("index"): result for result in results}
+
+    def assert_results(self, results: dict[int, dict]) -> None:
+        self.assertEqual(set(results), {0, 1, 2})
+        self.assertEqual(results[0]["systemError"], {"error": "Response not yet implemented"})
+        self.assertEqual(results[1]["error"]["errors"][0], "Unable to parse the descriptor.")
+        self.assertEqual(results[2]["error"], {"errors": ["descriptorKind: Field required"]})
+        self.assertFalse(any(result["valid"] for result in results.values()))
+
+    def test_json_array(self):
+        self.assert_results(self.results(self.client.post("/v1/validate/bulk", json=self.requests)))
+
+    def test_ndjson(self):
+        body = "\n".join(json.dumps(request) for request in self.requests)
+
+        response = self.client.post("/v1/validate/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+
+        self.assert_results(self.results(response))
+
+    def test_invalid_lines_are_reported(self):
+        body = json.dumps(self.requests[2]) + "\n{not json"
+
+        results = self.results(
+            self.client.post("/v1/validate/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+        )
+
+        self.assertEqual(set(results), {0, 1})
+        self.assertTrue(results[1]["error"]["errors"][0].startswith("body: Invalid JSON"))
+
+    def test_body_size_is_limited_per_request(self):
+        with patch.object(descriptor_limits_settings, "max_request_bytes", 16):
+            results = self.results(self.client.post("/v1/validate/bulk", json=[REQUEST] * 3))
+            self.assertEqual(self.client.post("/v1/validate", json=REQUEST).status_code, 400)
+
+        self.assertEqual(set(results), {0, 1, 2})
@@ -0,0 +1,119 @@
+import asyncio
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+
+from src import main
+from src.coalescing import Coalescer
+from src.main import app
+from src.models.api_models import ProvisionInfo, UpdateAclRequest
+
+
+async def submit_all(coalescer: Coalescer, operations: list[tuple[str, object]], delay: float = 0.0) -> list:
+    async def submit(key, value):
+        return await coalescer.submit(key, lambda: value)
+
+    tasks = []
+    for key, value in operations:
+        tasks.append(asyncio.create_task(submit(key, value)))
+        await asyncio.sleep(delay)
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class TestCoalescer(unittest.TestCase):
+    def test_last_operation_of_the_window_is_applied_once(self):
+        coalescer = Coalescer("test", 0.05)
+
+        results = asyncio.run(submit_all(coalescer, [("a", 1), ("a", 2), ("a", 3)], delay=0.001))
+
+        self.assertEqual(results, [3, 3, 3])
+        self.assertEqual((coalescer.requests, coalescer.operations), (3, 1))
+
+    def test_keys_are_independent(self):
+        coalescer = Coalescer("test", 0.05)
+
+        results = asyncio.run(submit_all(coalescer, [("a", 1), ("b", 2), ("a", 3)]))
+
+        self.assertEqual(results, [3, 2, 3])
+        self.assertEqual(coalescer.operations, 2)
+
+    def test_exceptions_are_shared(self):
+        coalescer = Coalescer("test", 0.01)
+
+        async def run():
+            def fail():
+                raise ValueError("failed")
+
+            return await asyncio.gather(
+                coalescer.submit("a", lambda: 1), coalescer.submit("a", fail), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+
+        self.assertEqual([type(result) for result in results], [ValueError, ValueError])
+
+    def test_batches_of_a_key_are_applied_in_order(self):
+        coalescer = Coalescer("test", 0.01)
+        applied = []
+
+        def slow(value):
+            def apply():
+                applied.append(("start", value))
+                time.sleep(0.05)
+                applied.append(("end", value))
+                return value
+
+            return apply
+
+        async def run():
+            first = asyncio.create_task(coalescer.submit("a", slow(1)))
+            await asyncio.sleep(0.03)
+            # The first batch is being applied: these join a second one, applied once it completes
+            second = [asyncio.create_task(coalescer.submit("a", slow(value))) for value in (2, 3)]
+            return await asyncio.gather(first, *second)
+
+        self.assertEqual(asyncio.run(run()), [1, 3, 3])
+        self.assertEqual(applied, [("start", 1), ("end", 1), ("start", 3), ("end", 3)])
+        self.assertEqual(coalescer.operations, 2)
+
+    def test_cancelled_caller_does_not_cancel_the_batch(self):
+        coalescer = Coalescer("test", 0.02)
+
+        async def run():
+            first = asyncio.create_task(coalescer.submit("a", lambda: 1))
+            second = asyncio.create_task(coalescer.submit("a", lambda: 2))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()), 2)
+
+
+class TestCoalescedUpdateAcl(unittest.TestCase):
+    def test_requests_for_the_same_component_share_the_outcome(self):
+        descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+        coalescer = Coalescer("updateacl", 0.2)
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                requests = [
+                    UpdateAclRequest(provisionInfo=ProvisionInfo(request=descriptor_str, result=""), refs=[f"user:{i}"])
+                    for i in range(5)
+                ]
+                return await asyncio.gather(
+                    *(client.post("/v1/updateacl", json=jsonable_encoder(request)) for request in requests)
+                )
+
+        with patch.object(main, "acl_coalescer", coalescer), patch.object(
+            main, "apply_acl", wraps=main.apply_acl
+        ) as apply_acl:
+            responses = asyncio.run(run())
+
+        self.assertEqual({response.status_code for response in responses}, {500})
+        self.assertEqual(apply_acl.call_count, 1)
+        self.assertEqual((coalescer.requests, coalescer.operations), (5, 1))
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+
+from perf.descriptor_generator import DescriptorGenerator, GeneratorConfig, to_yaml
+from src import dependencies
+from src.dependencies import unpack_component_provisioning_request
+from src.models.api_models import DescriptorKind, ProvisioningRequest
+from src.models.data_product_descriptor import DataProduct
+from src.settings import DescriptorLimitsSettings, component_extraction_settings
+from src.utility import component_extraction
+from src.utility.component_extraction import extract_component
+from src.utility.yaml_loader import DescriptorLimitExceeded
+
+descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+
+
+def expected(descriptor: str) -> tuple[dict, str]:
+    loaded = yaml.safe_load(descriptor)
+    component_id = loaded["componentIdToProvision"]
+    data_product = loaded["dataProduct"]
+    data_product["components"] = [c for c in data_product["components"] if c["id"] == component_id]
+    return data_product, component_id
+
+
+def extract(descriptor: str, settings: DescriptorLimitsSettings = DescriptorLimitsSettings()):
+    return extract_component(lambda: descriptor, settings)
+
+
+class TestExtractComponent(unittest.TestCase):
+    def test_same_component_as_the_full_parse(self):
+        self.assertEqual(extract(descriptor_str), expected(descriptor_str))
+
+    def test_generated_descriptors(self):
+        for seed in range(5):
+            config = GeneratorConfig(components=50, columns=5, tag_density=0.5, seed=seed)
+            descriptor = to_yaml(DescriptorGenerator(config).component_descriptor())
+
+            self.assertEqual(extract(descriptor), expected(descriptor))
+
+    def test_component_id_first_takes_a_single_pass(self):
+        loaded = yaml.safe_load(descriptor_str)
+        descriptor = yaml.safe_dump(
+            {"componentIdToProvision": loaded["componentIdToProvision"], "dataProduct": loaded["dataProduct"]},
+            sort_keys=False,
+        )
+
+        with patch.object(component_extraction, "_parse", wraps=component_extraction._parse) as parse:
+            self.assertEqual(extract(descriptor), expected(descriptor))
+        self.assertEqual(parse.call_count, 1)
+
+    def test_id_after_other_fields(self):
+        descriptor = (
+            "dataProduct:\n  name: dp\n  components:\n"
+            "    - {name: a, specific: {x: [1, 2]}, id: a}\n"
+            "    - {name: b, specific: {x: [3, 4]}, id: b}\n"
+            "componentIdToProvision: b\n"
+        )
+
+        self.assertEqual(
+            extract(descriptor),
+            ({"name": "dp", "components": [{"name": "b", "specific": {"x": [3, 4]}, "id": "b"}]}, "b"),
+        )
+
+    def test_aliases_to_loaded_nodes(self):
+        descriptor = (
+            "dataProduct:\n  tags: &tags [a, b]\n  components:\n"
+            "    - {id: a, tags: *tags, x: &x 1, y: *x}\n"
+            "componentIdToProvision: a\n"
+        )
+
+        self.assertEqual(extract(descriptor), expected(descriptor))
+
+    def test_unusual_layouts_need_a_full_parse(self):
+        descriptors = {
+            "merge key": "dataProduct:\n  <<: {name: dp}\n  components: [{id: a}]\ncomponentIdToProvision: a\n",
+            "alias to a skipped component": (
+                "dataProduct:\n  components:\n    - {id: a, x: &x 1}\n    - {id: b, x: *x}\n"
+                "componentIdToProvision: b\n"
+            ),
+            "unknown component": "dataProduct:\n  components: [{id: a}]\ncomponentIdToProvision: b\n",
+            "no component id": "dataProduct:\n  components: [{id: a}]\n",
+            "components not a list": "dataProduct:\n  components: {id: a}\ncomponentIdToProvision: a\n",
+            "not a mapping": "- dataProduct\n",
+            "two documents": "dataProduct:\n  components: [{id: a}]\ncomponentIdToProvision: a\n---\na: 1\n",
+            "invalid YAML": "dataProduct:\n  components: [{id: a}\ncomponentIdToProvision: a\n",
+        }
+        for name, descriptor in descriptors.items():
+            with self.subTest(name):
+                self.assertIsNone(extract(descriptor))
+
+    def test_limits(self):
+        deep = "[" * 20 + "]" * 20
+        descriptor = (
+            f"dataProduct:\n  components:\n    - {{id: a, x: {deep}}}\n    - {{id: b}}\ncomponentIdToProvision: b\n"
+        )
+
+        self.assertIsNotNone(extract(descriptor))
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "deeper than 16 levels"):
+            extract(descriptor, DescriptorLimitsSettings(max_depth=16))
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "larger than 100 bytes"):
+            extract(descriptor, DescriptorLimitsSettings(max_bytes=100))
+
+    def test_without_libyaml(self):
+        with patch.object(yaml, "__with_libyaml__", False):
+            self.assertIsNone(extract(descriptor_str))
+
+
+class TestUnpackComponentProvisioningRequest(unittest.TestCase):
+    request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+
+    def test_only_the_component_to_provision(self):
+        data_product, component_id = asyncio.run(unpack_component_provisioning_request(self.request))
+
+        self.assertIsInstance(data_product, DataProduct)
+        self.assertEqual([component.id for component in data_product.components], [component_id])
+
+    def test_disabled(self):
+        with patch.object(component_extraction_settings, "enabled", False):
+            data_product, _ = asyncio.run(unpack_component_provisioning_request(self.request))
+
+        self.assertEqual(len(data_product.components), 2)
+
+    def test_fallback_to_the_full_parse(self):
+        loaded = yaml.safe_load(descriptor_str)
+        loaded["dataProduct"]["components"][0]["anchored"] = "value"
+        loaded["dataProduct"]["components"][1]["aliased"] = "alias"
+        descriptor = yaml.safe_dump(loaded).replace("anchored: value", "anchored: &v value")
+        descriptor = descriptor.replace("aliased: alias", "aliased: *v")
+        request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor)
+
+        with patch.object(dependencies, "load_descriptor", wraps=dependencies.load_descriptor) as load_descriptor:
+            data_product, component_id = asyncio.run(unpack_component_provisioning_request(request))
+
+        load_descriptor.assert_called_once()
+        self.assertEqual([component.id for component in data_product.components], [component_id])
+
+    def test_json_descriptor(self):
+        request = ProvisioningRequest(
+            descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR,
+            descriptor=json.dumps(yaml.safe_load(descriptor_str), default=str),
+        )
+
+        with patch.object(component_extraction, "_parse") as parse:
+            data_product, component_id = asyncio.run(unpack_component_provisioning_request(request))
+
+        parse.assert_not_called()
+        self.assertEqual([component.id for component in data_product.components], [component_id])
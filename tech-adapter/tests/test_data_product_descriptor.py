@@ -4,7 +4,9 @@ from pathlib import Path
 import pydantic_core
 import pytest
 import yaml
+from pydantic import BaseModel
 
+from src.models.api_models import ValidationError
 from src.models.data_product_descriptor import (
     ComponentKind,
     ConnectionTypeWorkload,
@@ -331,3 +333,90 @@ class TestDataProductDescriptor(unittest.TestCase):
 
         with pytest.raises(pydantic_core.ValidationError, match="4 validation errors for OutputPort"):
             data_product.get_typed_component_by_id(invalid_component_to_provision, OutputPort)
+
+
+class OutputPortDataContract(BaseModel):
+    dataContract: DataContract
+
+
+class TestDataContractValidation(unittest.TestCase):
+    def test_valid_schema(self):
+        schema = [{"name": "a", "dataType": "STRING"}, {"name": "b", "dataType": "int"}]
+
+        data_contract = DataContract(schema=schema)
+
+        self.assertEqual([column.dataType for column in data_contract.schema_], ["STRING", "int"])
+
+    def test_all_invalid_columns_are_reported(self):
+        schema = [
+            {"name": "a", "dataType": "STRING"},
+            {"name": "b", "dataType": "invalid_type"},
+            {"name": "c", "dataType": "invalid_type"},
+            {"name": "d", "dataType": "other_type"},
+        ]
+
+        with pytest.raises(pydantic_core.ValidationError) as error:
+            DataContract(schema=schema)
+
+        errors = error.value.errors()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0]["type"], "invalid_data_type")
+        self.assertEqual(errors[0]["ctx"]["count"], 3)
+        self.assertEqual(
+            errors[0]["ctx"]["invalid_columns"],
+            [
+                {"name": "b", "dataType": "invalid_type"},
+                {"name": "c", "dataType": "invalid_type"},
+                {"name": "d", "dataType": "other_type"},
+            ],
+        )
+        self.assertIn('"b" (invalid_type), "c" (invalid_type), "d" (other_type)', errors[0]["msg"])
+
+    def test_reported_columns_are_capped_in_the_message(self):
+        schema = [{"name": f"column_{i}", "dataType": "invalid_type"} for i in range(100)]
+
+        with pytest.raises(pydantic_core.ValidationError) as error:
+            DataContract(schema=schema)
+
+        self.assertIn("and 80 more", error.value.errors()[0]["msg"])
+        self.assertEqual(len(error.value.errors()[0]["ctx"]["invalid_columns"]), 100)
+
+    def test_columns_created_in_code(self):
+        with pytest.raises(pydantic_core.ValidationError, match='Column "b" specifies dataType of "invalid_type"'):
+            OpenMetadataColumn(name="b", dataType="invalid_type")
+        column = OpenMetadataColumn.model_construct(name="b", dataType="invalid_type")
+        with pytest.raises(pydantic_core.ValidationError, match='"b" \\(invalid_type\\)'):
+            DataContract(schema=[column])
+
+    def test_other_errors_are_reported_with_the_invalid_columns(self):
+        schema = [
+            {"name": "a", "dataType": "invalid_type"},
+            {"dataType": "STRING"},
+            {"name": "c", "dataType": "INT", "dataLength": "long"},
+        ]
+
+        with pytest.raises(pydantic_core.ValidationError) as error:
+            OutputPortDataContract(dataContract={"schema": schema})
+
+        errors = error.value.errors()
+        self.assertEqual(
+            [(e["type"], e["loc"]) for e in errors],
+            [
+                ("invalid_data_type", ("dataContract", "schema")),
+                ("missing", ("dataContract", "schema", 1, "name")),
+                ("int_parsing", ("dataContract", "schema", 2, "dataLength")),
+            ],
+        )
+        self.assertIn('"a" (invalid_type)', errors[0]["msg"])
+
+    def test_malformed_columns_are_reported_by_the_column_validation(self):
+        with pytest.raises(pydantic_core.ValidationError) as error:
+            DataContract(schema=[{"name": "a"}, {"name": "b", "dataType": ["list"]}])
+
+        self.assertEqual([e["type"] for e in error.value.errors()], ["missing", "string_type"])
+
+    def test_invalid_column_through_parse_yaml_with_model(self):
+        result = parse_yaml_with_model({"schema": [{"name": "b", "dataType": "invalid_type"}]}, DataContract)
+
+        self.assertIsInstance(result, ValidationError)
+        self.assertIn('"b" (invalid_type)', result.errors[0])
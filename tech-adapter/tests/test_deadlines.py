@@ -0,0 +1,211 @@
+import asyncio
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import PlainTextResponse
+from starlette.types import Receive, Scope, Send
+
+from src import deadlines, main
+from src.deadlines import DeadlineMiddleware, check_deadline, remaining_seconds
+from src.main import app
+from src.models.api_models import DescriptorKind, ProvisioningRequest
+from src.request_context import RequestContext, RequestContextMiddleware, get_request_context
+from src.settings import DeadlineSettings
+
+
+class _SlowApp:
+    """
+    Answers after `delay_seconds`, recording its request context and whether it was cancelled.
+    """
+
+    def __init__(self, delay_seconds: float) -> None:
+        self.delay_seconds = delay_seconds
+        self.context: RequestContext | None = None
+        self.cancelled = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.context = get_request_context()
+        await receive()
+        try:
+            await asyncio.sleep(self.delay_seconds)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        await PlainTextResponse("done")(scope, receive, send)
+
+
+def wrap(inner, settings: DeadlineSettings | None = None) -> RequestContextMiddleware:
+    return RequestContextMiddleware(DeadlineMiddleware(inner, settings or DeadlineSettings()))
+
+
+async def post(asgi_app, path: str = "/v1/provision", headers: dict | None = None) -> httpx.Response:
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post(path, content=b"{}", headers=headers)
+
+
+class TestDeadlineMiddleware(unittest.TestCase):
+    def test_request_within_its_deadline_is_answered(self):
+        inner = _SlowApp(0.01)
+
+        response = asyncio.run(post(wrap(inner), headers={"X-Request-Timeout": "5"}))
+
+        self.assertEqual((response.status_code, response.text), (200, "done"))
+        assert inner.context is not None
+        self.assertIsNotNone(inner.context.deadline)
+        self.assertIsNone(inner.context.abandoned)
+
+    def test_header_deadline_cancels_the_request(self):
+        inner = _SlowApp(5)
+        abandoned = Mock()
+
+        started = time.monotonic()
+        with patch.object(deadlines, "_abandoned_requests", abandoned):
+            response = asyncio.run(post(wrap(inner), headers={"X-Request-Timeout": "0.05"}))
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(response.json(), {"error": "The deadline of the request passed"})
+        self.assertTrue(inner.cancelled)
+        abandoned.add.assert_called_once_with(
+            1, {"reason": "deadline", "url.path": "/v1/provision", "stage": "cancelled"}
+        )
+
+    def test_route_timeout_applies_without_header(self):
+        inner = _SlowApp(5)
+        settings = DeadlineSettings(route_timeouts={"/v1/provision": 0.05})
+
+        response = asyncio.run(post(wrap(inner, settings)))
+
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(asyncio.run(post(wrap(_SlowApp(0.01), settings), path="/v1/validate")).status_code, 200)
+
+    def test_header_shortens_the_route_timeout(self):
+        settings = DeadlineSettings(route_timeouts={"/v1/provision": 60})
+
+        self.assertEqual(DeadlineMiddleware(_SlowApp(0), settings).timeout(_scope({"x-request-timeout": "2"})), 2)
+        self.assertEqual(DeadlineMiddleware(_SlowApp(0), settings).timeout(_scope({"x-request-timeout": "90"})), 60)
+
+    def test_invalid_header_is_ignored(self):
+        middleware = DeadlineMiddleware(_SlowApp(0), DeadlineSettings())
+
+        self.assertIsNone(middleware.timeout(_scope({"x-request-timeout": "soon"})))
+
+    def test_client_disconnection_cancels_the_request(self):
+        inner = _SlowApp(5)
+        sent = []
+
+        async def run():
+            messages = [{"type": "http.request", "body": b"{}", "more_body": False}, {"type": "http.disconnect"}]
+
+            async def receive():
+                message = messages.pop(0)
+                if message["type"] == "http.disconnect":
+                    await asyncio.sleep(0.05)
+                return message
+
+            async def send(message):
+                sent.append(message)
+
+            await wrap(inner)(_scope({}), receive, send)
+
+        started = time.monotonic()
+        asyncio.run(run())
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertTrue(inner.cancelled)
+        assert inner.context is not None
+        self.assertEqual(inner.context.abandoned, "disconnect")
+        self.assertEqual(sent, [])
+
+
+class TestCooperativeChecks(unittest.TestCase):
+    def test_check_deadline_is_a_noop_outside_a_request(self):
+        check_deadline("stage")
+
+        self.assertIsNone(remaining_seconds())
+
+    def test_worker_thread_stops_at_its_next_check(self):
+        checked = []
+        stopped = threading.Event()
+
+        def work():
+            remaining = remaining_seconds()
+            assert remaining is not None and remaining <= 0.05
+            try:
+                for stage in range(100):
+                    checked.append(stage)
+                    check_deadline(f"stage-{stage}")
+                    time.sleep(0.01)
+            finally:
+                stopped.set()
+
+        class _ThreadedApp:
+            context: RequestContext | None = None
+
+            async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+                self.context = get_request_context()
+                await run_in_threadpool(work)
+
+        inner = _ThreadedApp()
+
+        response = asyncio.run(post(wrap(inner), headers={"X-Request-Timeout": "0.05"}))
+
+        self.assertEqual(response.status_code, 504)
+        self.assertTrue(stopped.wait(1))
+        self.assertLess(len(checked), 50)
+        assert inner.context is not None
+        self.assertEqual(inner.context.abandoned, "deadline")
+        self.assertEqual(inner.context.abandoned_stage, f"stage-{checked[-1]}")
+
+
+class TestDeadlineEndpoints(unittest.TestCase):
+    def test_provisioning_past_its_deadline_answers_504(self):
+        descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+        request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+        contexts = []
+        provision_component = main.provision_component
+
+        def slow_provision_component(*args):
+            contexts.append(get_request_context())
+            time.sleep(0.1)
+            return provision_component(*args)
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.post("/v1/provision", json=dict(request), headers={"X-Request-Timeout": "0.05"})
+
+        with patch.object(main, "provision_component", slow_provision_component):
+            response = asyncio.run(run())
+
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(len(contexts), 1)
+        self.assertEqual((contexts[0].abandoned, contexts[0].abandoned_stage), ("deadline", "provision"))
+
+    def test_expired_deadline_stops_before_parsing(self):
+        descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+        request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.post("/v1/validate", json=dict(request), headers={"X-Request-Timeout": "0"})
+
+        response = asyncio.run(run())
+
+        self.assertEqual(response.status_code, 504)
+
+
+def _scope(headers: dict[str, str]) -> Scope:
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": "/v1/provision",
+        "headers": [(name.encode(), value.encode()) for name, value in headers.items()],
+    }
@@ -0,0 +1,81 @@
+import unittest
+
+import pydantic
+import yaml
+
+from perf.descriptor_generator import DescriptorGenerator, GeneratorConfig, InvalidVariant
+from src.models.api_models import DescriptorKind
+from src.models.data_product_descriptor import (
+    ComponentKind,
+    DataProduct,
+    Observability,
+    OutputPort,
+    StorageArea,
+    Workload,
+)
+
+CONFIG = GeneratorConfig(components=40, columns=15, tag_density=0.5, depends_on_fanout=3, payload_bytes=500, seed=42)
+
+
+class TestDescriptorGenerator(unittest.TestCase):
+    def test_data_product_is_valid(self):
+        data_product = DataProduct(**DescriptorGenerator(CONFIG).data_product())
+
+        self.assertEqual(len(data_product.components), 40)
+        types = {type(component) for component in data_product.components}
+        self.assertEqual(types, {OutputPort, Workload, StorageArea, Observability})
+        for output_port in data_product.get_output_ports():
+            self.assertEqual(len(output_port.dataContract.schema_), 15)
+
+    def test_same_seed_same_descriptor(self):
+        first = DescriptorGenerator(CONFIG).provisioning_request()
+        second = DescriptorGenerator(CONFIG).provisioning_request()
+        other = DescriptorGenerator(GeneratorConfig(components=40, seed=43)).provisioning_request()
+
+        self.assertEqual(first.descriptor, second.descriptor)
+        self.assertNotEqual(first.descriptor, other.descriptor)
+
+    def test_depends_on_previous_components(self):
+        components = DescriptorGenerator(CONFIG).data_product()["components"]
+
+        for index, component in enumerate(components):
+            previous = {c["id"] for c in components[:index]}
+            self.assertLessEqual(len(component.get("dependsOn", [])), 3)
+            self.assertTrue(set(component.get("dependsOn", [])) <= previous)
+
+    def test_payload_size(self):
+        small = DescriptorGenerator(GeneratorConfig(components=10)).provisioning_request()
+        large = DescriptorGenerator(GeneratorConfig(components=10, payload_bytes=10_000)).provisioning_request()
+
+        self.assertGreater(len(large.descriptor) - len(small.descriptor), 10 * 8_000)
+
+    def test_component_descriptor(self):
+        for kind in ComponentKind:
+            descriptor = DescriptorGenerator(CONFIG).component_descriptor(kind)
+            data_product = DataProduct(**descriptor["dataProduct"])
+
+            component = data_product.get_component_by_id(descriptor["componentIdToProvision"])
+            self.assertEqual(component.kind, kind)
+
+    def test_single_component_is_an_output_port(self):
+        descriptor = DescriptorGenerator(GeneratorConfig(components=1)).component_descriptor()
+
+        self.assertEqual(len(descriptor["dataProduct"]["components"]), 1)
+
+    def test_dataproduct_descriptor(self):
+        request = DescriptorGenerator(CONFIG).provisioning_request(DescriptorKind.DATAPRODUCT_DESCRIPTOR)
+
+        DataProduct(**yaml.safe_load(request.descriptor))
+
+    def test_invalid_variants(self):
+        for variant in (InvalidVariant.BAD_DATA_TYPE, InvalidVariant.UNKNOWN_KIND, InvalidVariant.MISSING_FIELD):
+            request = DescriptorGenerator(CONFIG).provisioning_request(invalid_variant=variant)
+
+            with self.assertRaises(pydantic.ValidationError, msg=variant):
+                DataProduct(**yaml.safe_load(request.descriptor)["dataProduct"])
+
+    def test_malformed_yaml(self):
+        request = DescriptorGenerator(CONFIG).provisioning_request(invalid_variant=InvalidVariant.MALFORMED_YAML)
+
+        with self.assertRaises(yaml.YAMLError):
+            yaml.safe_load(request.descriptor)
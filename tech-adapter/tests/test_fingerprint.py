@@ -0,0 +1,110 @@
+import json
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+
+from src.models.data_product_descriptor import DataProduct, OutputPort
+from src.utility.fingerprint import (
+    changed_components,
+    component_fingerprint,
+    component_fingerprints,
+    data_product_fingerprint,
+    provisioning_fingerprint,
+)
+
+descriptor = yaml.safe_load(Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text())
+
+
+def data_product(data: dict | None = None) -> DataProduct:
+    return DataProduct(**(data if data is not None else descriptor["dataProduct"]))
+
+
+def reversed_keys(value):
+    if isinstance(value, dict):
+        return {key: reversed_keys(value[key]) for key in reversed(list(value))}
+    if isinstance(value, list):
+        return [reversed_keys(item) for item in value]
+    return value
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_same_content_same_fingerprint(self):
+        original = data_product()
+        flow_style = yaml.safe_load(yaml.safe_dump(reversed_keys(descriptor), default_flow_style=True, width=10))
+        as_json = json.loads(json.dumps(descriptor["dataProduct"], default=str, indent=4))
+        # Omitted optional fields are the same as their default
+        as_json["components"][1].pop("retentionTime", None)
+        as_json["components"][1]["processDescription"] = None
+
+        for other in (data_product(flow_style["dataProduct"]), data_product(as_json)):
+            self.assertEqual(data_product_fingerprint(other), data_product_fingerprint(original))
+            self.assertEqual(component_fingerprints(other), component_fingerprints(original))
+
+    def test_changed_component(self):
+        original = data_product()
+        changed = json.loads(json.dumps(descriptor["dataProduct"], default=str))
+        changed["components"][1]["dataContract"]["schema"][0]["description"] = "changed"
+        changed = data_product(changed)
+
+        self.assertNotEqual(data_product_fingerprint(changed), data_product_fingerprint(original))
+        self.assertEqual(
+            changed_components(component_fingerprints(original), component_fingerprints(changed)),
+            {descriptor["componentIdToProvision"]},
+        )
+
+    def test_undeclared_fields_count(self):
+        component_id = descriptor["componentIdToProvision"]
+        original = provisioning_fingerprint(data_product(), component_id)
+
+        def changed(change) -> str | None:
+            data = json.loads(json.dumps(descriptor["dataProduct"], default=str))
+            change(data)
+            return provisioning_fingerprint(data_product(data), component_id)
+
+        changes = [
+            lambda data: data["components"][1]["dataContract"]["SLA"].update(timeliness="1BD"),
+            lambda data: data["components"][1]["dataContract"].update(termsAndConditions="changed"),
+            lambda data: data["components"][1]["dataContract"]["schema"][0].update(constraint="PRIMARY_KEY"),
+            lambda data: data.update(domainId="urn:dmb:dmn:changed"),
+        ]
+        for index, change in enumerate(changes):
+            self.assertNotEqual(changed(change), original, msg=index)
+
+    def test_changed_data_product_fields(self):
+        changed = data_product({**descriptor["dataProduct"], "description": "changed"})
+
+        self.assertNotEqual(data_product_fingerprint(changed), data_product_fingerprint(data_product()))
+        self.assertEqual(component_fingerprints(changed), component_fingerprints(data_product()))
+
+    def test_component_order_does_not_count(self):
+        components = descriptor["dataProduct"]["components"]
+        reordered = data_product({**descriptor["dataProduct"], "components": components[::-1]})
+
+        self.assertEqual(data_product_fingerprint(reordered), data_product_fingerprint(data_product()))
+
+    def test_added_and_removed_components(self):
+        previous = {"a": "1", "b": "2", "c": "3"}
+        current = {"a": "1", "b": "changed", "d": "4"}
+
+        self.assertEqual(changed_components(previous, current), {"b", "c", "d"})
+        self.assertEqual(changed_components(previous, previous), set())
+
+    def test_fingerprints_are_cached(self):
+        model = data_product()
+        fingerprint = data_product_fingerprint(model)
+
+        with patch.object(OutputPort, "model_dump") as model_dump, patch.object(DataProduct, "model_dump") as dump:
+            self.assertEqual(data_product_fingerprint(model), fingerprint)
+            component_fingerprint(model.components[1])
+        model_dump.assert_not_called()
+        dump.assert_not_called()
+
+    def test_each_component_is_serialized_once(self):
+        model = data_product()
+
+        with patch.object(OutputPort, "model_dump", autospec=True, side_effect=OutputPort.model_dump) as model_dump:
+            data_product_fingerprint(model)
+            component_fingerprints(model)
+        self.assertEqual(model_dump.call_count, 1)
@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import httpx
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from perf import http_client_benchmark
+from perf.stub_server import StubServer
+from src import http_client
+from src.http_client import HttpClientDep, create_http_client
+from src.settings import HttpClientSettings
+
+
+class TestHttpClient(unittest.TestCase):
+    def test_connections_are_reused(self):
+        async def run(url):
+            async with create_http_client() as client:
+                for _ in range(10):
+                    (await client.get(url)).raise_for_status()
+
+        with StubServer() as server:
+            asyncio.run(run(server.url))
+
+        self.assertEqual((server.requests, server.connections), (10, 1))
+
+    def test_per_host_limit(self):
+        settings = HttpClientSettings(max_connections_per_host=2)
+
+        async def run(url):
+            async with create_http_client(settings) as client:
+                responses = await asyncio.gather(*(client.get(url) for _ in range(8)))
+            return [response.status_code for response in responses]
+
+        with StubServer(delay_seconds=0.02) as server:
+            self.assertEqual(asyncio.run(run(server.url)), [200] * 8)
+
+        self.assertEqual(server.max_in_flight, 2)
+        self.assertEqual(server.connections, 2)
+
+    def test_timeouts(self):
+        settings = HttpClientSettings(read_timeout_seconds=0.05)
+
+        async def run(url):
+            async with create_http_client(settings) as client:
+                await client.get(url)
+
+        with StubServer(delay_seconds=0.5) as server, self.assertRaises(httpx.ReadTimeout):
+            asyncio.run(run(server.url))
+
+    def test_http2_needs_h2(self):
+        with patch.object(http_client, "http2_available", return_value=False), patch.object(
+            httpx, "AsyncHTTPTransport", wraps=httpx.AsyncHTTPTransport
+        ) as transport:
+            create_http_client(HttpClientSettings(http2=True))
+
+        self.assertFalse(transport.call_args.kwargs["http2"])
+
+
+class TestHttpClientDependency(unittest.TestCase):
+    def app(self) -> FastAPI:
+        app = FastAPI(lifespan=http_client.http_client_lifespan)
+
+        @app.get("/client")
+        async def client_id(client: HttpClientDep) -> int:
+            return id(client)
+
+        return app
+
+    def test_shared_by_the_requests_within_the_lifespan(self):
+        app = self.app()
+
+        with TestClient(app) as client:
+            ids = {client.get("/client").json() for _ in range(3)}
+            shared = app.state.http_client
+
+        self.assertEqual(ids, {id(shared)})
+        self.assertTrue(shared.is_closed)
+        self.assertFalse(hasattr(app.state, "http_client"))
+
+    def test_a_client_per_request_without_the_lifespan(self):
+        with patch.object(http_client, "create_http_client", wraps=create_http_client) as create:
+            client = TestClient(self.app())
+            client.get("/client")
+            client.get("/client")
+
+        self.assertEqual(create.call_count, 2)
+
+
+class TestHttpClientBenchmark(unittest.TestCase):
+    def test_run(self):
+        result = http_client_benchmark.run("shared", requests=20, concurrency=2)
+
+        self.assertEqual((result.requests, result.connections), (20, 2))
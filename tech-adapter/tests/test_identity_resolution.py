@@ -0,0 +1,103 @@
+import unittest
+
+from src.identity_resolution import IdentityResolver, InMemoryDirectory, PassthroughDirectory
+from src.settings import IdentityCacheSettings
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def resolver(**settings) -> tuple[IdentityResolver, InMemoryDirectory, Clock]:
+    directory = InMemoryDirectory(users=["alice", "bob"], groups={"dev": ["alice", "bob"], "ops": ["carol"]})
+    clock = Clock()
+    defaults = {"ttl_seconds": 300, "negative_ttl_seconds": 60, "max_entries": 100, "batch_size": 100}
+    return IdentityResolver(directory, IdentityCacheSettings(**{**defaults, **settings}), clock), directory, clock
+
+
+class TestIdentityResolver(unittest.TestCase):
+    def test_resolve(self):
+        identity_resolver, _, _ = resolver()
+
+        self.assertEqual(
+            identity_resolver.resolve(["user:alice", "group:dev", "user:nobody"]),
+            {"user:alice": ["alice"], "group:dev": ["alice", "bob"], "user:nobody": None},
+        )
+
+    def test_repeated_lookups_are_cached(self):
+        identity_resolver, directory, _ = resolver()
+        refs = ["user:alice", "group:dev", "group:ops", "user:nobody"]
+
+        first = identity_resolver.resolve(refs)
+        for _ in range(10):
+            self.assertEqual(identity_resolver.resolve(refs), first)
+
+        self.assertEqual(directory.lookups, [refs])
+
+    def test_only_misses_are_looked_up(self):
+        identity_resolver, directory, _ = resolver()
+
+        identity_resolver.resolve(["user:alice", "group:dev"])
+        identity_resolver.resolve(["group:dev", "group:ops", "group:ops"])
+
+        self.assertEqual(directory.lookups, [["user:alice", "group:dev"], ["group:ops"]])
+
+    def test_expiry(self):
+        identity_resolver, directory, clock = resolver()
+        identity_resolver.resolve(["user:alice", "user:nobody"])
+
+        clock.now = 61
+        identity_resolver.resolve(["user:alice", "user:nobody"])
+        clock.now = 301
+        identity_resolver.resolve(["user:alice", "user:nobody"])
+
+        self.assertEqual(
+            directory.lookups, [["user:alice", "user:nobody"], ["user:nobody"], ["user:alice", "user:nobody"]]
+        )
+
+    def test_negative_entries_expire_into_found_ones(self):
+        identity_resolver, directory, clock = resolver()
+        self.assertEqual(identity_resolver.resolve(["user:carol"]), {"user:carol": None})
+
+        directory.users.add("carol")
+        self.assertEqual(identity_resolver.resolve(["user:carol"]), {"user:carol": None})
+        clock.now = 61
+        self.assertEqual(identity_resolver.resolve(["user:carol"]), {"user:carol": ["carol"]})
+
+    def test_least_recently_used_are_evicted(self):
+        identity_resolver, directory, _ = resolver(max_entries=2)
+
+        identity_resolver.resolve(["user:alice", "user:bob"])
+        identity_resolver.resolve(["user:alice"])
+        identity_resolver.resolve(["group:dev"])
+        identity_resolver.resolve(["user:alice", "user:bob"])
+
+        self.assertEqual(len(identity_resolver), 2)
+        self.assertEqual(directory.lookups[-1], ["user:bob"])
+
+    def test_misses_are_batched(self):
+        identity_resolver, directory, _ = resolver(batch_size=2)
+
+        identity_resolver.resolve(["user:alice", "user:bob", "group:dev", "group:ops", "user:nobody"])
+
+        self.assertEqual([len(batch) for batch in directory.lookups], [2, 2, 1])
+
+    def test_invalidate(self):
+        identity_resolver, directory, _ = resolver()
+        identity_resolver.resolve(["user:alice", "group:dev"])
+
+        identity_resolver.invalidate(["group:dev"])
+        identity_resolver.resolve(["user:alice", "group:dev"])
+        identity_resolver.invalidate()
+        identity_resolver.resolve(["user:alice"])
+
+        self.assertEqual(directory.lookups[1:], [["group:dev"], ["user:alice"]])
+
+    def test_passthrough_directory(self):
+        identity_resolver = IdentityResolver(PassthroughDirectory(), IdentityCacheSettings())
+
+        self.assertEqual(identity_resolver.resolve(["user:alice"]), {"user:alice": ["user:alice"]})
@@ -0,0 +1,260 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from starlette.testclient import TestClient
+
+from src import main
+from src.jobs import INTERRUPTED, Job, JobJournal, JobRegistry, current_job
+from src.main import app
+from src.models.api_models import Status1, SystemErr
+from src.settings import JobJournalSettings
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class JournalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "jobs" / "journal"
+        self.clock = _Clock()
+        self.journals: list[JobJournal] = []
+
+    def tearDown(self):
+        for journal in self.journals:
+            journal.close()
+        self.directory.cleanup()
+
+    def journal(self, **settings) -> JobJournal:
+        journal = JobJournal(JobJournalSettings(enabled=True, path=self.path, **settings), clock=self.clock)
+        self.journals.append(journal)
+        return journal
+
+    def lines(self) -> list[str]:
+        return self.path.read_text().splitlines()
+
+
+class TestJobJournal(JournalTestCase):
+    def test_states_survive_a_restart(self):
+        journal = self.journal()
+        completed, failed = Job("provision", "urn:cmp:a"), Job("updateacl", "urn:cmp:b")
+        journal.record(completed, Status1.RUNNING)
+        journal.record(completed, Status1.COMPLETED)
+        journal.record(failed, Status1.RUNNING)
+        journal.record(failed, Status1.FAILED, "Unreachable")
+        journal.close()
+
+        restarted = self.journal()
+
+        self.assertEqual(restarted.recover(), [])
+        status = restarted.status(completed.id)
+        assert status is not None
+        self.assertEqual(
+            (status.state, status.operation, status.component_id), (Status1.COMPLETED, "provision", "urn:cmp:a")
+        )
+        failed_status = restarted.status(failed.id)
+        assert failed_status is not None
+        self.assertEqual((failed_status.state, failed_status.error), (Status1.FAILED, "Unreachable"))
+        self.assertIsNone(restarted.status("unknown"))
+
+    def test_running_jobs_are_failed_on_recovery(self):
+        journal = self.journal()
+        job = Job("provision", "urn:cmp:a")
+        journal.record(job, Status1.RUNNING)
+        # Crash: the journal is not closed
+
+        restarted = self.journal()
+        interrupted = restarted.recover()
+
+        self.assertEqual(
+            [(entry.job_id, entry.state, entry.error) for entry in interrupted], [(job.id, Status1.FAILED, INTERRUPTED)]
+        )
+        status = restarted.status(job.id)
+        assert status is not None
+        self.assertEqual(status.state, Status1.FAILED)
+        # Recovered once: the failure is journaled
+        restarted.close()
+        self.assertEqual(self.journal().recover(), [])
+
+    def test_closed_journal_is_not_replayed_again(self):
+        journal = self.journal()
+        ended, running = Job("provision", "urn:cmp:a"), Job("provision", "urn:cmp:b")
+        journal.record(ended, Status1.RUNNING)
+        journal.record(running, Status1.RUNNING)
+        journal.close()
+        lines = self.lines()
+
+        # Jobs still running after the shutdown
+        journal.record(ended, Status1.COMPLETED)
+        self.assertIsNone(journal.status(running.id))
+
+        self.assertEqual(self.lines(), lines)
+        restarted = self.journal()
+        restarted.register_resumer("provision", lambda entry: Status1.RUNNING)
+        self.assertEqual({entry.job_id for entry in restarted.recover()}, {ended.id, running.id})
+
+    def test_resumers_decide_the_state_of_their_operation(self):
+        journal = self.journal()
+        resumed, failing, other = (
+            Job("provision", "urn:cmp:a"),
+            Job("updateacl", "urn:cmp:b"),
+            Job("unprovision", "urn:cmp:c"),
+        )
+        for job in (resumed, failing, other):
+            journal.record(job, Status1.RUNNING)
+
+        def fail(entry):
+            raise ConnectionError("unreachable")
+
+        restarted = self.journal()
+        restarted.register_resumer("provision", lambda entry: Status1.COMPLETED)
+        restarted.register_resumer("updateacl", fail)
+        interrupted = {entry.job_id: entry.state for entry in restarted.recover()}
+
+        self.assertEqual(
+            interrupted, {resumed.id: Status1.COMPLETED, failing.id: Status1.FAILED, other.id: Status1.FAILED}
+        )
+
+    def test_truncated_last_line_is_dropped(self):
+        journal = self.journal()
+        job = Job("provision", "urn:cmp:a")
+        journal.record(job, Status1.RUNNING)
+        journal.record(job, Status1.COMPLETED)
+        journal.close()
+        with self.path.open("ab") as file:
+            file.write(b'{"id":"trunc')
+
+        restarted = self.journal()
+        restarted.recover()
+
+        status = restarted.status(job.id)
+        assert status is not None
+        self.assertEqual(status.state, Status1.COMPLETED)
+        self.assertEqual(len(self.lines()), 1)
+
+    def test_compaction_keeps_the_latest_state_of_retained_jobs(self):
+        journal = self.journal(compaction_threshold=4, retention_seconds=60)
+        old, recent = Job("provision", "urn:cmp:old"), Job("provision", "urn:cmp:recent")
+        journal.record(old, Status1.RUNNING)
+        journal.record(old, Status1.COMPLETED)
+        self.clock.now += 120
+        journal.record(recent, Status1.RUNNING)
+        self.assertEqual(len(self.lines()), 3)
+
+        journal.record(recent, Status1.COMPLETED)
+
+        self.assertEqual(len(self.lines()), 1)
+        self.assertIsNone(journal.status(old.id))
+        status = journal.status(recent.id)
+        assert status is not None
+        self.assertEqual(status.state, Status1.COMPLETED)
+
+    def test_concurrent_records_share_fsyncs(self):
+        journal = self.journal()
+        journal.recover()
+
+        def record():
+            for _ in range(50):
+                job = Job("provision", "urn:cmp:a")
+                journal.record(job, Status1.RUNNING)
+                journal.record(job, Status1.COMPLETED)
+
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(journal.entries, 800)
+        self.assertLessEqual(journal.syncs, journal.entries)
+        self.assertEqual(len(self.lines()), 800)
+
+
+class TestJournaledJobs(JournalTestCase):
+    def test_registry_journals_the_transitions(self):
+        journal = self.journal()
+        jobs = JobRegistry(journal)
+        ids = []
+
+        def run(result):
+            def operation():
+                ids.append(current_job().id)
+                return result
+
+            return operation
+
+        def fail():
+            ids.append(current_job().id)
+            raise ValueError("failed")
+
+        outcome = {"ok": Status1.COMPLETED, "token": Status1.RUNNING}.__getitem__
+        jobs.tracked("provision", "urn:cmp:a", run("ok"), outcome)()
+        jobs.tracked("provision", "urn:cmp:b", run("token"), outcome)()
+        with self.assertRaises(ValueError):
+            jobs.tracked("provision", "urn:cmp:c", fail)()
+
+        states = [journal.status(job_id) for job_id in ids]
+        self.assertEqual(
+            [(status.state, status.error) for status in states if status is not None],
+            [
+                (Status1.COMPLETED, None),
+                (Status1.RUNNING, None),
+                (Status1.FAILED, "failed"),
+            ],
+        )
+        self.assertEqual(len(self.lines()), 5)
+
+    def test_failed_provisioning_is_journaled_failed(self):
+        journal = self.journal()
+        jobs = JobRegistry(journal)
+        descriptor = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+        ids = []
+
+        def failing_provision_component(*args):
+            ids.append(current_job().id)
+            return SystemErr(error="Unreachable")
+
+        with (
+            patch.object(main, "job_registry", jobs),
+            patch.object(main, "provision_component", failing_provision_component),
+        ):
+            response = TestClient(app).post(
+                "/v1/provision", json={"descriptorKind": "COMPONENT_DESCRIPTOR", "descriptor": descriptor}
+            )
+
+        self.assertEqual(response.status_code, 500)
+        status = journal.status(ids[0])
+        assert status is not None
+        self.assertEqual(status.state, Status1.FAILED)
+
+    def test_disabled_journal_is_not_written(self):
+        journal = JobJournal(JobJournalSettings(enabled=False, path=self.path))
+        JobRegistry(journal).tracked("provision", "urn:cmp:a", lambda: None)()
+
+        self.assertFalse(self.path.exists())
+
+    def test_status_tokens_are_answered_from_the_journal(self):
+        journal = self.journal()
+        job = Job("provision", "urn:cmp:a")
+        journal.record(job, Status1.RUNNING)
+        journal.record(job, Status1.FAILED, "Unreachable")
+        client = TestClient(app)
+
+        with patch.object(main, "job_journal", journal):
+            response = client.get(f"/v1/provision/{job.id}/status")
+            unknown = client.get("/v1/provision/unknown/status")
+            # There is no validation job: its tokens are left to the tech-specific implementation
+            validation = client.get(f"/v2/validate/{job.id}/status")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "FAILED", "result": "Unreachable", "info": None})
+        self.assertEqual(unknown.status_code, 500)
+        self.assertEqual(validation.json(), {"error": "Response not yet implemented"})
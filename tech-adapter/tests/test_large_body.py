@@ -0,0 +1,175 @@
+import json
+import random
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.encoders import jsonable_encoder
+from starlette.testclient import TestClient
+
+from src import dependencies
+from src.large_body import JsonStringReader, LargeBodyMiddleware, find_json_string
+from src.main import app
+from src.models.api_models import DescriptorKind, ProvisionInfo, ProvisioningRequest, UpdateAclRequest
+from src.settings import LargeBodySettings, descriptor_limits_settings
+from src.utility import component_extraction
+from src.utility.yaml_loader import DescriptorLimitExceeded
+
+descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+
+client = TestClient(LargeBodyMiddleware(app, LargeBodySettings(enabled=True, threshold_bytes=1024)))
+
+
+def read_all(reader: JsonStringReader, size: int) -> str:
+    chunks = []
+    while chunk := reader.read(size):
+        chunks.append(chunk)
+    return "".join(chunks)
+
+
+def encoded(text: str, ensure_ascii: bool) -> bytes:
+    return json.dumps(text, ensure_ascii=ensure_ascii).encode("utf-8")
+
+
+class TestJsonStringReader(unittest.TestCase):
+    def test_reads_the_unescaped_string(self):
+        alphabet = ["a", " ", "\n", "\t", '"', "\\", "/", "è", "€", "😀", "\x01", "\\\\\\"]
+        rng = random.Random(0)
+        for _ in range(20):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 300_000)))
+            for ensure_ascii in (True, False):
+                buffer = encoded(text, ensure_ascii)
+                reader = JsonStringReader(buffer, 1, len(buffer) - 1)
+
+                self.assertEqual(read_all(reader, rng.choice([1, 4096, 100_000])), text)
+
+    def test_long_backslash_runs(self):
+        for run in range(1, 40):
+            text = "a" * (65536 - run) + "\\" * run + "b" * 10
+            buffer = encoded(text, True)
+
+            self.assertEqual(read_all(JsonStringReader(buffer, 1, len(buffer) - 1), 1), text)
+
+    def test_max_bytes(self):
+        buffer = encoded("è" * 100_000, False)
+
+        self.assertEqual(read_all(JsonStringReader(buffer, 1, len(buffer) - 1, max_bytes=200_000), 1), "è" * 100_000)
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "larger than 199999 bytes"):
+            read_all(JsonStringReader(buffer, 1, len(buffer) - 1, max_bytes=199_999), 1)
+
+
+class TestFindJsonString(unittest.TestCase):
+    def assert_found(self, document: object, path: tuple[str, ...], expected: str):
+        buffer = json.dumps(document, indent=1).encode("utf-8")
+        span = find_json_string(buffer, path)
+
+        self.assertIsNotNone(span)
+        assert span is not None
+        self.assertEqual(json.loads(buffer[span[0] : span[1] + 1]), expected)
+
+    def test_finds_the_string(self):
+        document = {
+            "before": [1, {"descriptor": "no"}, '"}]', None, True, -1.5e3],
+            'de\\"scriptor': {"descriptor": "no"},
+            "descriptor": 'the "descriptor" \\',
+            "after": {},
+        }
+
+        self.assert_found(document, ("descriptor",), 'the "descriptor" \\')
+
+    def test_finds_a_nested_string(self):
+        document = {"refs": ["user:alice"], "provisionInfo": {"result": "{}", "request": "request"}}
+
+        self.assert_found(document, ("provisionInfo", "request"), "request")
+
+    def test_missing_strings(self):
+        self.assertIsNone(find_json_string(b'{"descriptor": 1}', ("descriptor",)))
+        self.assertIsNone(find_json_string(b'{"other": "descriptor"}', ("descriptor",)))
+        self.assertIsNone(find_json_string(b'["descriptor"]', ("descriptor",)))
+        self.assertIsNone(find_json_string(b'{"provisionInfo": "request"}', ("provisionInfo", "request")))
+
+    def test_malformed_documents(self):
+        with self.assertRaises(ValueError):
+            find_json_string(b'{"a": [1, 2', ("descriptor",))
+        with self.assertRaises(ValueError):
+            find_json_string(b'{"a" 1, "descriptor": ""}', ("descriptor",))
+
+
+class TestLargeBodyMiddleware(unittest.TestCase):
+    def test_validation_descriptor_is_read_from_the_spooled_body(self):
+        request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+
+        with patch.object(dependencies, "load_yaml", wraps=dependencies.load_yaml) as load_yaml:
+            resp = client.post("/v1/validate", json=dict(request))
+
+        self.assertEqual(resp.status_code, 500)
+        self.assertIn("Response not yet implemented", resp.json().get("error"))
+        self.assertIsInstance(load_yaml.call_args.args[0], JsonStringReader)
+
+    def test_updateacl_request_is_read_from_the_spooled_body(self):
+        request = UpdateAclRequest(provisionInfo=ProvisionInfo(request=descriptor_str, result=""), refs=["user:alice"])
+
+        with patch.object(dependencies, "load_yaml", wraps=dependencies.load_yaml) as load_yaml:
+            resp = client.post("/v1/updateacl", json=jsonable_encoder(request))
+
+        self.assertEqual(resp.status_code, 500)
+        self.assertIn("Response not yet implemented", resp.json().get("error"))
+        self.assertIsInstance(load_yaml.call_args.args[0], JsonStringReader)
+
+    def test_chunked_body(self):
+        request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+        body = json.dumps(dict(request)).encode("utf-8")
+
+        def chunks():
+            for i in range(0, len(body), 100):
+                yield body[i : i + 100]
+
+        with patch.object(component_extraction, "_parse", wraps=component_extraction._parse) as parse:
+            resp = client.post("/v1/provision", content=chunks(), headers={"Content-Type": "application/json"})
+
+        self.assertEqual(resp.status_code, 500)
+        self.assertIn("Response not yet implemented", resp.json().get("error"))
+        self.assertIsInstance(parse.call_args.args[0], JsonStringReader)
+
+    def test_invalid_spooled_descriptor(self):
+        request = ProvisioningRequest(
+            descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor="descriptor: [" + "a" * 2000
+        )
+
+        resp = client.post("/v1/provision", json=dict(request))
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("Unable to parse the descriptor.", resp.json().get("errors"))
+
+    def test_spooled_descriptor_limits(self):
+        request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+
+        with patch.object(descriptor_limits_settings, "max_bytes", 1500):
+            resp = client.post("/v1/provision", json=dict(request))
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("The descriptor exceeds the limits of the service.", resp.json().get("errors"))
+
+    def test_body_without_the_descriptor_is_passed_unchanged(self):
+        resp = client.post(
+            "/v1/provision",
+            content=b'{"descriptorKind": "COMPONENT_DESCRIPTOR", "descriptor": 1, "padding": "' + b"a" * 2000 + b'"}',
+            headers={"Content-Type": "application/json"},
+        )
+
+        self.assertEqual(resp.status_code, 422)
+
+    def test_malformed_body_is_passed_unchanged(self):
+        resp = client.post(
+            "/v1/provision", content=b'{"descriptor": [' + b"1," * 2000, headers={"Content-Type": "application/json"}
+        )
+
+        self.assertEqual(resp.status_code, 422)
+
+    def test_small_body_is_not_spooled(self):
+        request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor="a: 1")
+
+        with patch.object(dependencies, "load_descriptor", wraps=dependencies.load_descriptor) as load_descriptor:
+            client.post("/v1/validate", json=dict(request))
+
+        self.assertEqual(load_descriptor.call_args.args[0], "a: 1")
@@ -0,0 +1,52 @@
+import asyncio
+import unittest
+
+import httpx
+
+from perf.descriptor_generator import DescriptorGenerator, GeneratorConfig
+from perf.load_test import LoadGenerator, build_endpoints, parse_mix, percentile, summarize
+from src.main import app
+
+endpoints = build_endpoints(DescriptorGenerator(GeneratorConfig(components=3)), acl_refs=5)
+
+
+async def run(mode: str, **kwargs):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://tech-adapter") as client:
+        load = LoadGenerator(client, endpoints, parse_mix("provision=1,provision_status=1,updateacl=1"))
+        if mode == "closed":
+            return await load.closed_loop(**kwargs)
+        return await load.open_loop(**kwargs)
+
+
+class TestLoadTest(unittest.TestCase):
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("provision=3,updateacl"), {"provision": 3.0, "updateacl": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("provisioning=1")
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile(values, 100), 100.0)
+        self.assertEqual(percentile([1.0], 95), 1.0)
+
+    def test_closed_loop(self):
+        result = asyncio.run(run("closed", concurrency=4, duration=60, max_requests=12))
+
+        self.assertEqual(len(result.samples), 12)
+        summary = summarize(result)
+        self.assertEqual(summary["total"]["requests"], 12)
+        self.assertEqual(list(summary)[-1], "total")
+        for name in ("provision", "provision_status", "updateacl"):
+            if name in summary:
+                self.assertEqual(summary[name]["statuses"], {"500": summary[name]["requests"]})
+                self.assertLessEqual(summary[name]["p50"], summary[name]["p99"])
+
+    def test_open_loop(self):
+        result = asyncio.run(run("open", rate=200, arrival="constant", duration=60, max_requests=10, max_in_flight=2))
+
+        self.assertEqual(len(result.samples), 10)
+        self.assertGreaterEqual(result.elapsed, 9 / 200)
@@ -0,0 +1,113 @@
+import tracemalloc
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from pydantic import SecretStr
+from starlette.testclient import TestClient
+
+from src.main import app
+from src.memory import MemoryTrackingMiddleware, memory_stage
+from src.models.api_models import DescriptorKind, ProvisioningRequest
+from src.request_context import request_context
+from src.settings import MemorySettings, admin_settings
+from tests.conftest import collect_data_points
+
+descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+provisioning_request = dict(
+    ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+)
+
+
+def peak_counts(path: str) -> dict:
+    return {
+        point.attributes["stage"]: point.count
+        for point in collect_data_points("tech_adapter.request.memory.peak")
+        if point.attributes["url.path"] == path
+    }
+
+
+class TracemallocTestCase(unittest.TestCase):
+    def setUp(self):
+        self.was_tracing = tracemalloc.is_tracing()
+
+    def tearDown(self):
+        if not self.was_tracing:
+            tracemalloc.stop()
+
+
+class TestMemoryStage(TracemallocTestCase):
+    def test_noop_when_not_tracing(self):
+        if self.was_tracing:
+            self.skipTest("tracemalloc already tracing")
+
+        with request_context({"path": "/test"}) as context:
+            with memory_stage("parse"):
+                pass
+
+        self.assertEqual(context.memory_peaks, {})
+
+    def test_stage_peak(self):
+        tracemalloc.start()
+
+        with request_context({"path": "/test"}) as context:
+            context.memory_baseline = tracemalloc.get_traced_memory()[0]
+            with memory_stage("parse"):
+                data = bytearray(1_000_000)
+            del data
+
+        self.assertGreaterEqual(context.memory_peaks["parse"], 1_000_000)
+        self.assertGreaterEqual(context.memory_peaks["request"], 1_000_000)
+
+
+class TestMemoryTrackingMiddleware(TracemallocTestCase):
+    def test_request_stages_are_recorded(self):
+        client = TestClient(MemoryTrackingMiddleware(app, MemorySettings(tracking_enabled=True)))
+        before = peak_counts("/v1/provision")
+
+        resp = client.post("/v1/provision", json=provisioning_request)
+
+        self.assertEqual(resp.status_code, 500)
+        after = peak_counts("/v1/provision")
+        for stage in ("request", "parse", "validate", "serialize"):
+            self.assertEqual(after.get(stage, 0) - before.get(stage, 0), 1, stage)
+
+
+client = TestClient(app)
+
+
+class TestMemorySnapshotEndpoint(TracemallocTestCase):
+    def test_not_found_without_admin_token(self):
+        resp = client.post("/admin/memory/snapshot")
+
+        self.assertEqual(resp.status_code, 404)
+
+    @patch.object(admin_settings, "token", SecretStr("secret"))
+    def test_forbidden_with_wrong_token(self):
+        resp = client.post("/admin/memory/snapshot", headers={"X-Admin-Token": "guess"})
+
+        self.assertEqual(resp.status_code, 403)
+
+    @patch.object(admin_settings, "token", SecretStr("secret"))
+    def test_tracking_disabled(self):
+        if self.was_tracing:
+            self.skipTest("tracemalloc already tracing")
+
+        resp = client.post("/admin/memory/snapshot", headers={"X-Admin-Token": "secret"})
+
+        self.assertEqual(resp.status_code, 400)
+
+    @patch.object(admin_settings, "token", SecretStr("secret"))
+    def test_snapshot_diff(self):
+        tracemalloc.start()
+
+        first = client.post("/admin/memory/snapshot", headers={"X-Admin-Token": "secret"})
+        retained = [bytearray(1000) for _ in range(1000)]
+        second = client.post("/admin/memory/snapshot", headers={"X-Admin-Token": "secret"})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()["previousTakenAt"], first.json()["takenAt"])
+        self.assertGreaterEqual(second.json()["sizeDiff"], 1_000_000)
+        self.assertIn("test_memory.py", second.json()["allocations"][0]["location"])
+        del retained
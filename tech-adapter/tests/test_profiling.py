@@ -0,0 +1,92 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from starlette.testclient import TestClient
+
+from src.main import app
+from src.models.api_models import DescriptorKind, ProvisioningRequest
+from src.profiling import ProfilingMiddleware, _cprofile_session
+from src.settings import ProfilingSettings
+
+descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+provisioning_request = dict(
+    ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+)
+
+
+class TestProfilingMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def client(self, **settings) -> TestClient:
+        profiling_settings = ProfilingSettings(enabled=True, directory=Path(self.directory.name), **settings)
+        return TestClient(ProfilingMiddleware(app, settings=profiling_settings))
+
+    def profiles(self) -> list[Path]:
+        return sorted(Path(self.directory.name).iterdir())
+
+    def test_disabled_by_default(self):
+        self.assertNotIn(ProfilingMiddleware, [middleware.cls for middleware in app.user_middleware])
+
+    def test_trusted_header_is_profiled(self):
+        client = self.client(token="secret")
+
+        resp = client.post("/v1/provision", json=provisioning_request, headers={"X-Profile-Request": "secret"})
+
+        self.assertEqual(resp.status_code, 500)
+        profiles = self.profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertTrue(
+            profiles[0].name.endswith("-v1_provision-urn_dmb_cmp_healthcare_vaccinations_0_snowflake_output_port.prof")
+        )
+
+    def test_wrong_token_is_not_profiled(self):
+        client = self.client(token="secret")
+
+        client.post("/v1/provision", json=provisioning_request, headers={"X-Profile-Request": "guess"})
+
+        self.assertEqual(self.profiles(), [])
+
+    def test_header_ignored_without_token(self):
+        client = self.client()
+
+        client.post("/v1/provision", json=provisioning_request, headers={"X-Profile-Request": ""})
+
+        self.assertEqual(self.profiles(), [])
+
+    def test_sampled_requests_are_profiled(self):
+        client = self.client(sample_rate=1.0)
+
+        client.get("/v1/provision/token123/status")
+
+        profiles = self.profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertIn("-v1_provision_token_status-none.prof", profiles[0].name)
+
+    def test_retention(self):
+        client = self.client(sample_rate=1.0, max_profiles=2)
+
+        for _ in range(4):
+            client.get("/v1/provision/token123/status")
+
+        self.assertEqual(len(self.profiles()), 2)
+
+    def test_sampling_mode(self):
+        client = self.client(sample_rate=1.0, mode="sampling", sampling_interval=0.001)
+
+        client.post("/v1/provision", json=provisioning_request)
+
+        profiles = self.profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0].suffix, ".collapsed")
+
+    def test_one_cprofile_session_at_a_time(self):
+        client = self.client(sample_rate=1.0, sampling_interval=0.001)
+
+        with _cprofile_session:
+            client.get("/v1/provision/token123/status")
+        client.get("/v1/provision/token123/status")
+
+        self.assertEqual([profile.suffix for profile in self.profiles()], [".collapsed", ".prof"])
@@ -0,0 +1,170 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+from starlette.testclient import TestClient
+
+from src import main
+from src.main import app
+from src.models.api_models import DescriptorKind, Info, ProvisioningRequest, ProvisioningStatus, Status1
+from src.models.data_product_descriptor import DataProduct
+from src.provisioning_store import ProvisioningStore
+from src.settings import ProvisioningStoreSettings, idempotency_settings
+from src.utility.fingerprint import provisioning_fingerprint
+
+descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+descriptor = yaml.safe_load(descriptor_str)
+component_id = descriptor["componentIdToProvision"]
+status = ProvisioningStatus(
+    status=Status1.COMPLETED,
+    result="Provisioned",
+    info=Info(publicInfo={"table": {"type": "string", "label": "Table", "value": "vaccinations"}}, privateInfo={}),
+)
+
+
+def data_product(**changes) -> DataProduct:
+    return DataProduct(**{**descriptor["dataProduct"], **changes})
+
+
+class TestProvisioningStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings = ProvisioningStoreSettings(path=Path(self.directory.name) / "state" / "store.sqlite3")
+        self.store = ProvisioningStore(self.settings)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_get_put_delete(self):
+        self.assertIsNone(self.store.get_status("a", "1"))
+
+        self.store.put_status("a", "1", status)
+        self.assertEqual(self.store.get_status("a", "1"), status)
+        self.assertIsNone(self.store.get_status("a", "2"))
+        self.assertIsNone(self.store.get_status("b", "1"))
+
+        self.store.put_status("a", "2", status)
+        self.assertIsNone(self.store.get_status("a", "1"))
+        self.assertEqual(self.store.get_status("a", "2"), status)
+
+        self.store.delete_status("a")
+        self.assertIsNone(self.store.get_status("a", "2"))
+
+    def test_identities(self):
+        self.assertIsNone(self.store.get_identities("a"))
+
+        self.store.put_identities("a", {"user:alice", "group:dev"})
+        self.store.put_identities("b", [])
+        self.assertEqual(self.store.get_identities("a"), {"user:alice", "group:dev"})
+        self.assertEqual(self.store.get_identities("b"), set())
+
+        self.store.delete_identities("a")
+        self.assertIsNone(self.store.get_identities("a"))
+
+    def test_persistent(self):
+        self.store.put_status("a", "1", status)
+        self.store.close()
+
+        self.assertEqual(ProvisioningStore(self.settings).get_status("a", "1"), status)
+
+    def test_failures_are_misses(self):
+        Path(self.directory.name, "state").write_text("not a directory")
+
+        with patch("src.provisioning_store.logger") as logger:
+            self.store.put_status("a", "1", status)
+            self.assertIsNone(self.store.get_status("a", "1"))
+        self.assertEqual(logger.warning.call_count, 2)
+
+
+class TestProvisioningFingerprint(unittest.TestCase):
+    def test_depends_on_the_component_and_the_data_product_fields(self):
+        fingerprint = provisioning_fingerprint(data_product(), component_id)
+        components = descriptor["dataProduct"]["components"]
+        other_changed = [{**components[0], "description": "changed"}, components[1]]
+
+        self.assertEqual(provisioning_fingerprint(data_product(components=other_changed), component_id), fingerprint)
+        self.assertNotEqual(provisioning_fingerprint(data_product(description="changed"), component_id), fingerprint)
+        self.assertIsNone(provisioning_fingerprint(data_product(), "unknown"))
+
+
+class TestIdempotentProvisioning(unittest.TestCase):
+    request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ProvisioningStore(ProvisioningStoreSettings(path=Path(self.directory.name) / "store.sqlite3"))
+        self.client = TestClient(app)
+        for patcher in (
+            patch.object(main, "provisioning_store", self.store),
+            patch.object(idempotency_settings, "enabled", True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def provision(self, **params):
+        return self.client.post("/v1/provision", json=dict(self.request), params=params)
+
+    def test_unchanged_component(self):
+        self.store.put_status(component_id, provisioning_fingerprint(data_product(), component_id), status)
+
+        resp = self.provision()
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(ProvisioningStatus.model_validate(resp.json()), status)
+
+    def test_forced(self):
+        self.store.put_status(component_id, provisioning_fingerprint(data_product(), component_id), status)
+
+        resp = self.provision(force=True)
+
+        self.assertEqual(resp.status_code, 500)
+        self.assertIn("Response not yet implemented", resp.json().get("error"))
+
+    def test_changed_component(self):
+        self.store.put_status(component_id, "previous", status)
+
+        self.assertEqual(self.provision().status_code, 500)
+
+    def test_unprovision_forgets_the_component(self):
+        self.store.put_status(component_id, provisioning_fingerprint(data_product(), component_id), status)
+
+        self.client.post("/v1/unprovision", json=dict(self.request))
+
+        self.assertEqual(self.provision().status_code, 500)
+
+    def test_component_provisioned_again_once_changed(self):
+        provisioned = []
+
+        def provision_component(data_product, component_id, fingerprint, http_client):
+            provisioned.append(component_id)
+            self.store.put_status(component_id, fingerprint, status)
+            return status
+
+        changed = yaml.safe_load(descriptor_str)
+        changed["dataProduct"]["components"][1]["dataContract"]["SLA"]["timeliness"] = "1BD"
+        changed_request = ProvisioningRequest(
+            descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=yaml.safe_dump(changed)
+        )
+
+        with patch.object(main, "provision_component", provision_component):
+            responses = [
+                self.client.post("/v1/provision", json=dict(request))
+                for request in (self.request, self.request, changed_request)
+            ]
+
+        self.assertEqual([resp.status_code for resp in responses], [200, 200, 200])
+        # The unchanged component is skipped, the one whose data contract SLA changed is provisioned again
+        self.assertEqual(provisioned, [component_id, component_id])
+
+    def test_disabled(self):
+        self.store.put_status(component_id, provisioning_fingerprint(data_product(), component_id), status)
+
+        with patch.object(idempotency_settings, "enabled", False):
+            self.assertEqual(self.provision().status_code, 500)
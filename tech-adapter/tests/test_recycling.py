@@ -0,0 +1,172 @@
+import asyncio
+import random
+import signal
+import unittest
+from unittest.mock import Mock, patch
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from src import shutdown
+from src.jobs import JobRegistry
+from src.memory import current_rss
+from src.recycling import AGE, REQUESTS, RSS, RecyclingMiddleware, WorkerRecycler
+from src.settings import RecyclingSettings, ShutdownSettings
+from src.shutdown import ShutdownCoordinator, shutdown_lifespan
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestWorkerRecycler(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        self.rss = 100
+        self.coordinator = Mock(spec=ShutdownCoordinator)
+        self.coordinator.stop_server.return_value = True
+
+    def recycler(self, **settings) -> WorkerRecycler:
+        recycling_settings = RecyclingSettings(**settings)
+        rng = random.Random(1)
+        recycler = WorkerRecycler(recycling_settings, self.coordinator, rss=lambda: self.rss, clock=self.clock, rng=rng)
+        recycler.start()
+        return recycler
+
+    def test_limits_are_checked_in_order(self):
+        recycler = self.recycler(max_requests=2, max_rss_bytes=1000, max_age_seconds=60)
+        self.assertIsNone(recycler.check())
+
+        self.clock.now += 60
+        self.assertEqual(recycler.check(), AGE)
+        self.rss = 1000
+        self.assertEqual(recycler.check(), RSS)
+        recycler.requests = 2
+        self.assertEqual(recycler.check(), REQUESTS)
+
+    def test_limits_are_jittered(self):
+        settings = RecyclingSettings(
+            max_requests=100, max_requests_jitter=10, max_age_seconds=60, max_age_jitter_seconds=30
+        )
+        limits = set()
+        for seed in range(5):
+            recycler = WorkerRecycler(settings, self.coordinator, rng=random.Random(seed))
+            recycler.start()
+            assert recycler.max_requests is not None and recycler.max_age_seconds is not None
+            self.assertTrue(100 <= recycler.max_requests <= 110)
+            self.assertTrue(60 <= recycler.max_age_seconds <= 90)
+            limits.add((recycler.max_requests, recycler.max_age_seconds))
+
+        self.assertGreater(len(limits), 1)
+
+    def test_worker_is_recycled_once_after_its_requests(self):
+        recycler = self.recycler(max_requests=3)
+
+        for _ in range(5):
+            recycler.request_done()
+
+        self.assertEqual(recycler.reason, REQUESTS)
+        self.coordinator.stop_server.assert_called_once_with()
+
+    def test_watch_recycles_on_memory(self):
+        recycler = self.recycler(max_rss_bytes=1000, check_interval_seconds=0.01)
+        self.rss = 2000
+
+        asyncio.run(asyncio.wait_for(recycler.watch(), 1))
+
+        self.assertEqual(recycler.reason, RSS)
+        self.coordinator.stop_server.assert_called_once_with()
+
+    def test_middleware_counts_requests(self):
+        recycler = self.recycler(max_requests=2)
+        app = Starlette(routes=[Route("/", lambda request: PlainTextResponse("ok"))])
+        client = TestClient(RecyclingMiddleware(app, recycler))
+
+        self.assertEqual([client.get("/").status_code for _ in range(2)], [200, 200])
+
+        self.assertEqual(recycler.requests, 2)
+        self.assertEqual(recycler.reason, REQUESTS)
+
+    def test_current_rss(self):
+        self.assertGreater(current_rss(), 0)
+
+
+class _Server:
+    """
+    Stands for the uvicorn server, whose listeners the coordinator closes.
+    """
+
+    def __init__(self) -> None:
+        self.servers = [Mock(), Mock()]
+        self.exits: list[tuple] = []
+
+    def handle_exit(self, signum, frame) -> None:
+        self.exits.append((signum, frame))
+
+
+class TestStopServer(unittest.TestCase):
+    def test_listeners_close_before_the_server_stops(self):
+        coordinator = ShutdownCoordinator(
+            ShutdownSettings(drain_delay_seconds=5, grace_period_seconds=1), JobRegistry(), Mock()
+        )
+        self.assertFalse(coordinator.stop_server())
+
+        server = _Server()
+        previous = signal.signal(signal.SIGTERM, server.handle_exit)
+
+        async def run():
+            coordinator.start(asyncio.get_running_loop())
+            self.assertTrue(coordinator.stop_server(settle_seconds=0.01))
+            stopped_right_away = bool(server.exits)
+            await asyncio.sleep(0.05)
+            return stopped_right_away
+
+        try:
+            self.assertFalse(asyncio.run(run()))
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+
+        for listener in server.servers:
+            listener.close.assert_called_once_with()
+        self.assertEqual(server.exits, [(signal.SIGTERM, None)])
+        # The worker stays ready, and skips the drain delay
+        self.assertTrue(coordinator.ready)
+
+    def test_server_stops_without_its_listeners(self):
+        coordinator = ShutdownCoordinator(ShutdownSettings(), JobRegistry(), Mock())
+        exits = []
+        previous = signal.signal(signal.SIGTERM, lambda signum, frame: exits.append(signum))
+
+        async def run():
+            coordinator.start(asyncio.get_running_loop())
+            coordinator.stop_server(settle_seconds=0)
+            await asyncio.sleep(0.01)
+
+        try:
+            with patch("src.shutdown.logger") as logger:
+                asyncio.run(run())
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+
+        logger.warning.assert_called_once()
+        self.assertEqual(exits, [signal.SIGTERM])
+
+
+class TestSupervisedWorkers(unittest.TestCase):
+    def test_job_journal_refuses_several_workers(self):
+        async def start():
+            async with shutdown_lifespan(Mock()):
+                pass
+
+        with (
+            patch.object(shutdown, "is_supervised_worker", lambda: True),
+            patch.object(shutdown.job_journal.settings, "enabled", True),
+        ):
+            with self.assertRaisesRegex(RuntimeError, "single server worker"):
+                asyncio.run(start())
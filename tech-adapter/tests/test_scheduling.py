@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import unittest
+from pathlib import Path
+from typing import Callable
+from unittest.mock import patch
+
+from starlette.testclient import TestClient
+
+from src import main
+from src.main import app
+from src.models.api_models import DescriptorKind, ProvisioningRequest
+from src.scheduling import FairScheduler
+from src.settings import SchedulingSettings
+
+
+def scheduler(**settings) -> FairScheduler:
+    return FairScheduler(SchedulingSettings(enabled=True, **settings))
+
+
+async def run_all(fair_scheduler: FairScheduler, operations: list[tuple[str, str, str]]) -> list[str]:
+    """
+    Submits the operations in order, all while a first blocking one holds the workers, and returns the order they ran in.
+    """  # noqa: E501
+
+    started: list[str] = []
+    release = threading.Event()
+    blocking = asyncio.create_task(fair_scheduler.run("first", "first", release.wait))
+    await asyncio.sleep(0.01)
+
+    def start(name: str) -> Callable[[], None]:
+        return lambda: started.append(name)
+
+    tasks = [
+        asyncio.create_task(fair_scheduler.run(domain, data_product_id, start(name)))
+        for domain, data_product_id, name in operations
+    ]
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(blocking, *tasks)
+    return started
+
+
+class TestFairScheduler(unittest.TestCase):
+    def test_domains_take_turns(self):
+        operations = [("a", "big", f"a{i}") for i in range(4)] + [("b", "small", "b0"), ("c", "other", "c0")]
+
+        started = asyncio.run(run_all(scheduler(max_concurrency=1), operations))
+
+        self.assertEqual(started, ["a0", "b0", "c0", "a1", "a2", "a3"])
+
+    def test_data_products_of_a_domain_take_turns(self):
+        operations = [("a", "big", f"big{i}") for i in range(3)] + [("a", "small", "small0"), ("b", "x", "b0")]
+
+        started = asyncio.run(run_all(scheduler(max_concurrency=1), operations))
+
+        self.assertEqual(started, ["big0", "b0", "small0", "big1", "big2"])
+
+    def test_caps(self):
+        running = {"a": 0, "b": 0}
+        peaks = {"a": 0, "b": 0}
+        lock = threading.Lock()
+
+        def operation(domain):
+            def run():
+                with lock:
+                    running[domain] += 1
+                    peaks[domain] = max(peaks[domain], running[domain])
+                threading.Event().wait(0.01)
+                with lock:
+                    running[domain] -= 1
+
+            return run
+
+        async def run(fair_scheduler):
+            operations = [(domain, f"{domain}{i % 3}") for i in range(12) for domain in "ab"]
+            await asyncio.gather(*(fair_scheduler.run(key[0], key[1], operation(key[0])) for key in operations))
+
+        asyncio.run(run(scheduler(max_concurrency=8, max_per_domain=3)))
+        self.assertEqual(peaks, {"a": 3, "b": 3})
+
+        peaks.update(a=0, b=0)
+        asyncio.run(run(scheduler(max_concurrency=8, max_per_data_product=1)))
+        self.assertEqual(peaks, {"a": 3, "b": 3})
+
+    def test_queue_depth(self):
+        async def run():
+            fair_scheduler = scheduler(max_concurrency=1)
+            release = threading.Event()
+            tasks = [
+                asyncio.create_task(fair_scheduler.run(domain, data_product_id, release.wait))
+                for domain, data_product_id in [("a", "x"), ("a", "x"), ("a", "y"), ("b", "z")]
+            ]
+            await asyncio.sleep(0.01)
+            depths = (
+                fair_scheduler.queue_depth(),
+                fair_scheduler.queue_depth("a"),
+                fair_scheduler.queue_depth("a", "x"),
+                fair_scheduler.running(),
+            )
+            release.set()
+            await asyncio.gather(*tasks)
+            return depths, fair_scheduler.queue_depth(), fair_scheduler.running()
+
+        self.assertEqual(asyncio.run(run()), ((3, 2, 1, 1), 0, 0))
+
+    def test_cancelled_waiters_leave_the_queue(self):
+        async def run():
+            fair_scheduler = scheduler(max_concurrency=1)
+            release = threading.Event()
+            blocking = asyncio.create_task(fair_scheduler.run("a", "x", release.wait))
+            waiting = asyncio.create_task(fair_scheduler.run("b", "y", lambda: "b"))
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            await asyncio.sleep(0)
+            depth = fair_scheduler.queue_depth()
+            release.set()
+            await blocking
+            return depth, await fair_scheduler.run("c", "z", lambda: "c")
+
+        self.assertEqual(asyncio.run(run()), (0, "c"))
+
+    def test_exceptions_free_the_worker(self):
+        async def run():
+            fair_scheduler = scheduler(max_concurrency=1)
+
+            def fail():
+                raise ValueError("failed")
+
+            with self.assertRaises(ValueError):
+                await fair_scheduler.run("a", "x", fail)
+            return await fair_scheduler.run("a", "x", lambda: "ok")
+
+        self.assertEqual(asyncio.run(run()), "ok")
+
+    def test_cancelled_operations_keep_their_worker_until_they_return(self):
+        async def run():
+            fair_scheduler = scheduler(max_concurrency=1)
+            release = threading.Event()
+            cancelled = asyncio.create_task(fair_scheduler.run("a", "x", release.wait))
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            await asyncio.gather(cancelled, return_exceptions=True)
+            waiting = asyncio.create_task(fair_scheduler.run("b", "y", lambda: "b"))
+            await asyncio.sleep(0.01)
+            while_running = (fair_scheduler.running(), fair_scheduler.queue_depth(), waiting.done())
+            release.set()
+            return while_running, await waiting, fair_scheduler.running()
+
+        self.assertEqual(asyncio.run(run()), ((1, 1, False), "b", 0))
+
+
+class TestScheduledProvisioning(unittest.TestCase):
+    def test_provision_and_unprovision_are_scheduled(self):
+        descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+        request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+        fair_scheduler = scheduler()
+        client = TestClient(app)
+
+        with patch.object(main, "provisioning_scheduler", fair_scheduler), patch.object(
+            fair_scheduler, "run", wraps=fair_scheduler.run
+        ) as run:
+            self.assertEqual(client.post("/v1/provision", json=dict(request)).status_code, 500)
+            self.assertEqual(client.post("/v1/unprovision", json=dict(request)).status_code, 500)
+
+        key = ("healthcare", "urn:dmb:dp:healthcare:vaccinations:0")
+        self.assertEqual([call.args[:2] for call in run.call_args_list], [key, key])
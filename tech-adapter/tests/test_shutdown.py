@@ -0,0 +1,158 @@
+import asyncio
+import signal
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from starlette.testclient import TestClient
+
+from src import main
+from src.jobs import JobRegistry
+from src.main import app
+from src.models.api_models import DescriptorKind, ProvisioningRequest
+from src.provisioning_store import ProvisioningStore
+from src.settings import ProvisioningStoreSettings, ShutdownSettings
+from src.shutdown import ShutdownCoordinator, shutdown_coordinator
+
+
+class TestJobRegistry(unittest.TestCase):
+    def test_jobs_are_registered_while_running(self):
+        jobs = JobRegistry()
+        seen = []
+
+        result = jobs.tracked("provision", "urn:cmp", lambda: seen.extend(jobs.running()) or "done")()
+
+        self.assertEqual(result, "done")
+        self.assertEqual([(job.operation, job.component_id) for job in seen], [("provision", "urn:cmp")])
+        self.assertEqual(jobs.running(), [])
+
+    def test_failed_jobs_are_unregistered(self):
+        jobs = JobRegistry()
+
+        def fail():
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            jobs.tracked("provision", "urn:cmp", fail)()
+
+        self.assertEqual(jobs.running(), [])
+
+    def test_wait_idle(self):
+        jobs = JobRegistry()
+        started, release = threading.Event(), threading.Event()
+        thread = threading.Thread(target=jobs.tracked("provision", "urn:cmp", lambda: started.set() or release.wait()))
+        thread.start()
+        started.wait()
+        try:
+            self.assertFalse(asyncio.run(jobs.wait_idle(0.05, poll_seconds=0.01)))
+            threading.Timer(0.05, release.set).start()
+            self.assertTrue(asyncio.run(jobs.wait_idle(1, poll_seconds=0.01)))
+        finally:
+            release.set()
+            thread.join()
+
+
+class TestShutdownCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ProvisioningStore(ProvisioningStoreSettings(path=Path(self.directory.name) / "store.sqlite3"))
+        self.jobs = JobRegistry()
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def coordinator(self, grace_period_seconds: int = 1) -> ShutdownCoordinator:
+        settings = ShutdownSettings(drain_delay_seconds=0, grace_period_seconds=grace_period_seconds)
+        return ShutdownCoordinator(settings, self.jobs, self.store)
+
+    def run_job(self, seconds: float) -> threading.Thread:
+        started = threading.Event()
+
+        def job() -> None:
+            started.set()
+            time.sleep(seconds)
+
+        thread = threading.Thread(target=self.jobs.tracked("provision", f"urn:cmp:{seconds}", job))
+        thread.start()
+        started.wait()
+        return thread
+
+    def test_drain_waits_for_the_jobs_within_the_grace_period(self):
+        coordinator = self.coordinator()
+        thread = self.run_job(0.1)
+
+        asyncio.run(coordinator.drain())
+        thread.join()
+
+        self.assertFalse(coordinator.ready)
+        self.assertEqual(self.store.take_interrupted_jobs(), [])
+
+    def test_jobs_outliving_the_grace_period_are_recorded(self):
+        coordinator = self.coordinator(grace_period_seconds=0)
+        thread = self.run_job(0.2)
+
+        asyncio.run(coordinator.drain())
+        thread.join()
+
+        interrupted = self.store.take_interrupted_jobs()
+        self.assertEqual([(job.operation, job.component_id) for job in interrupted], [("provision", "urn:cmp:0.2")])
+        # Reported once, by the next start
+        self.assertEqual(self.store.take_interrupted_jobs(), [])
+
+    def test_sigterm_drains_before_handing_over_to_the_server(self):
+        coordinator = self.coordinator()
+        server_handler = Mock()
+        previous = signal.signal(signal.SIGTERM, server_handler)
+
+        async def run():
+            coordinator.start(asyncio.get_running_loop())
+            signal.raise_signal(signal.SIGTERM)
+            ready_after_signal = coordinator.ready
+            await asyncio.sleep(0.05)
+            return ready_after_signal
+
+        try:
+            self.assertFalse(asyncio.run(run()))
+            server_handler.assert_called_once()
+            # A second SIGTERM is handed over right away
+            signal.raise_signal(signal.SIGTERM)
+            self.assertEqual(server_handler.call_count, 2)
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+
+
+class TestHealthEndpoints(unittest.TestCase):
+    def test_readiness_turns_false_while_draining(self):
+        client = TestClient(app)
+
+        self.assertEqual(client.get("/health/live").status_code, 200)
+        self.assertEqual(client.get("/health/ready").json(), {"status": "UP"})
+        with patch.object(shutdown_coordinator, "_draining_since", time.monotonic()):
+            response = client.get("/health/ready")
+            self.assertEqual((response.status_code, response.json()), (503, {"status": "DRAINING"}))
+            self.assertEqual(client.get("/health/live").status_code, 200)
+
+
+class TestTrackedProvisioning(unittest.TestCase):
+    def test_provisioning_runs_as_a_job(self):
+        descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+        request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+        running = []
+        provision_component = main.provision_component
+
+        def recording_provision_component(*args):
+            running.extend(main.job_registry.running())
+            return provision_component(*args)
+
+        with patch.object(main, "provision_component", recording_provision_component):
+            self.assertEqual(TestClient(app).post("/v1/provision", json=dict(request)).status_code, 500)
+
+        self.assertEqual(
+            [(job.operation, job.component_id) for job in running],
+            [("provision", "urn:dmb:cmp:healthcare:vaccinations:0:snowflake-output-port")],
+        )
+        self.assertEqual(main.job_registry.running(), [])
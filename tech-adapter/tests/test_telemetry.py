@@ -0,0 +1,106 @@
+import unittest
+from pathlib import Path
+
+import yaml
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from starlette.testclient import TestClient
+
+from src.main import app
+from src.models.api_models import DescriptorKind, ProvisioningRequest
+from src.models.data_product_descriptor import DataProduct
+from src.settings import TracingSettings
+from src.telemetry import (
+    create_tracer_provider,
+    is_excluded_url,
+    set_tracer_provider,
+    start_span,
+    suppress_tracing,
+)
+from src.utility.parsing_pydantic_models import parse_yaml_with_model
+
+client = TestClient(app)
+
+
+def provisioning_request() -> dict:
+    descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+    return dict(ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str))
+
+
+class TestTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        set_tracer_provider(create_tracer_provider(span_processors=[SimpleSpanProcessor(self.exporter)]))
+
+    def tearDown(self):
+        set_tracer_provider(None)
+
+    def spans_by_name(self) -> dict:
+        return {span.name: span for span in self.exporter.get_finished_spans()}
+
+    def test_provision_spans(self):
+        resp = client.post("/v1/provision", json=provisioning_request())
+
+        self.assertEqual(resp.status_code, 500)
+        spans = self.spans_by_name()
+        self.assertIn("middleware.log_request_response", spans)
+        self.assertIn("check_response", spans)
+        self.assertGreater(spans["descriptor.extract_component"].attributes["descriptor.bytes"], 0)
+        self.assertTrue(spans["descriptor.extract_component"].attributes["descriptor.extracted"])
+        self.assertEqual(spans["descriptor.validate"].attributes["model.name"], "DataProduct")
+        # Only the component to provision is extracted
+        self.assertEqual(spans["descriptor.validate"].attributes["data_product.components"], 1)
+        self.assertEqual(spans["middleware.log_request_response"].attributes["http.response.status_code"], 500)
+
+    def test_spans_are_children_of_the_middleware_span(self):
+        client.post("/v1/provision", json=provisioning_request())
+
+        spans = self.spans_by_name()
+        middleware_span = spans["middleware.log_request_response"]
+        self.assertEqual(spans["descriptor.validate"].parent.span_id, middleware_span.context.span_id)
+        self.assertEqual(spans["check_response"].parent.span_id, middleware_span.context.span_id)
+
+    def test_component_lookup_span(self):
+        with start_span("parent"):
+            descriptor = yaml.safe_load(Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text())
+            data_product = parse_yaml_with_model(descriptor["dataProduct"], DataProduct)
+            data_product.get_component_by_id(descriptor["componentIdToProvision"])
+
+        lookup = self.spans_by_name()["data_product.component_lookup"]
+        self.assertEqual(lookup.attributes["component.id"], descriptor["componentIdToProvision"])
+        self.assertEqual(lookup.attributes["component.kind"], "outputport")
+
+    def test_excluded_url_is_not_traced(self):
+        resp = client.get("/openapi.json")
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(self.exporter.get_finished_spans()), 0)
+
+    def test_sampling_ratio_zero_drops_spans(self):
+        set_tracer_provider(
+            create_tracer_provider(TracingSettings(sampling_ratio=0.0), [SimpleSpanProcessor(self.exporter)])
+        )
+
+        client.post("/v1/provision", json=provisioning_request())
+
+        self.assertEqual(len(self.exporter.get_finished_spans()), 0)
+
+    def test_suppress_tracing(self):
+        with suppress_tracing():
+            with start_span("suppressed") as span:
+                self.assertFalse(span.is_recording())
+
+        self.assertEqual(len(self.exporter.get_finished_spans()), 0)
+
+
+class TestExcludedUrls(unittest.TestCase):
+    def test_is_excluded_url(self):
+        settings = TracingSettings(excluded_urls="docs, ^/health$")
+
+        self.assertTrue(is_excluded_url("/docs", settings))
+        self.assertTrue(is_excluded_url("/health", settings))
+        self.assertFalse(is_excluded_url("/healthz", settings))
+        self.assertFalse(is_excluded_url("/v1/provision", settings))
+
+    def test_no_excluded_urls(self):
+        self.assertFalse(is_excluded_url("/docs", TracingSettings(excluded_urls="")))
@@ -0,0 +1,148 @@
+import asyncio
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+from starlette.testclient import TestClient
+
+from perf.replay import replay, summarize
+from src.large_body import LargeBodyMiddleware
+from src.main import app
+from src.models.api_models import DescriptorKind, ProvisioningRequest
+from src.settings import CaptureSettings, LargeBodySettings, capture_settings
+from src.traffic_capture import CapturedExchange, TrafficCapture, read_capture
+
+descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+provisioning_request = dict(
+    ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+)
+
+
+def exchange(i: int, size: int = 10) -> CapturedExchange:
+    return CapturedExchange(
+        id=f"id-{i}",
+        timestamp=1000.0 + i,
+        duration=0.01,
+        method="POST",
+        path="/v1/provision",
+        query="",
+        content_type="application/json",
+        request="x" * size,
+        status=500,
+        response='{"error": "Response not yet implemented"}',
+    )
+
+
+class TestTrafficCapture(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings = CaptureSettings(enabled=True, directory=Path(self.directory.name))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        capture = TrafficCapture(self.settings)
+        for i in range(3):
+            capture.record(exchange(i))
+        capture.close()
+
+        self.assertEqual(list(read_capture(self.settings.directory)), [exchange(i) for i in range(3)])
+
+    def test_unclosed_file_is_readable(self):
+        capture = TrafficCapture(self.settings)
+        capture.record(exchange(0))
+        capture.record(exchange(1))
+
+        self.assertEqual([e.id for e in read_capture(self.settings.directory)], ["id-0", "id-1"])
+        capture.close()
+
+    def test_file_without_gzip_trailer_is_readable(self):
+        path = self.settings.directory / "capture-1.ndjson.gz"
+        content = gzip.compress(
+            b'{"id": "id-0", "timestamp": 1.0, "duration": 0.1, "method": "GET", "path": "/", '
+            b'"query": "", "content_type": null, "request": "", "status": 200, "response": ""}\n'
+        )
+        path.write_bytes(content[:-8])
+
+        self.assertEqual([e.id for e in read_capture(path)], ["id-0"])
+
+    def test_rotation_and_retention(self):
+        settings = self.settings.model_copy(update={"max_file_bytes": 1000, "max_files": 2})
+        capture = TrafficCapture(settings)
+        for i in range(5):
+            capture.record(exchange(i, size=1000))
+        capture.close()
+
+        files = sorted(settings.directory.glob("capture-*.ndjson.gz"))
+        self.assertEqual(len(files), 2)
+        self.assertEqual([e.id for e in read_capture(settings.directory)], ["id-3", "id-4"])
+        self.assertEqual(files[0].stat().st_mode & 0o777, 0o600)
+
+    def test_excluded_urls(self):
+        capture = TrafficCapture(self.settings)
+
+        self.assertTrue(capture.is_captured("/v1/provision"))
+        self.assertFalse(capture.is_captured("/docs"))
+        self.assertFalse(capture.is_captured("/admin/memory/snapshot"))
+
+    def test_middleware_captures_and_replay_matches(self):
+        capture = TrafficCapture(self.settings)
+        with patch.object(capture_settings, "enabled", True), patch("src.main.traffic_capture", capture):
+            client = TestClient(app)
+            client.post("/v1/provision", json=provisioning_request, headers={"X-Request-Timeout": "30"})
+            client.get("/v1/provision/token/status?verbose=true")
+            client.get("/docs")
+        capture.close()
+
+        exchanges = list(read_capture(self.settings.directory))
+        self.assertEqual(
+            [(e.method, e.path, e.status) for e in exchanges],
+            [("POST", "/v1/provision", 500), ("GET", "/v1/provision/token/status", 500)],
+        )
+        self.assertEqual(exchanges[1].query, "verbose=true")
+        self.assertEqual(exchanges[0].content_type, "application/json")
+        self.assertEqual([e.headers for e in exchanges], [{"X-Request-Timeout": "30"}, {}])
+        self.assertIn("COMPONENT_DESCRIPTOR", exchanges[0].request)
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://tech-adapter") as client:
+                return await replay(client, exchanges, speed=0, max_in_flight=2)
+
+        results = asyncio.run(run())
+        summary = summarize(results)
+        self.assertEqual(summary["total"]["requests"], 2)
+        self.assertEqual(summary["total"]["mismatches"], 0)
+
+    def test_spooled_requests_are_skipped(self):
+        capture = TrafficCapture(self.settings)
+        client = TestClient(LargeBodyMiddleware(app, LargeBodySettings(enabled=True, threshold_bytes=1024)))
+        with (
+            patch.object(capture_settings, "enabled", True),
+            patch("src.main.traffic_capture", capture),
+            patch.object(capture, "skip") as skip,
+        ):
+            client.post("/v1/provision", json=provisioning_request)
+            client.post("/v1/provision", json={**provisioning_request, "descriptor": "a: 1"})
+        capture.close()
+
+        exchanges = list(read_capture(self.settings.directory))
+        self.assertEqual([json.loads(e.request)["descriptor"] for e in exchanges], ["a: 1"])
+        skip.assert_called_once_with("spooled")
+
+    def test_replay_detects_mismatches(self):
+        changed = exchange(0)
+        changed.response = '{"error": "something else"}'
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://tech-adapter") as client:
+                return await replay(client, [changed], speed=0, max_in_flight=1)
+
+        results = asyncio.run(run())
+        self.assertFalse(results[0].matches)
@@ -0,0 +1,167 @@
+import json
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+from starlette.testclient import TestClient
+
+from src.main import app
+from src.models.api_models import DescriptorKind, ProvisioningRequest, ValidationError
+from src.models.data_product_descriptor import DataProduct
+from src.settings import DescriptorLimitsSettings, descriptor_limits_settings
+from src.utility import yaml_loader
+from src.utility.parsing_pydantic_models import parse_yaml_with_model
+from src.utility.yaml_loader import DescriptorLimitExceeded, load_descriptor, load_yaml
+
+descriptor_str = Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+
+
+def alias_bomb(levels: int, width: int = 10) -> str:
+    lines = ['a0: &a0 ["lol"]']
+    for level in range(1, levels + 1):
+        aliases = ", ".join([f"*a{level - 1}"] * width)
+        lines.append(f"a{level}: &a{level} [{aliases}]")
+    return "\n".join(lines)
+
+
+def nested(depth: int) -> str:
+    return "[" * depth + "]" * depth
+
+
+class TestLoadYaml(unittest.TestCase):
+    def test_same_result_as_safe_load(self):
+        self.assertEqual(load_yaml(descriptor_str), yaml.safe_load(descriptor_str))
+
+    def test_aliases_within_limits(self):
+        data = load_yaml("base: &base {a: 1, b: 2}\nfirst: *base\nsecond:\n  <<: *base\n  c: 3")
+
+        self.assertEqual(data["first"], {"a": 1, "b": 2})
+        self.assertEqual(data["second"], {"a": 1, "b": 2, "c": 3})
+
+    def test_input_bytes(self):
+        limits = DescriptorLimitsSettings(max_bytes=100)
+
+        load_yaml("a" * 100, limits)
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "larger than 100 bytes"):
+            load_yaml("a" * 101, limits)
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "larger than 100 bytes"):
+            load_yaml("è" * 51, limits)
+
+    def test_nesting_depth(self):
+        limits = DescriptorLimitsSettings(max_depth=10)
+
+        load_yaml(nested(10), limits)
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "deeper than 10 levels"):
+            load_yaml(nested(11), limits)
+
+    def test_very_deep_nesting_does_not_exhaust_the_stack(self):
+        with self.assertRaises(DescriptorLimitExceeded):
+            load_yaml(nested(100_000))
+
+    def test_alias_count(self):
+        limits = DescriptorLimitsSettings(max_aliases=3)
+
+        load_yaml("a: &a 1\nb: [*a, *a, *a]", limits)
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "more than 3 aliases"):
+            load_yaml("a: &a 1\nb: [*a, *a, *a, *a]", limits)
+
+    def test_node_count(self):
+        limits = DescriptorLimitsSettings(max_nodes=100)
+
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "more than 100 nodes"):
+            load_yaml("[" + ", ".join(["1"] * 100) + "]", limits)
+
+    def test_alias_bomb_is_rejected_quickly(self):
+        # 10^9 nodes once expanded, from less than 1 KB of YAML
+        start = time.perf_counter()
+
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "nodes"):
+            load_yaml(alias_bomb(9))
+
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+    def test_recursive_alias(self):
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "recursive alias"):
+            load_yaml("a: &a [*a]")
+
+    def test_parse_yaml_with_model(self):
+        result = parse_yaml_with_model(alias_bomb(9), DataProduct)
+
+        self.assertIsInstance(result, ValidationError)
+        self.assertEqual(result.errors[0], "The descriptor exceeds the limits of the service.")
+
+
+client = TestClient(app)
+
+
+class TestLoadDescriptor(unittest.TestCase):
+    def test_json_is_decoded_as_json(self):
+        loaded = yaml.safe_load(descriptor_str)
+        descriptor = json.dumps(loaded, default=str)
+
+        with patch.object(yaml_loader, "load_yaml") as load_yaml_mock:
+            self.assertEqual(load_descriptor(descriptor), json.loads(descriptor))
+        load_yaml_mock.assert_not_called()
+
+    def test_stdlib_json(self):
+        with patch.object(yaml_loader, "_json_loads", json.loads):
+            self.assertEqual(load_descriptor(' \n{"a": [1, "b"]}'), {"a": [1, "b"]})
+
+    def test_yaml_fallback(self):
+        self.assertEqual(load_descriptor(descriptor_str), yaml.safe_load(descriptor_str))
+        self.assertEqual(load_descriptor("{a: 1, b: [x]}"), {"a": 1, "b": ["x"]})
+        with self.assertRaises(yaml.YAMLError):
+            load_descriptor('{"a": [1, }')
+
+    def test_limits(self):
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "larger than 100 bytes"):
+            load_descriptor('{"a": "' + "x" * 100 + '"}', DescriptorLimitsSettings(max_bytes=100))
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "deeper than 10 levels"):
+            load_descriptor('{"a": ' + nested(10) + "}", DescriptorLimitsSettings(max_depth=10))
+        with self.assertRaisesRegex(DescriptorLimitExceeded, "more than 10 nodes"):
+            load_descriptor('{"a": [1, 2, 3, 4, 5], "b": {"c": 1}}', DescriptorLimitsSettings(max_nodes=10))
+        for loads in (yaml_loader._json_loads, json.loads):
+            with patch.object(yaml_loader, "_json_loads", loads), self.assertRaises(DescriptorLimitExceeded):
+                load_descriptor('{"a": ' + nested(100_000) + "}")
+
+
+class TestRequestLimits(unittest.TestCase):
+    def test_alias_bomb_descriptor(self):
+        request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=alias_bomb(9))
+
+        resp = client.post("/v1/provision", json=dict(request))
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()["errors"][0], "The descriptor exceeds the limits of the service.")
+
+    @patch.object(descriptor_limits_settings, "max_request_bytes", 1000)
+    def test_content_length_above_the_limit(self):
+        body = b"x" * 1001
+
+        resp = client.post("/v1/provision", content=body, headers={"Content-Type": "application/json"})
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("larger than", resp.json()["errors"][0])
+
+    @patch.object(descriptor_limits_settings, "max_request_bytes", 1000)
+    def test_chunked_body_above_the_limit(self):
+        chunk = b"x" * 300
+        chunks = 4
+
+        resp = client.post(
+            "/v1/provision",
+            content=(chunk for _ in range(chunks)),
+            headers={"Content-Type": "application/json"},
+        )
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("larger than", resp.json()["errors"][0])
+
+    def test_body_within_the_limit(self):
+        request = ProvisioningRequest(descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str)
+
+        resp = client.post("/v1/provision", json=dict(request))
+
+        self.assertEqual(resp.status_code, 500)